@@ -11,7 +11,11 @@ type Category = { name: string; questions: CriticalQuestion[] };
 type RefinementResult = { categories: Category[] };
 
 interface IntakeViewProps {
-  onAnalyze: (prompt: string, refineResult: RefinementResult | null) => void;
+  onAnalyze: (
+    prompt: string,
+    refineResult: RefinementResult | null,
+    sessionToken: string | null
+  ) => void;
 }
 
 const IntakeView = ({ onAnalyze }: IntakeViewProps) => {
@@ -54,7 +58,7 @@ const IntakeView = ({ onAnalyze }: IntakeViewProps) => {
 
       if (data.success) {
         const refineResult: RefinementResult | null = data.result ?? null;
-        onAnalyze(trimmed, refineResult);
+        onAnalyze(trimmed, refineResult, data.session_token ?? null);
       } else {
         toast({
           variant: "destructive",
@@ -13,6 +13,7 @@ type RefinementResult = { categories: Category[] };
 interface RefinerViewProps {
   userPrompt: string;
   refineResult: RefinementResult | null;
+  sessionToken?: string | null;
   onHome: () => void;
   onGeneratePlan: () => void;
 }
@@ -109,7 +110,7 @@ const initialSections: Section[] = [
   },
 ];
 
-const RefinerView = ({ userPrompt, refineResult, onHome, onGeneratePlan }: RefinerViewProps) => {
+const RefinerView = ({ userPrompt, refineResult, sessionToken, onHome, onGeneratePlan }: RefinerViewProps) => {
   const [sections, setSections] = useState<Section[]>(initialSections);
   const [constraints, setConstraints] = useState("");
   const [isGenerating, setIsGenerating] = useState(false);
@@ -266,6 +267,7 @@ const RefinerView = ({ userPrompt, refineResult, onHome, onGeneratePlan }: Refin
           topic: userPrompt,
           user_idea: userPrompt,
           constraints: constraints,
+          session_token: sessionToken ?? undefined,
         }),
       });
 
@@ -12,11 +12,17 @@ const Index = () => {
   const [currentView, setCurrentView] = useState<View>("intake");
   const [userPrompt, setUserPrompt] = useState("");
   const [refineResult, setRefineResult] = useState<RefinementResult | null>(null);
+  const [sessionToken, setSessionToken] = useState<string | null>(null);
   const [planData, setPlanData] = useState<any>(null);
 
-  const handleAnalyze = (prompt: string, result: RefinementResult | null) => {
+  const handleAnalyze = (
+    prompt: string,
+    result: RefinementResult | null,
+    token: string | null
+  ) => {
     setUserPrompt(prompt);
     setRefineResult(result);
+    setSessionToken(token);
     setCurrentView("loading");
   };
 
@@ -37,6 +43,7 @@ const Index = () => {
     setCurrentView("intake");
     setUserPrompt("");
     setRefineResult(null);
+    setSessionToken(null);
     setPlanData(null);
   };
 
@@ -56,6 +63,7 @@ const Index = () => {
         <RefinerView 
           userPrompt={userPrompt} 
           refineResult={refineResult}
+          sessionToken={sessionToken}
           onHome={handleHome}
           onGeneratePlan={handleGeneratePlan}
         />
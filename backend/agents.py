@@ -2,16 +2,53 @@
 LangGraph Agents for Eureka
 """
 
-from typing import TypedDict, Annotated, List
-from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_groq import ChatGroq
-from pydantic import BaseModel, SecretStr, Field
+from typing import TYPE_CHECKING, TypedDict, Annotated, List, Optional
+import asyncio
+import contextlib
+import json
+import operator
 import os
+import queue
+import threading
+import time
+from pydantic import ValidationError
 
-import tracing
+import clients
+import metrics
+import profiling
+import prompts
+import router
+import tokens
+from cache import cache_key, get_cache
+from models import (
+    FastPlanOutput,
+    MasterPromptOutput,
+    PhaseActivities,
+    RoadmapSkeleton,
+    StrategicRoadmapOutput,
+    StrategicPhase,
+)
+from streaming import completed_items
 
-from models import MasterPromptOutput, StrategicRoadmapOutput, StrategicPhase
+if TYPE_CHECKING:
+    # LangGraph / LangChain take ~400 ms to import; create_agent_workflow() loads them
+    from langchain_core.runnables import RunnableConfig
+
+AGENT_TEMPERATURE = 0.7
+# Changes with either agent's prompt template so cached plans are not reused
+AGENTS_PROMPT_VERSION = f"{prompts.STRATEGIST.version}+{prompts.PLANNER.version}"
+# "full" runs the two-agent graph; "fast" makes one structured call for both;
+# "parallel" expands the roadmap's phases concurrently
+PLAN_MODES = ("full", "fast", "parallel")
+
+# Runs that failed part-way and can be resumed from their checkpoints
+_failed_runs: dict = {}
+_failed_runs_lock = threading.Lock()
+_resumed_runs = 0
+# Per-thread-id [lock, holders and waiters], so two runs never share a
+# checkpoint thread at the same time while runs of other keys never wait
+_run_locks: dict = {}
+_run_locks_lock = threading.Lock()
 
 
 class AgentState(TypedDict):
@@ -25,104 +62,70 @@ class AgentState(TypedDict):
     messages: list
 
 
-def create_strategist_agent(topic: str):
+def create_strategist_agent(model: Optional[str] = None):
     """
     The Strategist Agent - Prompt Engineer and Strategic Planner
-    Returns an LLM with structured output binding
+    Returns an LLM with structured output binding and its prompt template;
+    model defaults to the first in the stage's pool (see router.py)
     """
-    api_key = os.getenv("GROQ_API_KEY", "")
-    llm = ChatGroq(
-        model="meta-llama/llama-4-scout-17b-16e-instruct",
-        temperature=0.7,
-        api_key=SecretStr(api_key) if api_key else None,
+    # Shared, connection-pooled LLM with the structured output binding
+    structured_llm = clients.get_structured_llm(
+        MasterPromptOutput,
+        model=model or router.pool("strategist")[0],
+        temperature=AGENT_TEMPERATURE,
     )
+    return structured_llm, prompts.STRATEGIST
 
-    # Bind structured output to the LLM
-    structured_llm = llm.with_structured_output(MasterPromptOutput)
-
-    system_prompt = f"""You are {topic} Prompt Engineer and Strategic Planner.
-
-Your role is to transform the user's initial idea and specific constraints into a 
-highly structured, actionable prompt for a Planning Agent to execute.
-
-You are an expert in instructional design and prompt engineering. 
-Your specialty lies in decoding vague user intent and translating it 
-into precise logic, parameters, and requirements. You ensure that 
-no constraint is overlooked, creating a foolproof blueprint that 
-allows downstream agents to create a perfect project plan.
-
-Analyze the user's idea and constraints carefully, then create a comprehensive 
-structured master prompt that includes:
-1. Clear objective and goals
-2. Specific constraints and requirements
-3. Success criteria
-4. Key deliverables
-5. Any technical or logistical considerations
-
-Return the response in the exact structured format specified."""
-
-    return structured_llm, system_prompt
 
-
-def create_project_overview_planner_agent(topic: str):
+def create_project_overview_planner_agent(
+    streaming: bool = False, model: Optional[str] = None
+):
     """
     The Project Overview Planner Agent - Strategic Project Architect
-    Returns an LLM with structured output binding
+    Returns an LLM with structured output binding (streaming partial dicts
+    when streaming=True) and its prompt template; model defaults to the
+    first in the stage's pool (see router.py)
     """
-    api_key = os.getenv("GROQ_API_KEY", "")
-    llm = ChatGroq(
-        model="meta-llama/llama-4-scout-17b-16e-instruct",
-        temperature=0.7,
-        api_key=SecretStr(api_key) if api_key else None,
+    # Shared, connection-pooled LLM with the structured output binding
+    get_llm = (
+        clients.get_streaming_structured_llm
+        if streaming
+        else clients.get_structured_llm
     )
+    structured_llm = get_llm(
+        StrategicRoadmapOutput,
+        model=model or router.pool("project_overview_planner")[0],
+        temperature=AGENT_TEMPERATURE,
+    )
+    return structured_llm, prompts.PLANNER
 
-    # Bind structured output to the LLM
-    structured_llm = llm.with_structured_output(StrategicRoadmapOutput)
-
-    system_prompt = f"""You are {topic} Strategic Project Architect.
-
-Your role is to synthesize the Master Prompt into a high-level strategic roadmap 
-consisting of major goals, key phases, and a visionary overview of the plan.
-
-You are a high-level visionary planner who thinks in systems and 
-long-term outcomes. You don't get lost in the weeds; instead, you 
-identify the 'Big Rocks'—the critical pillars that must be established 
-for success. Your plans provide the North Star for the entire team, 
-ensuring everyone understands the 'What' and the 'Why' of the mission.
-
-Based on the master prompt provided, create a structured strategic roadmap that includes:
-1. Problem Statement - The core problem being addressed
-2. Major Goals - 3-5 high-level objectives
-3. Key Phases - Temporal breakdown with specific activities and milestones
-4. North Star Metrics - Key success indicators
-5. Strategic Dependencies and Risks - Critical factors to watch
-
-Return the response in the exact structured format specified."""
-
-    return structured_llm, system_prompt
-
-
-def strategist_node(state: AgentState) -> AgentState:
-    """Node for the Strategist Agent"""
-    topic = state.get("topic", "General")
-    user_idea = state.get("user_idea", "")
-    constraints = state.get("constraints", "No specific constraints provided")
 
-    llm, system_prompt = create_strategist_agent(topic)
+def _invoke(request):
+    llm, messages = request
+    return llm.invoke(messages)
 
-    user_message = f"""User Idea: {user_idea}
 
-Constraints: {constraints}
+async def _ainvoke(request):
+    llm, messages = request
+    return await llm.ainvoke(messages)
 
-Please transform this into a comprehensive structured master prompt for a Planning Agent."""
 
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_message},
-    ]
+def _strategist_request(state: AgentState, model: str):
+    """Build the structured LLM and chat messages for the Strategist"""
+    llm, template = create_strategist_agent(model)
+    # Oversized inputs are trimmed to their token budgets (see tokens.py)
+    messages = template.messages(
+        topic=state.get("topic", "General"),
+        user_idea=tokens.trim_input(state.get("user_idea", ""), "user_idea"),
+        constraints=tokens.trim_input(
+            state.get("constraints", "No specific constraints provided"),
+            "constraints",
+        ),
+    )
+    return llm, messages
 
-    response = llm.invoke(messages)
 
+def _apply_strategist_response(state: AgentState, response) -> AgentState:
     # Response is already structured as MasterPromptOutput
     if isinstance(response, dict):
         master_prompt: MasterPromptOutput = MasterPromptOutput(**response)
@@ -139,31 +142,94 @@ Please transform this into a comprehensive structured master prompt for a Planni
     return state
 
 
-def project_overview_planner_node(state: AgentState) -> AgentState:
-    """Node for the Project Overview Planner Agent"""
-    topic = state.get("topic", "General")
-    master_prompt = state.get("master_prompt", {})
+def _response_dict(response) -> dict:
+    return response if isinstance(response, dict) else response.model_dump()
 
-    llm, system_prompt = create_project_overview_planner_agent(topic)
 
-    # Convert master prompt to string for context
-    master_prompt_text = (
-        master_prompt.model_dump()
-        if isinstance(master_prompt, MasterPromptOutput)
-        else str(master_prompt)
+def _strategist_memo_key(state: AgentState) -> str:
+    """Memoization key over everything the Strategist's output depends on"""
+    return cache_key(
+        "strategist",
+        {
+            "topic": state.get("topic", "General"),
+            "user_idea": state.get("user_idea", ""),
+            "constraints": state.get("constraints", ""),
+        },
+        model=router.pool_key("strategist"),
+        temperature=AGENT_TEMPERATURE,
+        prompt_version=AGENTS_PROMPT_VERSION,
     )
 
-    user_message = f"""Master Prompt: {master_prompt_text}
 
-Please create a high-level strategic roadmap based on this master prompt."""
+def _get_master_prompt(config: Optional["RunnableConfig"]):
+    """Speculative master prompt passed as configurable["master_prompt"]"""
+    return ((config or {}).get("configurable") or {}).get("master_prompt")
 
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_message},
-    ]
 
-    response = llm.invoke(messages)
+def strategist_node(
+    state: AgentState, config: Optional["RunnableConfig"] = None
+) -> AgentState:
+    """Node for the Strategist Agent"""
+    # A master prompt claimed from a speculative run (see speculation.py)
+    draft = _get_master_prompt(config)
+    if draft is not None:
+        return _apply_strategist_response(state, draft)
+
+    def compute():
+        with profiling.span("strategist.llm"):
+            response = router.call(
+                "strategist", lambda model: _invoke(_strategist_request(state, model))
+            )
+        with profiling.span("strategist.model_dump"):
+            return _response_dict(response)
+
+    # Reuse the master prompt when the Strategist's inputs are unchanged
+    response = get_cache("strategist").get_or_compute(
+        _strategist_memo_key(state), compute
+    )
+    with profiling.span("strategist.validate"):
+        return _apply_strategist_response(state, response)
+
+
+async def astrategist_node(
+    state: AgentState, config: Optional["RunnableConfig"] = None
+) -> AgentState:
+    """Async node for the Strategist Agent"""
+    draft = _get_master_prompt(config)
+    if draft is not None:
+        return _apply_strategist_response(state, draft)
+
+    async def compute():
+        with profiling.span("strategist.llm"):
+            response = await router.acall(
+                "strategist", lambda model: _ainvoke(_strategist_request(state, model))
+            )
+        with profiling.span("strategist.model_dump"):
+            return _response_dict(response)
 
+    response = await get_cache("strategist").aget_or_compute(
+        _strategist_memo_key(state), compute
+    )
+    with profiling.span("strategist.validate"):
+        return _apply_strategist_response(state, response)
+
+
+def _planner_request(state: AgentState, model: str, streaming: bool = False):
+    """Build the structured LLM and chat messages for the Project Overview Planner"""
+    master_prompt = state.get("master_prompt", {})
+    llm, template = create_project_overview_planner_agent(streaming, model)
+
+    # Compact "key: value" text instead of a dict repr full of quotes/braces
+    if isinstance(master_prompt, MasterPromptOutput):
+        master_prompt = master_prompt.model_dump()
+    messages = template.messages(
+        topic=state.get("topic", "General"),
+        master_prompt=tokens.compact(master_prompt),
+    )
+    return llm, messages
+
+
+def _apply_planner_response(state: AgentState, response) -> AgentState:
     # Response is already structured as StrategicRoadmapOutput
     if isinstance(response, dict):
         strategic_roadmap: StrategicRoadmapOutput = StrategicRoadmapOutput(**response)
@@ -180,43 +246,463 @@ Please create a high-level strategic roadmap based on this master prompt."""
     return state
 
 
+def _emit_phases(phases: list, emitted: int, on_phase) -> int:
+    """
+    Report phases[emitted:] to on_phase(index, phase) and return how many
+    phases have been reported so far
+    """
+    for index in range(emitted, len(phases)):
+        try:
+            phase = StrategicPhase(**phases[index])
+        except ValidationError:
+            # Reported once the full roadmap validates
+            return index
+        on_phase(index, phase.model_dump())
+    return len(phases)
+
+
+def _finish_streamed_roadmap(partial: dict, emitted: int, on_phase):
+    strategic_roadmap = StrategicRoadmapOutput(**(partial or {}))
+    _emit_phases(strategic_roadmap.model_dump()["key_phases"], emitted, on_phase)
+    return strategic_roadmap
+
+
+def _get_on_phase(config: Optional["RunnableConfig"]):
+    """Phase callback passed as configurable["on_phase"] by stream_agents()"""
+    return ((config or {}).get("configurable") or {}).get("on_phase")
+
+
+def _planner_memo_key(state: AgentState) -> str:
+    """
+    Memoization key over everything the Planner's output depends on; the
+    user's idea and constraints only reach it through the master prompt
+    """
+    master_prompt = state.get("master_prompt", {})
+    if isinstance(master_prompt, MasterPromptOutput):
+        master_prompt = master_prompt.model_dump()
+    return cache_key(
+        "project_overview_planner",
+        {
+            "topic": state.get("topic", "General"),
+            "master_prompt": json.dumps(master_prompt, sort_keys=True),
+        },
+        model=router.pool_key("project_overview_planner"),
+        temperature=AGENT_TEMPERATURE,
+        prompt_version=AGENTS_PROMPT_VERSION,
+    )
+
+
+def project_overview_planner_node(
+    state: AgentState, config: "RunnableConfig" = None
+) -> AgentState:
+    """Node for the Project Overview Planner Agent"""
+    on_phase = _get_on_phase(config)
+    memo = get_cache("project_overview_planner")
+    key = _planner_memo_key(state)
+
+    if on_phase is None:
+
+        def compute():
+            with profiling.span("project_overview_planner.llm"):
+                response = router.call(
+                    "project_overview_planner",
+                    lambda model: _invoke(_planner_request(state, model)),
+                )
+            with profiling.span("project_overview_planner.model_dump"):
+                return _response_dict(response)
+
+        # Reuse the roadmap when the master prompt is unchanged
+        response = memo.get_or_compute(key, compute)
+
+    elif (response := memo.get(key)) is not None:
+        _emit_phases(response["key_phases"], 0, on_phase)
+
+    else:
+        # Report each phase as soon as the model moves on to the next one
+        def stream(model):
+            llm, messages = _planner_request(state, model, streaming=True)
+            return llm.stream(messages)
+
+        partial, emitted = None, 0
+        with profiling.span("project_overview_planner.llm"):
+            for partial in router.call_stream("project_overview_planner", stream):
+                _check_cancelled(config)
+                emitted = _emit_phases(
+                    completed_items(partial, "key_phases"), emitted, on_phase
+                )
+        response = _finish_streamed_roadmap(partial, emitted, on_phase).model_dump()
+        memo.set(key, response)
+
+    with profiling.span("project_overview_planner.validate"):
+        return _apply_planner_response(state, response)
+
+
+async def aproject_overview_planner_node(
+    state: AgentState, config: "RunnableConfig" = None
+) -> AgentState:
+    """Async node for the Project Overview Planner Agent"""
+    on_phase = _get_on_phase(config)
+    memo = get_cache("project_overview_planner")
+    key = _planner_memo_key(state)
+
+    if on_phase is None:
+
+        async def compute():
+            with profiling.span("project_overview_planner.llm"):
+                response = await router.acall(
+                    "project_overview_planner",
+                    lambda model: _ainvoke(_planner_request(state, model)),
+                )
+            with profiling.span("project_overview_planner.model_dump"):
+                return _response_dict(response)
+
+        response = await memo.aget_or_compute(key, compute)
+
+    elif (response := memo.get(key)) is not None:
+        _emit_phases(response["key_phases"], 0, on_phase)
+
+    else:
+
+        def astream(model):
+            llm, messages = _planner_request(state, model, streaming=True)
+            return llm.astream(messages)
+
+        partial, emitted = None, 0
+        with profiling.span("project_overview_planner.llm"):
+            async for partial in router.acall_stream(
+                "project_overview_planner", astream
+            ):
+                _check_cancelled(config)
+                emitted = _emit_phases(
+                    completed_items(partial, "key_phases"), emitted, on_phase
+                )
+        response = _finish_streamed_roadmap(partial, emitted, on_phase).model_dump()
+        memo.set(key, response)
+
+    with profiling.span("project_overview_planner.validate"):
+        return _apply_planner_response(state, response)
+
+
+def _timed_node(name: str, func, afunc):
+    """RunnableLambda of a node's sync and async functions, timed per node"""
+    from langchain_core.runnables import RunnableLambda
+
+    return RunnableLambda(
+        metrics.timed_node(name, func), afunc=metrics.timed_node(name, afunc)
+    )
+
+
 def create_agent_workflow():
     """
     Create a LangGraph workflow with the two agents
     """
+    from langgraph.graph import END, StateGraph
+
     # Initialize the workflow
     workflow = StateGraph(AgentState)
 
-    # Add nodes
-    workflow.add_node("strategist", strategist_node)
-    workflow.add_node("project_overview_planner", project_overview_planner_node)
+    # Add nodes (sync for invoke(), async for ainvoke())
+    workflow.add_node(
+        "strategist", _timed_node("strategist", strategist_node, astrategist_node)
+    )
+    workflow.add_node(
+        "project_overview_planner",
+        _timed_node(
+            "project_overview_planner",
+            project_overview_planner_node,
+            aproject_overview_planner_node,
+        ),
+    )
 
     # Define edges
     workflow.set_entry_point("strategist")
     workflow.add_edge("strategist", "project_overview_planner")
     workflow.add_edge("project_overview_planner", END)
 
-    # Compile the graph
-    app = workflow.compile()
+    # Compile the graph; checkpoints let a failed run resume from the last
+    # completed node instead of starting over
+    app = workflow.compile(checkpointer=get_checkpointer())
 
     return app
 
 
-def run_agents(topic: str, user_idea: str, constraints: str = "") -> dict:
+# Parallel planning mode: the Planner is split into a skeleton call that
+# fixes the phase names and durations, one concurrent call per phase for its
+# activities (a LangGraph Send fan-out), and a reducer assembling the roadmap.
+# Output latency then grows with the longest phase instead of the sum.
+
+
+class ParallelAgentState(AgentState):
+    """AgentState plus the skeleton and the fanned-out phase results"""
+
+    skeleton: dict
+    # (index, activities) pairs appended by the concurrent phase expanders
+    phase_activities: Annotated[list, operator.add]
+
+
+def _master_prompt_text(state) -> str:
+    master_prompt = state.get("master_prompt", {})
+    if isinstance(master_prompt, MasterPromptOutput):
+        master_prompt = master_prompt.model_dump()
+    return tokens.compact(master_prompt)
+
+
+def _skeleton_request(state: ParallelAgentState, model: str):
+    """Build the structured LLM and chat messages for the roadmap skeleton"""
+    llm = clients.get_structured_llm(
+        RoadmapSkeleton, model=model, temperature=AGENT_TEMPERATURE
+    )
+    messages = prompts.ROADMAP_SKELETON.messages(
+        topic=state.get("topic", "General"),
+        master_prompt=_master_prompt_text(state),
+    )
+    return llm, messages
+
+
+def roadmap_skeleton_node(state: ParallelAgentState) -> dict:
+    """Node deciding the roadmap's phases (names and durations only)"""
+    response = router.call(
+        "roadmap_skeleton", lambda model: _invoke(_skeleton_request(state, model))
+    )
+    return {"skeleton": _response_dict(response)}
+
+
+async def aroadmap_skeleton_node(state: ParallelAgentState) -> dict:
+    """Async node deciding the roadmap's phases"""
+    response = await router.acall(
+        "roadmap_skeleton", lambda model: _ainvoke(_skeleton_request(state, model))
+    )
+    return {"skeleton": _response_dict(response)}
+
+
+def _fan_out_phases(state: ParallelAgentState):
+    """One Send per skeleton phase, each expanded by its own phase_expander"""
+    from langgraph.types import Send
+
+    skeleton = state["skeleton"]
+    if not skeleton["key_phases"]:
+        # An empty Send list would end the run before the roadmap is built
+        return "assemble_roadmap"
+    return [
+        Send(
+            "phase_expander",
+            {
+                "topic": state.get("topic", "General"),
+                "master_prompt": state.get("master_prompt", {}),
+                "skeleton": skeleton,
+                "index": index,
+            },
+        )
+        for index in range(len(skeleton["key_phases"]))
+    ]
+
+
+def _phase_request(task: dict, model: str):
+    """Build the structured LLM and chat messages for one phase's activities"""
+    llm = clients.get_structured_llm(
+        PhaseActivities, model=model, temperature=AGENT_TEMPERATURE
+    )
+    skeleton = task["skeleton"]
+    phase = skeleton["key_phases"][task["index"]]
+    messages = prompts.PHASE_ACTIVITIES.messages(
+        topic=task["topic"],
+        master_prompt=_master_prompt_text(task),
+        # Identical for every phase of a plan, so it stays in the cached prefix
+        roadmap=tokens.compact(skeleton),
+        number=task["index"] + 1,
+        name=phase["name"],
+        duration=phase["duration"],
+    )
+    return llm, messages
+
+
+def phase_expander_node(task: dict) -> dict:
+    """Node listing one phase's activities"""
+    response = router.call(
+        "phase_expander", lambda model: _invoke(_phase_request(task, model))
+    )
+    activities = _response_dict(response)["activities"]
+    return {"phase_activities": [(task["index"], activities)]}
+
+
+async def aphase_expander_node(task: dict) -> dict:
+    """Async node listing one phase's activities"""
+    response = await router.acall(
+        "phase_expander", lambda model: _ainvoke(_phase_request(task, model))
+    )
+    activities = _response_dict(response)["activities"]
+    return {"phase_activities": [(task["index"], activities)]}
+
+
+def assemble_roadmap_node(state: ParallelAgentState) -> dict:
+    """Reducer: the skeleton plus every phase's activities, in phase order"""
+    skeleton = dict(state["skeleton"])
+    activities = dict(state.get("phase_activities", []))
+    skeleton["key_phases"] = [
+        {**phase, "activities": activities.get(index, [])}
+        for index, phase in enumerate(skeleton["key_phases"])
+    ]
+    roadmap = StrategicRoadmapOutput(**skeleton)
+    return {
+        "strategic_roadmap": roadmap,
+        "messages": state.get("messages", [])
+        + [{"agent": "project_overview_planner", "content": roadmap.model_dump()}],
+    }
+
+
+def create_parallel_agent_workflow():
     """
-    Run the agent workflow
+    Create the parallel LangGraph workflow: Strategist, roadmap skeleton,
+    concurrent phase expanders, then the assembling reducer
+    """
+    from langgraph.graph import END, StateGraph
 
-    Args:
-        topic: The topic/domain for the project
-        user_idea: The user's initial idea
-        constraints: Any specific constraints or requirements
+    workflow = StateGraph(ParallelAgentState)
+    workflow.add_node(
+        "strategist", _timed_node("strategist", strategist_node, astrategist_node)
+    )
+    workflow.add_node(
+        "roadmap_skeleton",
+        _timed_node("roadmap_skeleton", roadmap_skeleton_node, aroadmap_skeleton_node),
+    )
+    workflow.add_node(
+        "phase_expander",
+        _timed_node("phase_expander", phase_expander_node, aphase_expander_node),
+    )
+    workflow.add_node(
+        "assemble_roadmap",
+        metrics.timed_node("assemble_roadmap", assemble_roadmap_node),
+    )
 
-    Returns:
-        dict: Contains master_prompt, strategic_roadmap (both as dicts), and messages
+    workflow.set_entry_point("strategist")
+    workflow.add_edge("strategist", "roadmap_skeleton")
+    workflow.add_conditional_edges(
+        "roadmap_skeleton", _fan_out_phases, ["phase_expander", "assemble_roadmap"]
+    )
+    workflow.add_edge("phase_expander", "assemble_roadmap")
+    workflow.add_edge("assemble_roadmap", END)
+
+    return workflow.compile(checkpointer=get_checkpointer())
+
+
+def get_checkpointer():
+    """Process-wide in-memory LangGraph checkpointer"""
+    from langgraph.checkpoint.memory import MemorySaver
+
+    return clients.get_or_create("checkpointer", "default", MemorySaver)
+
+
+def _run_config(thread_id: str, **configurable) -> dict:
+    return {"configurable": {"thread_id": thread_id, **configurable}}
+
+
+def _track_failed_run(thread_id: str):
+    """
+    Keep a failed run's checkpoints for EUREKA_CHECKPOINT_TTL seconds so a
+    retry with the same inputs can resume it, then drop them
+    """
+    now = time.time()
+    ttl = float(os.getenv("EUREKA_CHECKPOINT_TTL", "3600"))
+    with _failed_runs_lock:
+        _failed_runs[thread_id] = now
+        expired = [t for t, failed_at in _failed_runs.items() if failed_at + ttl < now]
+        for expired_thread_id in expired:
+            del _failed_runs[expired_thread_id]
+    for expired_thread_id in expired:
+        get_checkpointer().delete_thread(expired_thread_id)
+
+
+def _finish_run(thread_id: str):
+    """Drop a completed run's checkpoints"""
+    with _failed_runs_lock:
+        _failed_runs.pop(thread_id, None)
+    get_checkpointer().delete_thread(thread_id)
+
+
+@contextlib.contextmanager
+def _run_locks_entry(thread_id: str):
+    """The lock of thread_id, created on first use and dropped after last"""
+    with _run_locks_lock:
+        entry = _run_locks.setdefault(thread_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        yield entry[0]
+    finally:
+        with _run_locks_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _run_locks[thread_id]
+
+
+@contextlib.contextmanager
+def _run_lock(thread_id: str):
+    """Hold thread_id's run lock"""
+    with _run_locks_entry(thread_id) as lock, lock:
+        yield
+
+
+@contextlib.asynccontextmanager
+async def _arun_lock(thread_id: str):
+    """
+    Async variant of _run_lock(): the same lock, as sync runs (streams,
+    jobs) share the process with async ones, polled so the event loop
+    never blocks on it
     """
-    app = create_agent_workflow()
+    with _run_locks_entry(thread_id) as lock:
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(0.01)
+        try:
+            yield
+        finally:
+            lock.release()
 
-    initial_state: AgentState = {
+
+def checkpoint_stats() -> dict:
+    with _failed_runs_lock:
+        return {"resumable_runs": len(_failed_runs), "resumed_runs": _resumed_runs}
+
+
+def _resume_or_start(snapshot, initial_state: AgentState):
+    """
+    None (resume) when an earlier run with the same thread id stopped
+    part-way, otherwise the initial state for a fresh run
+    """
+    global _resumed_runs
+    if snapshot.next:
+        with _failed_runs_lock:
+            _resumed_runs += 1
+        return None
+    return initial_state
+
+
+def get_agent_workflow(mode: str = "full"):
+    """
+    Return the process-wide compiled workflow for a graph mode ("full" or
+    "parallel"), compiling it on first use
+    """
+    if mode == "parallel":
+        return clients.get_or_create(
+            "workflow", "parallel", create_parallel_agent_workflow
+        )
+    return clients.get_or_create("workflow", "default", create_agent_workflow)
+
+
+def prewarm():
+    """
+    Build the shared LLM bindings and compile the workflow ahead of traffic
+    """
+    for model in router.pool("strategist"):
+        create_strategist_agent(model)
+    for model in router.pool("project_overview_planner"):
+        create_project_overview_planner_agent(model=model)
+    for model in router.pool("fast_planner"):
+        _fast_request("General", "", "", model)
+    get_agent_workflow()
+    get_agent_workflow("parallel")
+
+
+def _initial_state(topic: str, user_idea: str, constraints: str) -> AgentState:
+    return {
         "topic": topic,
         "user_idea": user_idea,
         "constraints": constraints,
@@ -239,8 +725,8 @@ def run_agents(topic: str, user_idea: str, constraints: str = "") -> dict:
         "messages": [],
     }
 
-    result = app.invoke(initial_state)
 
+def _to_result(result: AgentState) -> dict:
     return {
         "master_prompt": (
             result["master_prompt"].model_dump()
@@ -254,3 +740,336 @@ def run_agents(topic: str, user_idea: str, constraints: str = "") -> dict:
         ),
         "messages": result["messages"],
     }
+
+
+def plan_cache_key(
+    topic: str,
+    user_idea: str,
+    constraints: str = "",
+    mode: str = "full",
+    speculative: bool = False,
+) -> str:
+    # The stages' model pool is part of every key: plans from other models
+    # are not interchangeable. Full-mode keys therefore match the ones from
+    # before model routing only while the pool is clients.DEFAULT_MODEL (the
+    # model that used to be hardcoded); setting GROQ_MODEL or EUREKA_MODELS*
+    # starts new keys
+    stages = {
+        "fast": ("fast_planner",),
+        "parallel": ("strategist", "roadmap_skeleton", "phase_expander"),
+    }.get(mode, ("strategist", "project_overview_planner"))
+    namespace, prompt_version = {
+        "fast": ("plan_fast", prompts.FAST_PLAN.version),
+        "parallel": (
+            "plan_parallel",
+            f"{AGENTS_PROMPT_VERSION}+{prompts.ROADMAP_SKELETON.version}"
+            f"+{prompts.PHASE_ACTIVITIES.version}",
+        ),
+    }.get(mode, ("plan", AGENTS_PROMPT_VERSION))
+    if speculative:
+        # Built on a Strategist draft of the topic alone: never served in
+        # place of (or resumed as) a real run for the same inputs
+        namespace += "_speculative"
+    return cache_key(
+        namespace,
+        {"topic": topic, "user_idea": user_idea, "constraints": constraints},
+        # One entry per distinct pool, so a single shared pool keys as before
+        model="+".join(dict.fromkeys(router.pool_key(stage) for stage in stages)),
+        temperature=AGENT_TEMPERATURE,
+        prompt_version=prompt_version,
+    )
+
+
+def _fast_request(topic: str, user_idea: str, constraints: str, model: str):
+    """Build the structured LLM and chat messages for the fast planning mode"""
+    llm = clients.get_structured_llm(
+        FastPlanOutput,
+        model=model,
+        temperature=AGENT_TEMPERATURE,
+    )
+    messages = prompts.FAST_PLAN.messages(
+        topic=topic,
+        user_idea=tokens.trim_input(user_idea, "user_idea"),
+        constraints=tokens.trim_input(
+            constraints or "No specific constraints provided", "constraints"
+        ),
+    )
+    return llm, messages
+
+
+def _fast_result(response) -> dict:
+    plan = _response_dict(response)
+    return {
+        "master_prompt": plan["master_prompt"],
+        "strategic_roadmap": plan["strategic_roadmap"],
+        "messages": [{"agent": "fast_planner", "content": plan}],
+    }
+
+
+def _run_fast(topic: str, user_idea: str, constraints: str) -> dict:
+    return _fast_result(
+        router.call(
+            "fast_planner",
+            lambda model: _invoke(_fast_request(topic, user_idea, constraints, model)),
+        )
+    )
+
+
+async def _arun_fast(topic: str, user_idea: str, constraints: str) -> dict:
+    return _fast_result(
+        await router.acall(
+            "fast_planner",
+            lambda model: _ainvoke(_fast_request(topic, user_idea, constraints, model)),
+        )
+    )
+
+
+def run_agents(
+    topic: str,
+    user_idea: str,
+    constraints: str = "",
+    mode: str = "full",
+    master_prompt: Optional[dict] = None,
+) -> dict:
+    """
+    Run the agent workflow
+
+    Args:
+        topic: The topic/domain for the project
+        user_idea: The user's initial idea
+        constraints: Any specific constraints or requirements
+        mode: "full" for the Strategist -> Planner graph, "fast" for a
+            single structured call producing both outputs, "parallel" for
+            the graph with the roadmap's phases expanded concurrently
+        master_prompt: A master prompt claimed from a speculative Strategist
+            run; the graph uses it instead of calling the Strategist
+
+    Returns:
+        dict: Contains master_prompt, strategic_roadmap (both as dicts), and messages
+    """
+
+    key = plan_cache_key(
+        topic, user_idea, constraints, mode, speculative=master_prompt is not None
+    )
+    if mode == "fast":
+        return get_cache("plan").get_or_compute(
+            key, lambda: _run_fast(topic, user_idea, constraints)
+        )
+
+    def compute():
+        app = get_agent_workflow(mode)
+        config = _run_config(key, master_prompt=master_prompt)
+        with _run_lock(key):
+            state = _resume_or_start(
+                app.get_state(config), _initial_state(topic, user_idea, constraints)
+            )
+            try:
+                with profiling.span("run_agents.graph"):
+                    result = app.invoke(state, config)
+            except Exception:
+                _track_failed_run(key)
+                raise
+            _finish_run(key)
+        with profiling.span("run_agents.to_result"):
+            return _to_result(result)
+
+    return get_cache("plan").get_or_compute(key, compute)
+
+
+async def arun_agents(
+    topic: str,
+    user_idea: str,
+    constraints: str = "",
+    mode: str = "full",
+    master_prompt: Optional[dict] = None,
+) -> dict:
+    """
+    Async variant of run_agents() for the ASGI serving path
+    """
+
+    key = plan_cache_key(
+        topic, user_idea, constraints, mode, speculative=master_prompt is not None
+    )
+    if mode == "fast":
+        return await get_cache("plan").aget_or_compute(
+            key, lambda: _arun_fast(topic, user_idea, constraints)
+        )
+
+    async def compute():
+        app = get_agent_workflow(mode)
+        config = _run_config(key, master_prompt=master_prompt)
+        async with _arun_lock(key):
+            state = _resume_or_start(
+                await app.aget_state(config),
+                _initial_state(topic, user_idea, constraints),
+            )
+            try:
+                with profiling.span("run_agents.graph"):
+                    result = await app.ainvoke(state, config)
+            except Exception:
+                _track_failed_run(key)
+                raise
+            _finish_run(key)
+        with profiling.span("run_agents.to_result"):
+            return _to_result(result)
+
+    return await get_cache("plan").aget_or_compute(key, compute)
+
+
+class RunCancelled(Exception):
+    """Raised inside a run whose cancel_event was set"""
+
+
+def _check_cancelled(config: Optional["RunnableConfig"]):
+    cancel_event = ((config or {}).get("configurable") or {}).get("cancel_event")
+    if cancel_event is not None and cancel_event.is_set():
+        raise RunCancelled("Run cancelled")
+
+
+def run_agents_events(
+    topic: str,
+    user_idea: str,
+    constraints: str = "",
+    on_event=None,
+    cancel_event: Optional[threading.Event] = None,
+) -> dict:
+    """
+    Run (or resume) the agent workflow in the calling thread, reporting the
+    stream_agents() events to on_event(event, data) as they happen.
+
+    Setting cancel_event stops the run between nodes and between streamed
+    roadmap chunks by raising RunCancelled.
+
+    Returns:
+        dict: same payload as run_agents()
+    """
+    on_event = on_event or (lambda event, data: None)
+    key = plan_cache_key(topic, user_idea, constraints)
+    response_cache = get_cache("plan")
+
+    cached = response_cache.get(key)
+    if cached is not None:
+        on_event("master_prompt", cached["master_prompt"])
+        for index, phase in enumerate(cached["strategic_roadmap"]["key_phases"]):
+            on_event("phase", {"index": index, "phase": phase})
+        on_event("strategic_roadmap", cached["strategic_roadmap"])
+        on_event("done", cached)
+        return cached
+
+    def on_phase(index: int, phase: dict):
+        on_event("phase", {"index": index, "phase": phase})
+
+    with _run_lock(key):
+        app = get_agent_workflow()
+        config = _run_config(key, on_phase=on_phase, cancel_event=cancel_event)
+        snapshot = app.get_state(config)
+        state = _resume_or_start(
+            snapshot, _initial_state(topic, user_idea, constraints)
+        )
+        if state is None and "strategist" not in snapshot.next:
+            # Resuming after the Strategist: its output is in the checkpoint
+            on_event("master_prompt", _to_result(snapshot.values)["master_prompt"])
+
+        final_state = None
+        try:
+            for update in app.stream(state, config, stream_mode="updates"):
+                for node, final_state in update.items():
+                    result = _to_result(final_state)
+                    if node == "strategist":
+                        on_event("master_prompt", result["master_prompt"])
+                    elif node == "project_overview_planner":
+                        on_event("strategic_roadmap", result["strategic_roadmap"])
+                _check_cancelled(config)
+        except Exception:
+            _track_failed_run(key)
+            raise
+        _finish_run(key)
+
+    result = _to_result(final_state)
+    response_cache.set(key, result)
+    on_event("done", result)
+    return result
+
+
+def speculative_master_prompt(
+    topic: str, cancel_event: Optional[threading.Event] = None
+) -> dict:
+    """
+    Strategist output for the topic alone (no idea or constraints yet),
+    computed by speculation.py while the user answers the refinement questions.
+
+    Setting cancel_event skips the LLM call when it has not started yet, and
+    discards its output (raising RunCancelled) when it has.
+    """
+    config = {"configurable": {"cancel_event": cancel_event}}
+    _check_cancelled(config)
+    state = strategist_node(_initial_state(topic, topic, ""))
+    _check_cancelled(config)
+    return _response_dict(state["master_prompt"])
+
+
+def get_plan_jobs():
+    """Process-wide job manager for background planning runs"""
+    from jobs import create_job_manager
+
+    return clients.get_or_create("job_manager", "plan", create_job_manager)
+
+
+def plan_job(job, topic: str, user_idea: str, constraints: str = "") -> dict:
+    """JobManager target: run the workflow, tracking progress on job.progress"""
+
+    def on_event(event: str, data):
+        if event == "master_prompt":
+            job.update_progress(stage="project_overview_planner")
+        elif event == "phase":
+            job.update_progress(phases=data["index"] + 1)
+
+    job.update_progress(stage="strategist")
+    return run_agents_events(
+        topic,
+        user_idea,
+        constraints,
+        on_event=on_event,
+        cancel_event=job.cancel_event,
+    )
+
+
+def stream_agents(topic: str, user_idea: str, constraints: str = ""):
+    """
+    Run the agent workflow and yield (event, data) pairs as it progresses:
+
+        ("master_prompt", {...})                as soon as the Strategist finishes
+        ("phase", {"index": i, "phase": {...}}) per roadmap phase, while the
+                                                Project Overview Planner generates
+        ("strategic_roadmap", {...})            once the roadmap validates
+        ("done", {...})                         same payload as run_agents()
+        ("error", {"error": "..."})             if the run fails
+
+    Closing the generator early (the client disconnected) cancels the run at
+    its next checkpoint, as for cancelled planning jobs.
+    """
+    events: queue.Queue = queue.Queue()
+    finished = object()
+    cancel_event = threading.Event()
+
+    def worker():
+        try:
+            run_agents_events(
+                topic,
+                user_idea,
+                constraints,
+                on_event=lambda event, data: events.put((event, data)),
+                cancel_event=cancel_event,
+            )
+        except Exception as e:
+            events.put(("error", {"error": str(e)}))
+        finally:
+            events.put(finished)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+    try:
+        while (item := events.get()) is not finished:
+            yield item
+    finally:
+        cancel_event.set()
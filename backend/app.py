@@ -3,18 +3,42 @@ Flask API for Eureka
 """
 
 from datetime import datetime
+import math
 import os
+import time
 
-import tracing
-
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 from dotenv import load_dotenv
-from groq import Groq
-import instructor
 
-from models import RefinementResult
-from agents import run_agents
+import cache
+import cassette
+import clients
+import compact
+import metrics
+import profiling
+import repair
+import resilience
+import router
+import speculation
+import store
+import tokens
+import tracing
+from batch import batch_concurrency, get_rate_limiter, refine_batch, validate_topics
+from refinement import refine_cache_key, refine_topic, stream_refine_topic
+from resilience import LLMUnavailableError
+from agents import (
+    PLAN_MODES,
+    checkpoint_stats,
+    get_plan_jobs,
+    plan_cache_key,
+    plan_job,
+    run_agents,
+    stream_agents,
+    prewarm as prewarm_agents,
+)
+from jobs import QueueFullError
+from streaming import SSE_HEADERS, ndjson_line, sse_event
 
 # Load environment variables from .env if present
 load_dotenv()
@@ -23,12 +47,146 @@ app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
 
+@app.before_request
+def _start_usage():
+    g.llm_usage = resilience.start_usage()
+
+
+@app.before_request
+def _start_metrics():
+    g.metrics_route = request.url_rule.rule if request.url_rule else "unmatched"
+    g.metrics_started = time.perf_counter()
+    metrics.request_started(g.metrics_route)
+
+
+@app.before_request
+def _start_profile():
+    """Profile the request when asked to (see profiling.py)"""
+    if profiling.requested(request.headers.get(profiling.PROFILE_HEADER)):
+        g.profile = profiling.start(f"{request.method} {request.path}")
+
+
+@app.after_request
+def _profile_headers(response):
+    profile = g.get("profile")
+    if profile is not None:
+        response.headers["X-Profile-File"] = profile.filename
+        response.headers["Server-Timing"] = profiling.server_timing(profile)
+        # Streamed bodies are still being generated at this point
+        response.call_on_close(profile.stop)
+    return response
+
+
+@app.after_request
+def _usage_header(response):
+    """Report the request's LLM tokens per stage (non-streamed responses)"""
+    usage = g.get("llm_usage")
+    if usage:
+        response.headers["X-LLM-Usage"] = resilience.usage_header(usage)
+    return response
+
+
+@app.after_request
+def _observe_request(response):
+    """Record the request's latency once the (possibly streamed) body is sent"""
+    route, started = g.get("metrics_route"), g.get("metrics_started")
+    if route is None:
+        return response
+    method, status = request.method, response.status_code
+
+    def finished():
+        metrics.observe_request(route, method, status, time.perf_counter() - started)
+        metrics.request_finished(route)
+
+    response.call_on_close(finished)
+    return response
+
+
+@app.teardown_request
+def _count_unhandled_error(error):
+    if error is not None:
+        metrics.count_error("request", error)
+
+
+@app.teardown_request
+def _detach_profile(error):
+    profile = g.get("profile")
+    if profile is not None:
+        profiling.detach(profile)
+
+
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint"""
     return jsonify({"status": "healthy", "message": "Eureka API is running"}), 200
 
 
+def _all_cache_stats() -> dict:
+    import semantic_cache
+
+    stats = cache.all_stats()
+    if semantic_cache.enabled():
+        stats["semantic"] = semantic_cache.all_stats()
+    return stats
+
+
+@app.route("/api/stats", methods=["GET"])
+def stats():
+    """Process-level serving statistics"""
+    return (
+        jsonify(
+            {
+                "success": True,
+                "clients": clients.stats(),
+                "caches": _all_cache_stats(),
+                "checkpoints": checkpoint_stats(),
+                "jobs": get_plan_jobs().stats(),
+                "batch_rate_limit": get_rate_limiter().stats(),
+                "llm": resilience.stats(),
+                "routing": router.stats(),
+                "tokens": tokens.stats(),
+                "repairs": repair.stats(),
+                "speculation": speculation.stats(),
+                "cassette": cassette.stats(),
+                "tracing": tracing.stats(),
+                "profiling": profiling.stats(),
+                "store": store.stats(),
+            }
+        ),
+        200,
+    )
+
+
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    """Hit/miss statistics for the response caches"""
+    return jsonify({"success": True, "caches": _all_cache_stats()}), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus metrics of every worker process (see metrics.py)"""
+    if not metrics.enabled():
+        return jsonify({"success": False, "error": "Metrics are disabled"}), 404
+    body, content_type = metrics.exposition()
+    return Response(body, content_type=content_type)
+
+
+def _unavailable_response(e: LLMUnavailableError):
+    """429/503 for an LLM call that kept failing until its deadline"""
+    metrics.count_error("request", e)
+    response = jsonify({"success": False, "error": str(e)})
+    if e.retry_after:
+        response.headers["Retry-After"] = str(math.ceil(e.retry_after))
+    return response, e.status_code
+
+
+def _error_response(e: Exception):
+    """500 for an unexpected error in a route, counted by exception type"""
+    metrics.count_error("request", e)
+    return jsonify({"success": False, "error": str(e)}), 500
+
+
 @app.route("/api/refine", methods=["POST"])
 def refine():
     """
@@ -54,6 +212,9 @@ def refine():
                 ...
             ]
         },
+        "session_token": "string - Pass to /api/agents/plan to reuse the
+                          speculative Strategist run (EUREKA_SPECULATE=1 only)",
+        "refinement_id": int - The stored result, see /api/refinements/<id>,
         "error": "string - Error message if failed"
     }
     """
@@ -73,68 +234,141 @@ def refine():
                 400,
             )
 
-        # Initialize Groq client with Instructor
-        groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        client = instructor.from_groq(groq_client)
+        # Call Groq with Instructor for structured output
+        refined_result = refine_topic(topic)
+
+        response = {"success": True, "result": refined_result, "topic": topic}
+        # Draft the master prompt while the user answers the questions
+        session_token = speculation.start(topic)
+        if session_token:
+            response["session_token"] = session_token
+        refinement_id = store.save(
+            "refine", refine_cache_key(topic), topic, refined_result
+        )
+        if refinement_id is not None:
+            response["refinement_id"] = refinement_id
+        with profiling.span("refine.jsonify"):
+            return jsonify(response), 200
+
+    except LLMUnavailableError as e:
+        return _unavailable_response(e)
+
+    except Exception as e:
+        return _error_response(e)
+
+
+@app.route("/api/refine/stream", methods=["POST"])
+def stream_refine():
+    """
+    Streaming variant of /api/refine using Server-Sent Events.
+
+    Takes the same JSON payload and emits:
+        event: category  - {"index", "category"} as soon as each Category and
+                           its CriticalQuestions validate
+        event: done      - {"result", "topic"}, the same payload as /api/refine
+        event: error     - {"error": "..."} if generation fails
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({"success": False, "error": "No JSON data provided"}), 400
+
+        topic = data.get("topic")
+
+        if not topic:
+            return (
+                jsonify({"success": False, "error": "Missing required field: topic"}),
+                400,
+            )
+
+        def generate():
+            for event, payload in stream_refine_topic(topic):
+                yield sse_event(event, payload)
+
+        return Response(generate(), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+    except Exception as e:
+        return _error_response(e)
 
-        # Prompt aligned to Pydantic models in models.RefinementResult/Category/CriticalQuestion
-        prompt = f"""
-        You are a Technical Systems Consultant and VC Strategist with expertise in failure analysis and pre-mortems.
 
-Your task is to analyze this idea and generate exactly 3 categories of critical questions:
-"{topic}"
+@app.route("/api/refine/batch", methods=["POST"])
+def refine_batch_topics():
+    """
+    Refine many topics concurrently, streaming results as NDJSON.
+
+    Expected JSON payload:
+    {
+        "topics": ["string", ...],
+        "concurrency": int - optional, capped at EUREKA_BATCH_CONCURRENCY
+    }
 
-Generate EXACTLY 3 CATEGORIES. For each category:
-1. Provide a concise category name (3-5 words)
-2. List 2-3 critical questions for that category
-3. Each question should be under 200 characters
-4. Questions should probe deeply into technical feasibility, scaling challenges, logistical issues, and edge cases
+    Emits one JSON object per line in completion order:
+        {"index", "topic", "success": true, "result", "elapsed_seconds"}
+        {"index", "topic", "success": false, "error", "elapsed_seconds"}
+    and a final {"done": true, "total", "succeeded", "failed", "elapsed_seconds"}
+    """
+    try:
+        data = request.get_json()
 
-Focus on:
-- Technical "how" - architecture, dependencies, technology choices
-- Logistical "why" - supply chain, operational challenges, resource constraints
-- Scalability - what breaks when growing from 1 to 1,000 users
-- Edge cases - user behavior exceptions, failure modes, hidden bottlenecks
+        if not data:
+            return jsonify({"success": False, "error": "No JSON data provided"}), 400
 
-Example format (for reference, not the actual output):
-Category 1: "Technical Architecture"
-- Question about core technical choices
-- Question about scaling considerations
+        topics = data.get("topics")
+        error = validate_topics(topics)
 
-Category 2: "Operational Reality"  
-- Question about operational challenges
-- Question about resource allocation
+        if error:
+            return jsonify({"success": False, "error": error}), 400
 
-Category 3: "Market & User Dynamics"
-- Question about user behavior
-- Question about market fit
+        concurrency = batch_concurrency(data.get("concurrency"))
 
-Now generate the 3 categories for: {topic}
-        """
+        def generate():
+            for item in refine_batch(topics, concurrency):
+                yield ndjson_line(item)
 
-        # Call Groq with Instructor for structured output
-        # Pull model from environment (.env) with a sensible default
-        groq_model = os.getenv(
-            "GROQ_MODEL",
-            "meta-llama/llama-4-scout-17b-16e-instruct",
+        return Response(
+            generate(), mimetype="application/x-ndjson", headers=SSE_HEADERS
         )
 
-        result = client.chat.completions.create(
-            model=groq_model,
-            messages=[{"role": "user", "content": prompt}],
-            response_model=RefinementResult,
-            max_tokens=2500,
-            temperature=0.3,
+    except Exception as e:
+        return _error_response(e)
+
+
+def _parse_plan_request():
+    """
+    Validate the JSON payload shared by the planning endpoints.
+
+    Returns:
+        (fields, None) with topic/user_idea/constraints on success,
+        (None, error_response) otherwise
+    """
+    # Get JSON data from request
+    data = request.get_json()
+
+    if not data:
+        return None, (
+            jsonify({"success": False, "error": "No JSON data provided"}),
+            400,
         )
 
-        # Convert Pydantic model to dict for JSON response
-        result_dict = result.model_dump()
-        refined_result = {"categories": result_dict["categories"][:3]}
+    # Extract required fields
+    topic = data.get("topic")
+    user_idea = data.get("user_idea")
+    constraints = data.get("constraints", "")
 
-        return jsonify({"success": True, "result": refined_result, "topic": topic}), 200
+    if not topic:
+        return None, (
+            jsonify({"success": False, "error": "Missing required field: topic"}),
+            400,
+        )
 
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+    if not user_idea:
+        return None, (
+            jsonify({"success": False, "error": "Missing required field: user_idea"}),
+            400,
+        )
+
+    return {"topic": topic, "user_idea": user_idea, "constraints": constraints}, None
 
 
 @app.route("/api/agents/plan", methods=["POST"])
@@ -146,7 +380,11 @@ def run_planning_agents():
     {
         "topic": "string - The topic/domain for the project",
         "user_idea": "string - The user's initial idea",
-        "constraints": "string - Any specific constraints (optional)"
+        "constraints": "string - Any specific constraints (optional)",
+        "mode": "full (default), fast - one LLM call instead of two, or
+                 parallel - roadmap phases expanded concurrently (optional)",
+        "session_token": "string - From /api/refine, reuses its speculative
+                          Strategist run (optional)"
     }
 
     Returns:
@@ -157,42 +395,254 @@ def run_planning_agents():
             "strategic_roadmap": "string - The high-level roadmap from the Project Planner",
             "messages": [array of agent messages]
         },
+        "plan_id": int - The stored plan, see /api/plans/<id>,
         "error": "string - Error message if failed"
     }
+
+    With ?compact=1 repeated message content is sent as references and
+    the body is compressed when the client accepts it (see compact.py).
     """
     try:
-        # Get JSON data from request
-        data = request.get_json()
-
-        if not data:
-            return jsonify({"success": False, "error": "No JSON data provided"}), 400
-
-        # Extract required fields
-        topic = data.get("topic")
-        user_idea = data.get("user_idea")
-        constraints = data.get("constraints", "")
+        fields, error_response = _parse_plan_request()
+        if error_response:
+            return error_response
 
-        if not topic:
-            return (
-                jsonify({"success": False, "error": "Missing required field: topic"}),
-                400,
-            )
-
-        if not user_idea:
+        mode = request.get_json().get("mode", "full")
+        if mode not in PLAN_MODES:
             return (
                 jsonify(
-                    {"success": False, "error": "Missing required field: user_idea"}
+                    {
+                        "success": False,
+                        "error": f"Invalid mode: must be one of {', '.join(PLAN_MODES)}",
+                    }
                 ),
                 400,
             )
 
+        # Fast mode makes a single call, so there is no Strategist run to reuse
+        master_prompt = None
+        if mode != "fast":
+            master_prompt = speculation.claim(
+                request.get_json().get("session_token"), **fields
+            )
+
         # Run the agents workflow
-        result = run_agents(topic, user_idea, constraints)
+        result = run_agents(**fields, mode=mode, master_prompt=master_prompt)
+
+        response = {"success": True, "result": result}
+        plan_id = store.save(
+            "plan",
+            plan_cache_key(**fields, mode=mode, speculative=master_prompt is not None),
+            fields["topic"],
+            result,
+            user_idea=fields["user_idea"],
+            mode=mode,
+        )
+        if plan_id is not None:
+            response["plan_id"] = plan_id
+        with profiling.span("plan.jsonify"):
+            if compact.requested(request.args.get("compact")):
+                response["result"] = compact.dedupe_messages(result)
+                return _compact_response(response)
+            return jsonify(response), 200
+
+    except LLMUnavailableError as e:
+        return _unavailable_response(e)
+
+    except Exception as e:
+        return _error_response(e)
+
+
+@app.route("/api/agents/plan/stream", methods=["POST"])
+def stream_planning_agents():
+    """
+    Streaming variant of /api/agents/plan using Server-Sent Events.
+
+    Takes the same JSON payload and emits:
+        event: master_prompt      - as soon as the Strategist finishes
+        event: phase              - {"index", "phase"} per roadmap phase, while
+                                    the Project Overview Planner is generating
+        event: strategic_roadmap  - the validated roadmap
+        event: done               - the same "result" as /api/agents/plan
+        event: error              - {"error": "..."} if the run fails
+    """
+    try:
+        fields, error_response = _parse_plan_request()
+        if error_response:
+            return error_response
+
+        def generate():
+            for event, data in stream_agents(**fields):
+                yield sse_event(event, data)
+
+        return Response(generate(), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+    except Exception as e:
+        return _error_response(e)
+
+
+@app.route("/api/agents/plan/jobs", methods=["POST"])
+def submit_planning_job():
+    """
+    Queue a planning run and return immediately.
+
+    Takes the /api/agents/plan payload and returns 202 with:
+    {
+        "success": true,
+        "job": {"id", "status", "created_at", ...}
+    }
+    Poll GET /api/agents/plan/jobs/<id> for the result. Returns 503 when the
+    job queue is full.
+    """
+    try:
+        fields, error_response = _parse_plan_request()
+        if error_response:
+            return error_response
+
+        job = get_plan_jobs().submit(plan_job, **fields)
+        return jsonify({"success": True, "job": job.to_dict()}), 202
 
-        return jsonify({"success": True, "result": result}), 200
+    except QueueFullError as e:
+        return jsonify({"success": False, "error": str(e)}), 503
 
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return _error_response(e)
+
+
+@app.route("/api/agents/plan/jobs/<job_id>", methods=["GET"])
+def get_planning_job(job_id):
+    """
+    Status of a planning job; "result" holds the /api/agents/plan result
+    once status is "succeeded". Pass ?wait=<seconds> (max 60) to long-poll
+    until the job finishes, and ?compact=1 for a compact result.
+    """
+    wait = min(request.args.get("wait", 0, type=float), 60.0)
+    job = get_plan_jobs().wait(job_id, wait)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    if compact.requested(request.args.get("compact")):
+        job = job.to_dict()
+        if "result" in job:
+            job["result"] = compact.dedupe_messages(job["result"])
+        return _compact_response({"success": True, "job": job})
+    return jsonify({"success": True, "job": job.to_dict()}), 200
+
+
+@app.route("/api/agents/plan/jobs/<job_id>", methods=["DELETE"])
+def cancel_planning_job(job_id):
+    """Cancel a queued or running planning job"""
+    job = get_plan_jobs().cancel(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify({"success": True, "job": job.to_dict()}), 200
+
+
+def _compact_response(payload: dict):
+    """payload serialized and compressed for compact mode (see compact.py)"""
+    body, headers = compact.encode(payload, request.headers.get("Accept-Encoding"))
+    return Response(body, status=200, mimetype="application/json", headers=headers)
+
+
+def _not_modified(etag: str):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def _revalidated(response, etag: str):
+    """Cacheable by the browser, but revalidated with If-None-Match every time"""
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _list_stored(kind: str, key: str):
+    result_store = store.get_store()
+    if result_store is None:
+        return jsonify({"success": False, "error": "Result store is disabled"}), 404
+    try:
+        limit = store.page_size(request.args.get("limit"))
+        items, next_cursor = result_store.list(
+            kind,
+            topic=request.args.get("topic"),
+            limit=limit,
+            cursor=request.args.get("cursor"),
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    etag = store.list_etag(items, next_cursor)
+    if store.etag_matches(request.headers.get("If-None-Match"), etag):
+        return _not_modified(etag)
+    response = jsonify({"success": True, key: items, "next_cursor": next_cursor})
+    return _revalidated(response, etag)
+
+
+def _get_stored(kind: str, item_id: int, key: str):
+    result_store = store.get_store()
+    if result_store is None:
+        return jsonify({"success": False, "error": "Result store is disabled"}), 404
+    # Answered without reading the stored blob when the client is current
+    etag = result_store.etag(kind, item_id)
+    if etag is None:
+        return (
+            jsonify({"success": False, "error": f"{key.capitalize()} not found"}),
+            404,
+        )
+    compact_mode = compact.requested(request.args.get("compact"))
+    if compact_mode:
+        # The compact body is a different representation of the item
+        etag = f"{etag}-compact"
+    if store.etag_matches(request.headers.get("If-None-Match"), etag):
+        return _not_modified(etag)
+    item = result_store.get(kind, item_id)
+    if compact_mode:
+        item["result"] = compact.dedupe_messages(item["result"])
+        return _revalidated(_compact_response({"success": True, key: item}), etag)
+    return _revalidated(jsonify({"success": True, key: item}), etag)
+
+
+@app.route("/api/plans", methods=["GET"])
+def list_plans():
+    """
+    Stored plans, newest first
+
+    Query parameters: topic (only plans for this topic), limit (page size,
+    default 20, at most 100), cursor (next_cursor of the previous page).
+
+    Returns:
+    {
+        "success": bool,
+        "plans": [{"id", "topic", "user_idea", "mode", "created_at", "size",
+                   "etag"}, ...],
+        "next_cursor": "string - null on the last page"
+    }
+    """
+    return _list_stored("plan", "plans")
+
+
+@app.route("/api/plans/<int:plan_id>", methods=["GET"])
+def get_plan(plan_id):
+    """
+    One stored plan; the "result" is the one /api/agents/plan returned.
+    Supports If-None-Match (304 when unchanged) and ?compact=1.
+    """
+    return _get_stored("plan", plan_id, "plan")
+
+
+@app.route("/api/refinements", methods=["GET"])
+def list_refinements():
+    """Stored refine results, newest first; same parameters as /api/plans"""
+    return _list_stored("refine", "refinements")
+
+
+@app.route("/api/refinements/<int:refinement_id>", methods=["GET"])
+def get_refinement(refinement_id):
+    """
+    One stored refine result. Supports If-None-Match (304 when unchanged)
+    and ?compact=1.
+    """
+    return _get_stored("refine", refinement_id, "refinement")
 
 
 @app.errorhandler(404)
@@ -213,6 +663,22 @@ def internal_error(error):
     return jsonify({"success": False, "error": "Internal server error"}), 500
 
 
+def prewarm():
+    """
+    Build the shared LLM clients and compile the agent workflow so the first
+    request only pays for the model call.
+    """
+    try:
+        clients.get_instructor_client()
+        prewarm_agents()
+    except Exception as e:
+        app.logger.warning("Prewarm skipped: %s", e)
+
+
+if os.getenv("EUREKA_PREWARM", "1") == "1":
+    prewarm()
+
+
 if __name__ == "__main__":
     # Run the Flask development server
     app.run(host="0.0.0.0", port=5000, debug=True)
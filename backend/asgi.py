@@ -0,0 +1,668 @@
+"""
+Async (ASGI) serving path for Eureka
+
+Serves the same JSON contract as app.py, but every LLM call is awaited on
+AsyncGroq / the LangGraph ainvoke() path, so one process can keep hundreds of
+requests in flight instead of one per worker thread.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+EUREKA_MAX_CONCURRENCY caps the number of in-flight LLM requests per process
+(default 256); requests beyond the cap wait for a free slot.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+import json
+import logging
+import math
+import os
+import time
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.datastructures import Headers
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match, Route
+
+import cache
+import cassette
+import clients
+import compact
+import metrics
+import profiling
+import repair
+import resilience
+import router
+import speculation
+import store
+import tokens
+import tracing
+from agents import (
+    PLAN_MODES,
+    arun_agents,
+    checkpoint_stats,
+    get_plan_jobs,
+    plan_cache_key,
+    plan_job,
+    stream_agents,
+    prewarm as prewarm_agents,
+)
+from jobs import QueueFullError
+from batch import arefine_batch, batch_concurrency, get_rate_limiter, validate_topics
+from refinement import arefine_topic, refine_cache_key, stream_refine_topic
+from resilience import LLMUnavailableError
+from streaming import SSE_HEADERS, ndjson_line, sse_event
+
+# Load environment variables from .env if present
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = int(os.getenv("EUREKA_MAX_CONCURRENCY", "256"))
+
+_limiter = None
+_in_flight = 0
+
+
+@asynccontextmanager
+async def _llm_slot():
+    """Hold one of the MAX_CONCURRENCY per-process LLM request slots"""
+    global _limiter, _in_flight
+    # Created lazily so it binds to the server's running event loop
+    if _limiter is None:
+        _limiter = asyncio.Semaphore(MAX_CONCURRENCY)
+    async with _limiter:
+        _in_flight += 1
+        try:
+            yield
+        finally:
+            _in_flight -= 1
+
+
+def _error(message: str, status_code: int) -> JSONResponse:
+    return JSONResponse({"success": False, "error": message}, status_code=status_code)
+
+
+def _error_response(e: Exception) -> JSONResponse:
+    """500 for an unexpected error in a route, counted by exception type"""
+    metrics.count_error("request", e)
+    return _error(str(e), 500)
+
+
+def _unavailable_response(e: LLMUnavailableError) -> JSONResponse:
+    metrics.count_error("request", e)
+    response = _error(str(e), e.status_code)
+    if e.retry_after:
+        response.headers["Retry-After"] = str(math.ceil(e.retry_after))
+    return response
+
+
+async def _get_json(request: Request):
+    try:
+        return await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+async def health_check(request: Request) -> JSONResponse:
+    """Health check endpoint"""
+    return JSONResponse({"status": "healthy", "message": "Eureka API is running"})
+
+
+def _all_cache_stats() -> dict:
+    import semantic_cache
+
+    stats = cache.all_stats()
+    if semantic_cache.enabled():
+        stats["semantic"] = semantic_cache.all_stats()
+    return stats
+
+
+async def stats(request: Request) -> JSONResponse:
+    """Process-level serving statistics"""
+    return JSONResponse(
+        {
+            "success": True,
+            "clients": clients.stats(),
+            "caches": _all_cache_stats(),
+            "checkpoints": checkpoint_stats(),
+            "jobs": get_plan_jobs().stats(),
+            "batch_rate_limit": get_rate_limiter().stats(),
+            "llm": resilience.stats(),
+            "routing": router.stats(),
+            "tokens": tokens.stats(),
+            "repairs": repair.stats(),
+            "speculation": speculation.stats(),
+            "cassette": cassette.stats(),
+            "tracing": tracing.stats(),
+            "profiling": profiling.stats(),
+            "store": store.stats(),
+            "concurrency": {"limit": MAX_CONCURRENCY, "in_flight": _in_flight},
+        }
+    )
+
+
+async def cache_stats(request: Request) -> JSONResponse:
+    """Hit/miss statistics for the response caches"""
+    return JSONResponse({"success": True, "caches": _all_cache_stats()})
+
+
+async def prometheus_metrics(request: Request) -> Response:
+    """Prometheus metrics of every worker process (see metrics.py)"""
+    if not metrics.enabled():
+        return _error("Metrics are disabled", 404)
+    body, content_type = metrics.exposition()
+    return Response(body, media_type=content_type)
+
+
+async def refine(request: Request) -> JSONResponse:
+    """Async twin of app.refine(); same request and response contract"""
+    try:
+        data = await _get_json(request)
+
+        if not data:
+            return _error("No JSON data provided", 400)
+
+        topic = data.get("topic")
+
+        if not topic:
+            return _error("Missing required field: topic", 400)
+
+        async with _llm_slot():
+            refined_result = await arefine_topic(topic)
+
+        response = {"success": True, "result": refined_result, "topic": topic}
+        # Draft the master prompt while the user answers the questions
+        session_token = speculation.start(topic)
+        if session_token:
+            response["session_token"] = session_token
+        refinement_id = await run_in_threadpool(
+            store.save, "refine", refine_cache_key(topic), topic, refined_result
+        )
+        if refinement_id is not None:
+            response["refinement_id"] = refinement_id
+        with profiling.span("refine.jsonify"):
+            return JSONResponse(response)
+
+    except LLMUnavailableError as e:
+        return _unavailable_response(e)
+
+    except Exception as e:
+        return _error_response(e)
+
+
+async def run_planning_agents(request: Request) -> JSONResponse:
+    """Async twin of app.run_planning_agents(); same request and response contract"""
+    try:
+        data = await _get_json(request)
+
+        if not data:
+            return _error("No JSON data provided", 400)
+
+        topic = data.get("topic")
+        user_idea = data.get("user_idea")
+        constraints = data.get("constraints", "")
+
+        if not topic:
+            return _error("Missing required field: topic", 400)
+
+        if not user_idea:
+            return _error("Missing required field: user_idea", 400)
+
+        mode = data.get("mode", "full")
+        if mode not in PLAN_MODES:
+            return _error(f"Invalid mode: must be one of {', '.join(PLAN_MODES)}", 400)
+
+        # Fast mode makes a single call, so there is no Strategist run to reuse
+        master_prompt = None
+        if mode != "fast":
+            # Blocks while an in-progress speculative run finishes
+            master_prompt = await run_in_threadpool(
+                speculation.claim,
+                data.get("session_token"),
+                topic,
+                user_idea,
+                constraints,
+            )
+
+        async with _llm_slot():
+            result = await arun_agents(
+                topic, user_idea, constraints, mode, master_prompt=master_prompt
+            )
+
+        response = {"success": True, "result": result}
+        plan_id = await run_in_threadpool(
+            store.save,
+            "plan",
+            plan_cache_key(
+                topic,
+                user_idea,
+                constraints,
+                mode,
+                speculative=master_prompt is not None,
+            ),
+            topic,
+            result,
+            user_idea=user_idea,
+            mode=mode,
+        )
+        if plan_id is not None:
+            response["plan_id"] = plan_id
+        with profiling.span("plan.jsonify"):
+            if compact.requested(request.query_params.get("compact")):
+                response["result"] = compact.dedupe_messages(result)
+                return _compact_response(request, response)
+            return JSONResponse(response)
+
+    except LLMUnavailableError as e:
+        return _unavailable_response(e)
+
+    except Exception as e:
+        return _error_response(e)
+
+
+async def stream_refine(request: Request):
+    """Async twin of app.stream_refine(); same SSE events"""
+    try:
+        data = await _get_json(request)
+
+        if not data:
+            return _error("No JSON data provided", 400)
+
+        topic = data.get("topic")
+
+        if not topic:
+            return _error("Missing required field: topic", 400)
+
+        def generate():
+            # Iterated in Starlette's threadpool, off the event loop
+            for event, payload in stream_refine_topic(topic):
+                yield sse_event(event, payload)
+
+        return StreamingResponse(
+            generate(), media_type="text/event-stream", headers=SSE_HEADERS
+        )
+
+    except Exception as e:
+        return _error_response(e)
+
+
+async def refine_batch_topics(request: Request):
+    """Async twin of app.refine_batch_topics(); same NDJSON lines"""
+    try:
+        data = await _get_json(request)
+
+        if not data:
+            return _error("No JSON data provided", 400)
+
+        topics = data.get("topics")
+        error = validate_topics(topics)
+
+        if error:
+            return _error(error, 400)
+
+        concurrency = batch_concurrency(data.get("concurrency"))
+
+        async def generate():
+            async for item in arefine_batch(topics, concurrency):
+                yield ndjson_line(item)
+
+        return StreamingResponse(
+            generate(), media_type="application/x-ndjson", headers=SSE_HEADERS
+        )
+
+    except Exception as e:
+        return _error_response(e)
+
+
+async def stream_planning_agents(request: Request):
+    """Async twin of app.stream_planning_agents(); same SSE events"""
+    try:
+        data = await _get_json(request)
+
+        if not data:
+            return _error("No JSON data provided", 400)
+
+        topic = data.get("topic")
+        user_idea = data.get("user_idea")
+        constraints = data.get("constraints", "")
+
+        if not topic:
+            return _error("Missing required field: topic", 400)
+
+        if not user_idea:
+            return _error("Missing required field: user_idea", 400)
+
+        def generate():
+            # Iterated in Starlette's threadpool, off the event loop
+            for event, payload in stream_agents(topic, user_idea, constraints):
+                yield sse_event(event, payload)
+
+        return StreamingResponse(
+            generate(), media_type="text/event-stream", headers=SSE_HEADERS
+        )
+
+    except Exception as e:
+        return _error_response(e)
+
+
+async def submit_planning_job(request: Request) -> JSONResponse:
+    """Async twin of app.submit_planning_job()"""
+    try:
+        data = await _get_json(request)
+
+        if not data:
+            return _error("No JSON data provided", 400)
+
+        topic = data.get("topic")
+        user_idea = data.get("user_idea")
+        constraints = data.get("constraints", "")
+
+        if not topic:
+            return _error("Missing required field: topic", 400)
+
+        if not user_idea:
+            return _error("Missing required field: user_idea", 400)
+
+        job = await run_in_threadpool(
+            get_plan_jobs().submit,
+            plan_job,
+            topic=topic,
+            user_idea=user_idea,
+            constraints=constraints,
+        )
+        return JSONResponse({"success": True, "job": job.to_dict()}, status_code=202)
+
+    except QueueFullError as e:
+        return _error(str(e), 503)
+
+    except Exception as e:
+        return _error_response(e)
+
+
+async def get_planning_job(request: Request) -> JSONResponse:
+    """Async twin of app.get_planning_job(); ?wait=<seconds> long-polls"""
+    try:
+        wait = min(float(request.query_params.get("wait", 0)), 60.0)
+    except ValueError:
+        wait = 0.0
+    job = await run_in_threadpool(
+        get_plan_jobs().wait, request.path_params["job_id"], wait
+    )
+    if job is None:
+        return _error("Job not found", 404)
+    if compact.requested(request.query_params.get("compact")):
+        job = job.to_dict()
+        if "result" in job:
+            job["result"] = compact.dedupe_messages(job["result"])
+        return _compact_response(request, {"success": True, "job": job})
+    return JSONResponse({"success": True, "job": job.to_dict()})
+
+
+async def cancel_planning_job(request: Request) -> JSONResponse:
+    """Async twin of app.cancel_planning_job()"""
+    job = await run_in_threadpool(get_plan_jobs().cancel, request.path_params["job_id"])
+    if job is None:
+        return _error("Job not found", 404)
+    return JSONResponse({"success": True, "job": job.to_dict()})
+
+
+def _compact_response(request: Request, payload: dict) -> Response:
+    """payload serialized and compressed for compact mode (see compact.py)"""
+    body, headers = compact.encode(payload, request.headers.get("accept-encoding"))
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _revalidated(response: Response, etag: str) -> Response:
+    """Cacheable by the browser, but revalidated with If-None-Match every time"""
+    response.headers["ETag"] = f'"{etag}"'
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+async def _list_stored(request: Request, kind: str, key: str):
+    result_store = store.get_store()
+    if result_store is None:
+        return _error("Result store is disabled", 404)
+    params = request.query_params
+    try:
+        items, next_cursor = await run_in_threadpool(
+            result_store.list,
+            kind,
+            topic=params.get("topic"),
+            limit=store.page_size(params.get("limit")),
+            cursor=params.get("cursor"),
+        )
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    etag = store.list_etag(items, next_cursor)
+    if store.etag_matches(request.headers.get("if-none-match"), etag):
+        return _revalidated(Response(status_code=304), etag)
+    response = JSONResponse({"success": True, key: items, "next_cursor": next_cursor})
+    return _revalidated(response, etag)
+
+
+async def _get_stored(request: Request, kind: str, item_id: int, key: str):
+    result_store = store.get_store()
+    if result_store is None:
+        return _error("Result store is disabled", 404)
+    etag = await run_in_threadpool(result_store.etag, kind, item_id)
+    if etag is None:
+        return _error(f"{key.capitalize()} not found", 404)
+    compact_mode = compact.requested(request.query_params.get("compact"))
+    if compact_mode:
+        # The compact body is a different representation of the item
+        etag = f"{etag}-compact"
+    if store.etag_matches(request.headers.get("if-none-match"), etag):
+        return _revalidated(Response(status_code=304), etag)
+    item = await run_in_threadpool(result_store.get, kind, item_id)
+    if compact_mode:
+        item["result"] = compact.dedupe_messages(item["result"])
+        return _revalidated(
+            _compact_response(request, {"success": True, key: item}), etag
+        )
+    return _revalidated(JSONResponse({"success": True, key: item}), etag)
+
+
+async def list_plans(request: Request):
+    """Async twin of app.list_plans()"""
+    return await _list_stored(request, "plan", "plans")
+
+
+async def get_plan(request: Request):
+    """Async twin of app.get_plan()"""
+    return await _get_stored(request, "plan", request.path_params["plan_id"], "plan")
+
+
+async def list_refinements(request: Request):
+    """Async twin of app.list_refinements()"""
+    return await _list_stored(request, "refine", "refinements")
+
+
+async def get_refinement(request: Request):
+    """Async twin of app.get_refinement()"""
+    return await _get_stored(
+        request, "refine", request.path_params["refinement_id"], "refinement"
+    )
+
+
+async def not_found(request: Request, exc: Exception) -> JSONResponse:
+    """Handle 404 errors"""
+    return _error("Endpoint not found", 404)
+
+
+async def method_not_allowed(request: Request, exc: Exception) -> JSONResponse:
+    """Handle 405 errors"""
+    return _error("Method not allowed", 405)
+
+
+async def internal_error(request: Request, exc: Exception) -> JSONResponse:
+    """Handle 500 errors"""
+    return _error("Internal server error", 500)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    # Build the shared async clients and compile the graph before traffic
+    if os.getenv("EUREKA_PREWARM", "1") == "1":
+        try:
+            clients.get_async_instructor_client()
+            prewarm_agents()
+        except Exception as e:
+            logger.warning("Prewarm skipped: %s", e)
+    yield
+    await clients.get_async_http_client().aclose()
+
+
+class UsageHeaderMiddleware:
+    """Report each request's LLM tokens per stage in an X-LLM-Usage header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with resilience.track_usage() as usage:
+
+            async def send_with_usage(message):
+                # Streamed responses start before any tokens are known
+                if message["type"] == "http.response.start" and usage:
+                    header = resilience.usage_header(usage).encode("latin-1")
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-llm-usage", header),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_usage)
+
+
+class ProfileMiddleware:
+    """Profile requests that ask for it (see profiling.py)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = Headers(scope=scope).get(profiling.PROFILE_HEADER)
+        if not profiling.requested(header):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiling.start(f"{scope['method']} {scope['path']}")
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-file", profile.filename.encode("latin-1")),
+                    (
+                        b"server-timing",
+                        profiling.server_timing(profile).encode("latin-1"),
+                    ),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profile.stop()
+            profiling.detach(profile)
+
+
+def _route_path(scope) -> str:
+    """Path template of the route a request matches, for metric labels"""
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Record each request's latency, in-flight count and unhandled errors"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        route = _route_path(scope)
+        metrics.request_started(route)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            metrics.count_error("request", e)
+            raise
+        finally:
+            metrics.request_finished(route)
+            metrics.observe_request(
+                route, scope["method"], status, time.perf_counter() - started
+            )
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health_check, methods=["GET"]),
+        Route("/api/stats", stats, methods=["GET"]),
+        Route("/api/cache/stats", cache_stats, methods=["GET"]),
+        Route("/metrics", prometheus_metrics, methods=["GET"]),
+        Route("/api/refine", refine, methods=["POST"]),
+        Route("/api/refine/stream", stream_refine, methods=["POST"]),
+        Route("/api/refine/batch", refine_batch_topics, methods=["POST"]),
+        Route("/api/agents/plan", run_planning_agents, methods=["POST"]),
+        Route("/api/agents/plan/stream", stream_planning_agents, methods=["POST"]),
+        Route("/api/agents/plan/jobs", submit_planning_job, methods=["POST"]),
+        Route("/api/agents/plan/jobs/{job_id}", get_planning_job, methods=["GET"]),
+        Route(
+            "/api/agents/plan/jobs/{job_id}", cancel_planning_job, methods=["DELETE"]
+        ),
+        Route("/api/plans", list_plans, methods=["GET"]),
+        Route("/api/plans/{plan_id:int}", get_plan, methods=["GET"]),
+        Route("/api/refinements", list_refinements, methods=["GET"]),
+        Route("/api/refinements/{refinement_id:int}", get_refinement, methods=["GET"]),
+    ],
+    # Enable CORS for all routes
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_methods=["*"],
+            allow_headers=["*"],
+        ),
+        Middleware(UsageHeaderMiddleware),
+        Middleware(MetricsMiddleware),
+        Middleware(ProfileMiddleware),
+    ],
+    exception_handlers={
+        404: not_found,
+        405: method_not_allowed,
+        500: internal_error,
+    },
+    lifespan=lifespan,
+)
@@ -0,0 +1,213 @@
+"""
+Batch refinement: fan a list of topics out to Groq concurrently
+
+Results come back in completion order as one JSON object per topic, so a
+caller streaming NDJSON sees each topic as soon as it finishes. A failing
+topic produces an error item instead of failing the batch.
+
+Concurrency is capped per batch, and every batch in the process draws from
+one shared token bucket so several concurrent batches cannot together exceed
+the Groq request rate.
+
+Configuration (environment):
+    EUREKA_BATCH_CONCURRENCY  topics in flight per batch (default 8)
+    EUREKA_BATCH_MAX_TOPICS   largest accepted batch (default 500)
+    EUREKA_BATCH_RATE         refine requests per second, process-wide;
+                              "0" disables the limit (default 5)
+    EUREKA_BATCH_BURST        token bucket capacity (default: the rate)
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import threading
+import time
+
+import clients
+from refinement import arefine_topic, refine_topic
+
+DEFAULT_CONCURRENCY = int(os.getenv("EUREKA_BATCH_CONCURRENCY", "8"))
+MAX_TOPICS = int(os.getenv("EUREKA_BATCH_MAX_TOPICS", "500"))
+
+INVALID_TOPIC = "Topic must be a non-empty string"
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter usable from threads and coroutines alike.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._waited_seconds = 0.0
+        self._acquired = 0
+
+    def _reserve(self) -> float:
+        """Take one token, returning how long the caller must wait for it"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # Going negative reserves a future token for this caller
+            self._tokens -= 1
+            self._acquired += 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self._waited_seconds += delay
+            return delay
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "acquired": self._acquired,
+                "waited_seconds": round(self._waited_seconds, 3),
+            }
+
+
+def _create_rate_limiter() -> TokenBucket:
+    rate = float(os.getenv("EUREKA_BATCH_RATE", "5"))
+    burst = os.getenv("EUREKA_BATCH_BURST")
+    return TokenBucket(rate, float(burst) if burst else None)
+
+
+def get_rate_limiter() -> TokenBucket:
+    """Process-wide token bucket shared by every batch"""
+    return clients.get_or_create("rate_limiter", "refine_batch", _create_rate_limiter)
+
+
+def validate_topics(topics) -> str:
+    """Error message for an invalid topics payload, or None"""
+    if not isinstance(topics, list) or not topics:
+        return "Field topics must be a non-empty list"
+    if len(topics) > MAX_TOPICS:
+        return f"Too many topics ({len(topics)}); the limit is {MAX_TOPICS}"
+    return None
+
+
+def _valid_topic(topic) -> bool:
+    return isinstance(topic, str) and bool(topic.strip())
+
+
+def batch_concurrency(requested) -> int:
+    """Clamp a client-requested concurrency to 1..EUREKA_BATCH_CONCURRENCY"""
+    try:
+        return max(1, min(int(requested), DEFAULT_CONCURRENCY))
+    except (TypeError, ValueError):
+        return DEFAULT_CONCURRENCY
+
+
+def _item(index: int, topic, started: float, result=None, error=None) -> dict:
+    """
+    A topic's result item; started is when the topic got one of the batch's
+    concurrency slots, so elapsed_seconds covers the rate-limit wait and the
+    refinement in both serving paths, not the wait for a slot
+    """
+    item = {
+        "index": index,
+        "topic": topic,
+        "success": error is None,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+    if error is None:
+        item["result"] = result
+    else:
+        item["error"] = error
+    return item
+
+
+def _summary(items: int, failed: int, started: float) -> dict:
+    return {
+        "done": True,
+        "total": items,
+        "succeeded": items - failed,
+        "failed": failed,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def refine_batch(topics: list, concurrency: int = DEFAULT_CONCURRENCY):
+    """
+    Refine every topic, yielding one item dict per topic as it completes
+    followed by a summary dict ({"done": True, ...})
+    """
+    limiter = get_rate_limiter()
+    batch_started = time.perf_counter()
+
+    def run(index: int, topic):
+        started = time.perf_counter()
+        if not _valid_topic(topic):
+            return _item(index, topic, started, error=INVALID_TOPIC)
+        limiter.acquire()
+        try:
+            return _item(index, topic, started, result=refine_topic(topic))
+        except Exception as e:
+            return _item(index, topic, started, error=str(e))
+
+    failed = 0
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="eureka-batch"
+    ) as executor:
+        futures = [executor.submit(run, i, topic) for i, topic in enumerate(topics)]
+        try:
+            for future in as_completed(futures):
+                item = future.result()
+                failed += not item["success"]
+                yield item
+        finally:
+            # Client went away: do not start the topics still waiting
+            for future in futures:
+                future.cancel()
+    yield _summary(len(topics), failed, batch_started)
+
+
+async def arefine_batch(topics: list, concurrency: int = DEFAULT_CONCURRENCY):
+    """Async variant of refine_batch() for the ASGI serving path"""
+    limiter = get_rate_limiter()
+    semaphore = asyncio.Semaphore(concurrency)
+    batch_started = time.perf_counter()
+
+    async def run(index: int, topic):
+        if not _valid_topic(topic):
+            return _item(index, topic, time.perf_counter(), error=INVALID_TOPIC)
+        async with semaphore:
+            # As for a sync topic, whose thread only starts with its slot
+            started = time.perf_counter()
+            await limiter.aacquire()
+            try:
+                return _item(index, topic, started, result=await arefine_topic(topic))
+            except Exception as e:
+                return _item(index, topic, started, error=str(e))
+
+    tasks = [asyncio.ensure_future(run(i, topic)) for i, topic in enumerate(topics)]
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            failed += not item["success"]
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+    yield _summary(len(topics), failed, batch_started)
@@ -0,0 +1,6 @@
+"""
+Benchmarks for the Eureka backend
+
+Run from the backend directory, e.g.:
+    python -m benchmarks.bench_semantic_cache
+"""
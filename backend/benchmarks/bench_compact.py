@@ -0,0 +1,106 @@
+"""
+Compact response benchmark
+
+Builds plan responses shaped like /api/agents/plan returns them (full mode:
+master prompt and roadmap, then both again in the agent messages, with text
+varied per topic) and compares the default encoding, Flask's jsonify
+provider and Starlette's JSONResponse, with the compact one: size of the
+body and time to produce it, per response.
+
+    python -m benchmarks.bench_compact --plans 2000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from starlette.responses import JSONResponse
+
+import compact
+from benchmarks.bench_semantic_cache import percentile, synthetic_topics
+from benchmarks.bench_store import synthetic_plan
+
+
+def plan_response(topic: str, rng: random.Random, plan_id: int) -> dict:
+    plan = synthetic_plan(topic, rng)
+    # Separate copies, as the agents' model_dump() calls produce them
+    return {
+        "success": True,
+        "result": {
+            "master_prompt": plan["master_prompt"],
+            "strategic_roadmap": plan["strategic_roadmap"],
+            "messages": [
+                {"agent": "strategist", "content": dict(plan["master_prompt"])},
+                {
+                    "agent": "project_overview_planner",
+                    "content": dict(plan["strategic_roadmap"]),
+                },
+            ],
+        },
+        "plan_id": plan_id,
+    }
+
+
+def compact_response(response: dict) -> dict:
+    return {**response, "result": compact.dedupe_messages(response["result"])}
+
+
+def measure(label: str, encode, responses: list):
+    sizes, samples = [], []
+    for response in responses:
+        started = time.perf_counter()
+        body = encode(response)
+        samples.append((time.perf_counter() - started) * 1000)
+        sizes.append(len(body))
+    print(
+        f"{label:<30}{statistics.mean(sizes):>8,.0f} B"
+        f"   p50 {statistics.median(samples):6.3f} ms"
+        f"   p99 {percentile(samples, 99):6.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=2_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    responses = [
+        plan_response(topic, rng, i)
+        for i, topic in enumerate(synthetic_topics(args.plans))
+    ]
+    flask_json = DefaultJSONProvider(Flask(__name__))
+
+    print(f"plans {args.plans:,}, mean body size and time per response")
+    measure("flask jsonify", lambda r: flask_json.dumps(r).encode(), responses)
+    measure("starlette JSONResponse", lambda r: JSONResponse(r).body, responses)
+    measure(
+        "flask jsonify, gzip",
+        lambda r: compact.compress(flask_json.dumps(r).encode(), "gzip"),
+        responses,
+    )
+    measure(
+        "compact, identity",
+        lambda r: compact.encode(compact_response(r), None)[0],
+        responses,
+    )
+    measure(
+        "compact, gzip",
+        lambda r: compact.encode(compact_response(r), "gzip")[0],
+        responses,
+    )
+    if compact.brotli is not None:
+        measure(
+            "compact, br",
+            lambda r: compact.encode(compact_response(r), "br")[0],
+            responses,
+        )
+    else:
+        print("compact, br                   skipped (brotli is not installed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Planning mode benchmark: the two-stage graph ("full"), one call ("fast")
+and the graph with concurrently expanded phases ("parallel")
+
+Sends the same plan requests through /api/agents/plan in each mode, with the
+response caches off, and reports latency, prompt/completion tokens per plan
+(from the X-LLM-Usage header) and how often a plan failed schema validation.
+
+    python -m benchmarks.bench_plan_modes --requests 50 --invalid-rate 0.05
+    GROQ_API_KEY=... python -m benchmarks.bench_plan_modes --live --requests 20
+
+Without --live the requests go to the fake Groq server (benchmarks.fake_groq),
+whose --invalid-rate drops a required field from that fraction of responses.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from benchmarks.bench_semantic_cache import percentile, synthetic_topics
+from benchmarks.fake_groq import FakeGroqServer, add_arguments, config_from_args
+
+MODES = ("full", "fast", "parallel")
+
+
+def parse_usage(header: str) -> dict:
+    """X-LLM-Usage "stage=in/out/cached, ..." -> summed input/output tokens"""
+    totals = {"input_tokens": 0, "output_tokens": 0}
+    for part in filter(None, (header or "").split(", ")):
+        _, counts = part.split("=", 1)
+        input_tokens, output_tokens = counts.split("/")[:2]
+        totals["input_tokens"] += int(input_tokens)
+        totals["output_tokens"] += int(output_tokens)
+    return totals
+
+
+def _is_schema_failure(error: str) -> bool:
+    error = error.lower()
+    return "validation error" in error or "failed to parse" in error
+
+
+def run_mode(client, mode: str, topics: list) -> dict:
+    latencies, input_tokens, output_tokens = [], [], []
+    schema_failures = other_failures = 0
+    for topic in topics:
+        payload = {
+            "topic": topic,
+            "user_idea": f"A marketplace that makes {topic} simple",
+            "constraints": "Two engineers, twelve weeks",
+            "mode": mode,
+        }
+        started = time.perf_counter()
+        response = client.post("/api/agents/plan", json=payload)
+        latencies.append((time.perf_counter() - started) * 1000)
+        usage = parse_usage(response.headers.get("X-LLM-Usage"))
+        input_tokens.append(usage["input_tokens"])
+        output_tokens.append(usage["output_tokens"])
+        if response.status_code != 200:
+            if _is_schema_failure(response.get_json().get("error", "")):
+                schema_failures += 1
+            else:
+                other_failures += 1
+
+    return {
+        "mode": mode,
+        "requests": len(topics),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "mean_input_tokens": round(statistics.mean(input_tokens), 1),
+        "mean_output_tokens": round(statistics.mean(output_tokens), 1),
+        "schema_failure_rate": round(schema_failures / len(topics), 4),
+        "other_failure_rate": round(other_failures / len(topics), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--live", action="store_true", help="call the real Groq API")
+    parser.add_argument("--json", help="also write the report to this file")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    fake = None
+    if not args.live:
+        fake = FakeGroqServer(config_from_args(args)).start()
+        os.environ["GROQ_BASE_URL"] = fake.url
+        os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ["EUREKA_CACHE"] = "0"
+
+    from app import app
+
+    client = app.test_client()
+    topics = synthetic_topics(args.requests, seed=int(time.time()))
+    report = [run_mode(client, mode, topics) for mode in MODES]
+    if fake is not None:
+        fake.stop()
+
+    print(
+        f"{'mode':<6}{'p50':>10}{'p95':>10}{'in tok':>10}{'out tok':>10}"
+        f"{'schema fail':>13}{'other fail':>12}"
+    )
+    for row in report:
+        print(
+            f"{row['mode']:<6}{row['p50_ms']:>8.0f}ms{row['p95_ms']:>8.0f}ms"
+            f"{row['mean_input_tokens']:>10.0f}{row['mean_output_tokens']:>10.0f}"
+            f"{row['schema_failure_rate']:>13.1%}{row['other_failure_rate']:>12.1%}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Structured-output repair benchmark: local repair vs validation retries
+
+Sends the same refine and plan requests with local repair on and off
+(EUREKA_REPAIR), against the fake Groq server returning output that breaks
+the models' limits in repairable ways (over-long strings, duplicated items,
+dict fields as JSON text) for --repairable-rate of responses. Reports
+latency, LLM calls and tokens per request (from the X-LLM-Usage header),
+repairs, validation retries and failures.
+
+    python -m benchmarks.bench_repair --requests 40 --repairable-rate 0.2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from benchmarks.bench_plan_modes import parse_usage
+from benchmarks.bench_semantic_cache import percentile, synthetic_topics
+from benchmarks.fake_groq import FakeGroqServer, add_arguments, config_from_args
+
+ENDPOINTS = {
+    "refine": lambda topic: ("/api/refine", {"topic": topic}),
+    "plan": lambda topic: (
+        "/api/agents/plan",
+        {"topic": topic, "user_idea": f"A marketplace that makes {topic} simple"},
+    ),
+}
+
+
+def _stage_totals(client, name: str) -> int:
+    stages = client.get("/api/stats").get_json()["llm"]["stages"]
+    return sum(counts.get(name, 0) for counts in stages.values())
+
+
+def run(client, fake, endpoint: str, repair: bool, topics: list) -> dict:
+    os.environ["EUREKA_REPAIR"] = "1" if repair else "0"
+    before = {
+        name: _stage_totals(client, name) for name in ("repairs", "validation_retries")
+    }
+    requests_before = fake.counts["requests"]
+    latencies, tokens = [], []
+    failures = 0
+    for topic in topics:
+        path, payload = ENDPOINTS[endpoint](topic)
+        started = time.perf_counter()
+        response = client.post(path, json=payload)
+        latencies.append((time.perf_counter() - started) * 1000)
+        usage = parse_usage(response.headers.get("X-LLM-Usage"))
+        tokens.append(usage["input_tokens"] + usage["output_tokens"])
+        failures += response.status_code != 200
+
+    return {
+        "endpoint": endpoint,
+        "repair": repair,
+        "requests": len(topics),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "llm_calls_per_request": round(
+            (fake.counts["requests"] - requests_before) / len(topics), 2
+        ),
+        "mean_tokens": round(statistics.mean(tokens), 1),
+        "repairs": _stage_totals(client, "repairs") - before["repairs"],
+        "validation_retries": _stage_totals(client, "validation_retries")
+        - before["validation_retries"],
+        "failure_rate": round(failures / len(topics), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--json", help="also write the report to this file")
+    add_arguments(parser)
+    parser.set_defaults(repairable_rate=0.2)
+    args = parser.parse_args()
+
+    fake = FakeGroqServer(config_from_args(args)).start()
+    os.environ["GROQ_BASE_URL"] = fake.url
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ["EUREKA_CACHE"] = "0"
+
+    from app import app
+
+    client = app.test_client()
+    topics = synthetic_topics(args.requests, seed=int(time.time()))
+    report = [
+        run(client, fake, endpoint, repair, topics)
+        for endpoint in ENDPOINTS
+        for repair in (False, True)
+    ]
+    fake.stop()
+
+    print(
+        f"{'endpoint':<9}{'repair':>7}{'p50':>10}{'p95':>10}{'calls/req':>11}"
+        f"{'tokens':>9}{'repairs':>9}{'retries':>9}{'failed':>8}"
+    )
+    for row in report:
+        print(
+            f"{row['endpoint']:<9}{'on' if row['repair'] else 'off':>7}"
+            f"{row['p50_ms']:>8.0f}ms{row['p95_ms']:>8.0f}ms"
+            f"{row['llm_calls_per_request']:>11.2f}{row['mean_tokens']:>9.0f}"
+            f"{row['repairs']:>9}{row['validation_retries']:>9}"
+            f"{row['failure_rate']:>8.1%}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Model router benchmark: routing, fallback and recovery across a model pool
+
+Serves /api/refine from a two-model pool on the fake Groq server, where the
+preferred model is slower than the alternative, then makes the faster one
+fail every request for a while and finally lets it recover. Reports per
+phase the latency, failures and which models served the calls, as seen in
+the router's own decisions.
+
+    python -m benchmarks.bench_router --requests 40 --cooldown 3
+"""
+
+import argparse
+import json
+import os
+import time
+
+from benchmarks.bench_semantic_cache import percentile, synthetic_topics
+from benchmarks.fake_groq import FakeGroqConfig, FakeGroqServer
+
+PREFERRED, ALTERNATIVE = "preferred-model", "alternative-model"
+
+
+def _decisions(client) -> dict:
+    stages = client.get("/api/stats").get_json()["routing"]["stages"]
+    return stages.get("refine", {}).get("decisions", {})
+
+
+def run_phase(client, name: str, topics: list) -> dict:
+    before = _decisions(client)
+    latencies, failures = [], 0
+    for topic in topics:
+        started = time.perf_counter()
+        response = client.post("/api/refine", json={"topic": topic})
+        latencies.append((time.perf_counter() - started) * 1000)
+        failures += response.status_code != 200
+    after = _decisions(client)
+    return {
+        "phase": name,
+        "requests": len(topics),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "failure_rate": round(failures / len(topics), 4),
+        "calls": {
+            model: after.get(model, 0) - before.get(model, 0)
+            for model in (PREFERRED, ALTERNATIVE)
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=30, help="per phase")
+    parser.add_argument("--preferred-latency", default="fixed:0.4")
+    parser.add_argument("--alternative-latency", default="fixed:0.1")
+    parser.add_argument("--cooldown", type=float, default=3.0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    fake = FakeGroqServer(
+        FakeGroqConfig(
+            tokens_per_second=5000,
+            model_latency={
+                PREFERRED: args.preferred_latency,
+                ALTERNATIVE: args.alternative_latency,
+            },
+        )
+    ).start()
+    os.environ.update(
+        GROQ_BASE_URL=fake.url,
+        GROQ_API_KEY=os.getenv("GROQ_API_KEY", "fake"),
+        EUREKA_CACHE="0",
+        EUREKA_MODELS_REFINE=f"{PREFERRED},{ALTERNATIVE}",
+        EUREKA_ROUTER_COOLDOWN=str(args.cooldown),
+        EUREKA_LLM_BACKOFF_BASE="0.05",
+    )
+
+    from app import app
+
+    client = app.test_client()
+    topics = synthetic_topics(args.requests, seed=int(time.time()))
+    report = [run_phase(client, "healthy", topics)]
+
+    fake.config.model_error_rate[ALTERNATIVE] = 1.0
+    report.append(run_phase(client, "alternative failing", topics))
+
+    fake.config.model_error_rate.pop(ALTERNATIVE)
+    time.sleep(args.cooldown)
+    report.append(run_phase(client, "recovered", topics))
+    fake.stop()
+
+    print(
+        f"{'phase':<21}{'p50':>9}{'p95':>9}{'failed':>8}"
+        f"{PREFERRED:>17}{ALTERNATIVE:>19}"
+    )
+    for row in report:
+        print(
+            f"{row['phase']:<21}{row['p50_ms']:>7.0f}ms{row['p95_ms']:>7.0f}ms"
+            f"{row['failure_rate']:>8.1%}"
+            f"{row['calls'][PREFERRED]:>17}{row['calls'][ALTERNATIVE]:>19}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
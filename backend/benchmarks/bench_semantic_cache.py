@@ -0,0 +1,93 @@
+"""
+Semantic cache lookup benchmark
+
+Fills a SemanticCache with synthetic topics and times single and batched
+lookups against it.
+
+    python -m benchmarks.bench_semantic_cache --entries 100000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from semantic_cache import SemanticCache
+
+SUBJECTS = [
+    "Uber", "Airbnb", "Netflix", "Duolingo", "Spotify", "Stripe", "Shopify",
+    "LinkedIn", "Tinder", "Slack", "Notion", "Figma", "Peloton", "DoorDash",
+]
+AUDIENCES = [
+    "cats", "dogs", "farmers", "students", "retirees", "nurses", "truckers",
+    "chefs", "gardeners", "musicians", "landlords", "freelancers", "gamers",
+    "parents", "veterans", "beekeepers", "architects", "plumbers",
+]
+QUALIFIERS = [
+    "in rural areas", "on a budget", "with AI matching", "for small towns",
+    "with offline support", "using drones", "with a subscription model",
+    "for weekend use", "with carbon tracking", "in emerging markets",
+]
+
+
+def synthetic_topics(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(SUBJECTS)} for {rng.choice(AUDIENCES)} "
+        f"{rng.choice(QUALIFIERS)} #{i}"
+        for i in range(count)
+    ]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+
+    cache = SemanticCache(max_entries=args.entries, dim=args.dim)
+    topics = synthetic_topics(args.entries)
+
+    started = time.perf_counter()
+    for i in range(0, len(topics), 10_000):
+        chunk = topics[i : i + 10_000]
+        cache.add_many(chunk, [{"topic": t} for t in chunk])
+    fill_seconds = time.perf_counter() - started
+
+    rng = random.Random(1)
+    # Half near-duplicates of cached topics, half unseen topics
+    queries = [
+        rng.choice(topics).lower() + "!" if i % 2 else f"unseen idea number {i}"
+        for i in range(args.queries)
+    ]
+
+    single = []
+    for query in queries:
+        started = time.perf_counter()
+        cache.lookup(query)
+        single.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    for i in range(0, len(queries), args.batch):
+        cache.lookup_many(queries[i : i + args.batch])
+    batched_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    stats = cache.stats()
+    print(f"entries            {args.entries:,} x {args.dim} dims")
+    print(f"index memory       {cache._matrix.nbytes / 2**20:.1f} MiB")
+    print(f"fill               {fill_seconds:.2f} s")
+    print(f"lookup p50         {statistics.median(single):.3f} ms")
+    print(f"lookup p99         {percentile(single, 99):.3f} ms")
+    print(f"{f'batched (x{args.batch})':<19}{batched_ms:.3f} ms per query")
+    print(f"hit rate           {stats['hit_rate']:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Startup time benchmark
+
+Imports the app in a fresh process under `python -X importtime` and reports
+the total import time, the slowest top-level packages (cumulative, so
+transitive imports are charged to the package that pulled them in) and the
+time the prewarm step takes to build the clients and compile the workflow.
+
+    python -m benchmarks.bench_startup --app app --top 15
+    python -m benchmarks.bench_startup --app asgi --json startup.json
+
+Run it before and after touching imports; --fail-import-ms gates a build on
+the import time.
+"""
+
+import argparse
+from collections import defaultdict
+import json
+import os
+import re
+import subprocess
+import sys
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+# Imports the app without prewarming, then prewarms and prints the timings
+_WORKER = """
+import json, time
+started = time.perf_counter()
+import {app}
+imported = time.perf_counter()
+{prewarm}
+prewarmed = time.perf_counter()
+print(json.dumps({{"import_ms": (imported - started) * 1000,
+                  "prewarm_ms": (prewarmed - imported) * 1000}}))
+"""
+
+_PREWARM = {
+    "app": "app.prewarm()",
+    "asgi": "import clients, agents; clients.get_async_instructor_client(); agents.prewarm()",
+}
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Cumulative microseconds per top-level imported module"""
+    packages = defaultdict(int)
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        # Only the outermost import of a package carries its full cumulative time
+        if match and len(match.group(3)) == 1:
+            packages[match.group(4).split(".")[0]] += int(match.group(2))
+    return dict(packages)
+
+
+def measure(app: str) -> dict:
+    env = {
+        **os.environ,
+        "EUREKA_PREWARM": "0",
+        "EUREKA_TRACING": "0",
+        "GROQ_API_KEY": os.getenv("GROQ_API_KEY", "fake"),
+    }
+    code = _WORKER.format(app=app, prewarm=_PREWARM[app])
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+    return {
+        "app": app,
+        "import_ms": round(timings["import_ms"], 1),
+        "prewarm_ms": round(timings["prewarm_ms"], 1),
+        "modules_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(modules.items(), key=lambda item: -item[1])
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--app", choices=sorted(_PREWARM), default="app")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--fail-import-ms", type=float)
+    args = parser.parse_args()
+
+    report = measure(args.app)
+    print(f"app                {report['app']}")
+    print(f"import             {report['import_ms']:.0f} ms")
+    print(f"prewarm            {report['prewarm_ms']:.0f} ms")
+    print("slowest top-level imports (cumulative)")
+    for name, ms in list(report["modules_ms"].items())[: args.top]:
+        print(f"  {name:<30} {ms:8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.fail_import_ms is not None and report["import_ms"] > args.fail_import_ms:
+        print(
+            f"FAIL: import {report['import_ms']:.0f} ms > {args.fail_import_ms:.0f} ms"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Result store benchmark
+
+Bulk-loads a ResultStore with synthetic plans (varied per topic, shaped like
+FastPlanOutput results) and times saves, reads by id, conditional reads,
+list pages at several depths and the HTTP endpoints with and without
+If-None-Match.
+
+    python -m benchmarks.bench_store --plans 1000000
+"""
+
+import argparse
+import copy
+import hashlib
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import prompts
+from benchmarks.bench_semantic_cache import percentile, synthetic_topics
+from benchmarks.fake_groq import PAYLOADS
+from store import ResultStore
+
+# Words of the prompt templates, so plan text compresses like English prose
+_VOCABULARY = sorted(
+    {
+        word.strip(".,:;()\"'").lower()
+        for template in vars(prompts).values()
+        if isinstance(template, prompts.PromptTemplate)
+        for text in (template.system, template.user)
+        for word in text.split()
+        if word.strip(".,:;()\"'").isalpha()
+    }
+)
+
+
+def synthetic_plan(topic: str, rng: random.Random) -> dict:
+    """The fake plan payload with every string rewritten for topic"""
+
+    def vary(value):
+        if isinstance(value, dict):
+            return {key: vary(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [vary(item) for item in value]
+        if isinstance(value, str):
+            words = rng.choices(_VOCABULARY, k=rng.randint(4, 14))
+            return f"{value} for {topic}: {' '.join(words)}"
+        return value
+
+    return vary(copy.deepcopy(PAYLOADS["FastPlanOutput"]))
+
+
+def request_key(i: int) -> str:
+    return hashlib.sha256(f"bench plan {i}".encode()).hexdigest()
+
+
+def timed(fn, calls: list) -> list:
+    """Milliseconds of each call of fn over calls (argument tuples)"""
+    samples = []
+    for args in calls:
+        started = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label: str, samples: list):
+    print(
+        f"{label:<26}p50 {statistics.median(samples):7.3f} ms"
+        f"   p99 {percentile(samples, 99):7.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=1_000_000)
+    parser.add_argument("--topics", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--batch", type=int, default=5_000)
+    parser.add_argument("--db", help="store file (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench_store.db")
+    store = ResultStore(path)
+    rng = random.Random(0)
+    topics = synthetic_topics(args.topics)
+    # Plans of the last 90 days, in creation order
+    now = time.time()
+    step = 90 * 86400 / max(1, args.plans)
+
+    started = time.perf_counter()
+    for first in range(0, args.plans, args.batch):
+        items = []
+        for i in range(first, min(args.plans, first + args.batch)):
+            topic = topics[i % len(topics)]
+            fields = {"mode": "fast", "created_at": now - (args.plans - i) * step}
+            items.append((request_key(i), topic, synthetic_plan(topic, rng), fields))
+        store.save_many("plan", items)
+    load_seconds = time.perf_counter() - started
+    file_bytes = os.path.getsize(path)
+    # Size of the raw JSON, from the sizes stored with each row
+    conn = store._connect()
+    json_bytes, blob_bytes = conn.execute(
+        "SELECT sum(size), sum(length(body)) FROM stored_results"
+    ).fetchone()
+
+    saves = [
+        (
+            "plan",
+            request_key(args.plans + i),
+            topics[i % len(topics)],
+            synthetic_plan(topics[i % len(topics)], rng),
+        )
+        for i in range(args.queries)
+    ]
+    ids = [(rng.randint(1, args.plans),) for _ in range(args.queries)]
+    by_topic = [(rng.choice(topics),) for _ in range(args.queries)]
+
+    # A cursor about 90% of the way down the list, for deep pages
+    deep = conn.execute(
+        "SELECT created_at, id FROM stored_results WHERE kind = 'plan'"
+        " ORDER BY created_at, id LIMIT 1 OFFSET ?",
+        (args.plans // 10,),
+    ).fetchone()
+    deep_cursor = f"{deep[0]!r}:{deep[1]}"
+
+    print(f"plans              {args.plans:,} across {args.topics:,} topics")
+    print(
+        f"bulk load          {load_seconds:.1f} s ({args.plans / load_seconds:,.0f}/s)"
+    )
+    print(f"file size          {file_bytes / 2**20:,.1f} MiB")
+    print(f"per plan           {file_bytes / args.plans:,.0f} bytes on disk")
+    print(f"compression        {json_bytes / blob_bytes:.2f}x of the JSON")
+    report("save (one request)", timed(store.save, saves))
+    report("save (duplicate)", timed(store.save, saves))
+    report("get by id", timed(lambda i: store.get("plan", i), ids))
+    report("etag by id", timed(lambda i: store.etag("plan", i), ids))
+    report("list, first page", timed(lambda: store.list("plan"), [()] * 200))
+    report(
+        "list, 90% deep",
+        timed(lambda: store.list("plan", cursor=deep_cursor), [()] * 200),
+    )
+    report("list by topic", timed(lambda t: store.list("plan", topic=t), by_topic))
+
+    os.environ["EUREKA_STORE_DB"] = path
+    os.environ.setdefault("EUREKA_METRICS", "0")
+    from app import app
+
+    client = app.test_client()
+    etags = {}
+    for (item_id,) in ids:
+        response = client.get(f"/api/plans/{item_id}")
+        etags[item_id] = response.headers["ETag"]
+        response.close()
+
+    def http_get(item_id, conditional):
+        headers = {"If-None-Match": etags[item_id]} if conditional else {}
+        client.get(f"/api/plans/{item_id}", headers=headers).close()
+
+    report("GET /api/plans/<id>", timed(lambda i: http_get(i, False), ids))
+    report("GET ... (304)", timed(lambda i: http_get(i, True), ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Per-request tracing overhead benchmark
+
+Runs the same plan requests against the fake Groq server with tracing off,
+with synchronous per-span export (the old behaviour) and with batched
+export, each in a fresh process, against a local collector that answers
+after --collector-latency seconds.
+
+    python -m benchmarks.bench_tracing --requests 50 --collector-latency 0.05
+"""
+
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.bench_semantic_cache import percentile
+from benchmarks.fake_groq import FakeGroqConfig, FakeGroqServer
+
+MODES = {
+    "off": {"EUREKA_TRACING": "0"},
+    "sync export": {"EUREKA_TRACING": "1", "EUREKA_TRACE_BATCH": "0"},
+    "batched export": {"EUREKA_TRACING": "1", "EUREKA_TRACE_BATCH": "1"},
+}
+
+
+def start_collector(latency: float) -> str:
+    """OTLP/HTTP stand-in that accepts every export after latency seconds"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/v1/traces"
+
+
+def run_worker(requests: int):
+    """Time sequential plan requests in this process; prints one JSON line"""
+    fake = FakeGroqServer(
+        FakeGroqConfig(latency="fixed:0.02", tokens_per_second=100_000)
+    ).start()
+    os.environ["GROQ_BASE_URL"] = fake.url
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ["EUREKA_CACHE"] = "0"
+
+    from app import app
+
+    client = app.test_client()
+    payload = {"topic": "warmup", "user_idea": "warmup"}
+    for _ in range(3):
+        client.post("/api/agents/plan", json=payload)
+
+    latencies = []
+    for i in range(requests):
+        payload = {"topic": f"topic {i}", "user_idea": "an idea"}
+        started = time.perf_counter()
+        response = client.post("/api/agents/plan", json=payload)
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.json
+    print(json.dumps(latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--collector-latency", type=float, default=0.05)
+    parser.add_argument("--sample-ratio", default="1.0")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.requests)
+        return
+
+    collector = start_collector(args.collector_latency)
+    results = {}
+    for mode, env in MODES.items():
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_tracing",
+                "--worker",
+                "--requests",
+                str(args.requests),
+            ],
+            env={
+                **os.environ,
+                **env,
+                "PHOENIX_COLLECTOR_ENDPOINT": collector,
+                "EUREKA_TRACE_SAMPLE_RATIO": args.sample_ratio,
+                "EUREKA_PREWARM": "1",
+            },
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    baseline = statistics.mean(results["off"])
+    print(f"requests           {args.requests} plans, 2 LLM calls each")
+    print(f"collector latency  {args.collector_latency * 1000:.0f} ms per export")
+    for mode, latencies in results.items():
+        mean = statistics.mean(latencies)
+        print(
+            f"{mode:<19}mean {mean:7.1f} ms  p50 {statistics.median(latencies):7.1f} ms"
+            f"  p99 {percentile(latencies, 99):7.1f} ms  overhead {mean - baseline:+6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
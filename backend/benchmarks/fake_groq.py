@@ -0,0 +1,517 @@
+"""
+Local stand-in for the Groq (OpenAI-compatible) chat completions API
+
+Answers tool-calling requests for Eureka's structured outputs with canned,
+schema-valid payloads, after a simulated time-to-first-token drawn from a
+latency distribution plus completion_tokens / tokens-per-second of
+generation. Supports streaming, token usage, rate-limit headers, a
+requests-per-minute limit and random error, schema-invalid or
+repairable (over-long, duplicated, mistyped) output injection, so the serving path can be load-tested without network access
+or API spend.
+
+Leading messages identical to an earlier request's (same tools, same
+messages up to that point) are reported as prefix-cached prompt tokens,
+and with --prefill-tokens-per-second only the uncached ones add prefill
+time, like a provider-side prompt cache.
+
+    python -m benchmarks.fake_groq --port 8099 --latency lognormal:0.6:0.4
+    GROQ_BASE_URL=http://127.0.0.1:8099 GROQ_API_KEY=fake gunicorn app:app
+
+Latency specs (seconds):
+    fixed:<s>                   always s
+    uniform:<low>:<high>        uniform between low and high
+    lognormal:<median>:<sigma>  long-tailed, like real LLM latencies
+"""
+
+import argparse
+from collections import Counter, deque
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import random
+import re
+import threading
+import time
+
+# Words and single punctuation marks, roughly one BPE token each, so
+# quote/brace-heavy prompts cost more than the same content as plain text
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_prompt_tokens(messages: list) -> int:
+    """Approximate prompt tokens: content pieces plus 4 per message"""
+    return sum(
+        len(_TOKEN_RE.findall(str(message.get("content") or ""))) + 4
+        for message in messages
+    )
+
+
+PAYLOADS = {
+    "RefinementResult": {
+        "categories": [
+            {
+                "name": name,
+                "questions": [
+                    {"question": f"{q} for this idea at 1,000 users?"}
+                    for q in questions
+                ],
+            }
+            for name, questions in [
+                (
+                    "Technical Architecture",
+                    ["Which component fails first", "What data model holds up"],
+                ),
+                (
+                    "Operational Reality",
+                    ["Who handles support load", "What does onboarding cost"],
+                ),
+                (
+                    "Market & User Dynamics",
+                    ["Why would users switch", "What stops churn", "Who pays"],
+                ),
+            ]
+        ]
+    },
+    "MasterPromptOutput": {
+        "objective": "Launch a focused MVP that validates the core user need",
+        "goals": [
+            f"Goal {i}: measurable outcome within the first quarter" for i in range(5)
+        ],
+        "constraints_and_requirements": {
+            "budget": "Bootstrapped, under $10k for the MVP",
+            "timeline": "Twelve weeks to first paying users",
+            "team": "Two engineers and one designer",
+        },
+        "success_criteria": {
+            "functional": ["Core flow completes end to end", "Payments work"],
+            "non_functional": ["p95 latency under 300 ms", "99.5% uptime"],
+        },
+        "key_deliverables": [f"Deliverable {i}" for i in range(5)],
+        "technical_considerations": {
+            "architecture": "Single service with a managed database",
+            "integrations": "Payments, email and analytics providers",
+        },
+    },
+    "StrategicRoadmapOutput": {
+        "problem_statement": "Users lack a simple, trusted way to solve this problem",
+        "vision_statement": "The default tool people reach for in this space",
+        "major_goals": [f"Major goal {i}" for i in range(4)],
+        "key_phases": [
+            {
+                "name": f"Phase {i}: {name}",
+                "duration": f"{2 * (i + 1)} weeks",
+                "activities": [f"{name} activity {j}" for j in range(4)],
+            }
+            for i, name in enumerate(["Discovery", "MVP", "Beta", "Launch", "Scale"])
+        ],
+        "north_star_metrics": ["Weekly active users", "Retention at day 30"],
+        "strategic_dependencies_and_risks": {
+            "dependencies": "Payment provider approval",
+            "risks": "Incumbent copies the core feature",
+        },
+    },
+}
+
+
+PAYLOADS["RoadmapSkeleton"] = {
+    **PAYLOADS["StrategicRoadmapOutput"],
+    "key_phases": [
+        {"name": phase["name"], "duration": phase["duration"]}
+        for phase in PAYLOADS["StrategicRoadmapOutput"]["key_phases"]
+    ],
+}
+PAYLOADS["PhaseActivities"] = {
+    "activities": PAYLOADS["StrategicRoadmapOutput"]["key_phases"][0]["activities"]
+}
+PAYLOADS["FastPlanOutput"] = {
+    "master_prompt": PAYLOADS["MasterPromptOutput"],
+    "strategic_roadmap": PAYLOADS["StrategicRoadmapOutput"],
+}
+
+
+# Dict-typed output fields, sent as JSON text by repairable()
+_DICT_FIELDS = {
+    "constraints_and_requirements",
+    "success_criteria",
+    "technical_considerations",
+    "strategic_dependencies_and_risks",
+}
+
+
+def repairable(value, key: str = None):
+    """
+    A payload breaking limits only in ways repair.py fixes locally: strings
+    over max_length, duplicated list items and dict fields sent as JSON text
+    """
+    if key in _DICT_FIELDS:
+        return json.dumps(value)
+    if isinstance(value, dict):
+        return {name: repairable(item, name) for name, item in value.items()}
+    if isinstance(value, list):
+        items = [repairable(item) for item in value]
+        return items + items[:2]
+    if isinstance(value, str):
+        return f"{value} " + "And what happens when it has to scale? " * 6
+    return value
+
+
+def parse_latency(spec: str):
+    """Zero-argument sampler for a latency spec (see module docstring)"""
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+class FakeGroqConfig:
+    def __init__(
+        self,
+        latency: str = "fixed:0.3",
+        tokens_per_second: float = 500.0,
+        error_rate: float = 0.0,
+        error_statuses: tuple = (429, 500, 503),
+        rpm_limit: int = 0,
+        prefill_tokens_per_second: float = 0.0,
+        invalid_rate: float = 0.0,
+        repairable_rate: float = 0.0,
+        model_latency: dict = None,
+        model_error_rate: dict = None,
+    ):
+        self.sample_latency = parse_latency(latency)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.rpm_limit = rpm_limit
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.invalid_rate = invalid_rate
+        self.repairable_rate = repairable_rate
+        # Per-model overrides, e.g. to make one model of a router pool degrade
+        self.model_latency = {
+            model: parse_latency(spec) for model, spec in (model_latency or {}).items()
+        }
+        self.model_error_rate = model_error_rate or {}
+
+
+class FakeGroqServer:
+    """Threaded HTTP server answering POST .../chat/completions"""
+
+    def __init__(self, config: FakeGroqConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self._prefixes: set = set()
+        self.counts: Counter = Counter()
+        handler = type("Handler", (_Handler,), {"fake": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGroqServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def cached_prompt_tokens(self, tools: list, messages: list) -> int:
+        """
+        Tokens of the leading messages seen before as a prefix of an earlier
+        request; remembers every prefix of this one
+        """
+        prefix = hashlib.sha256(json.dumps(tools, sort_keys=True).encode())
+        cached, hit = 0, True
+        for message in messages:
+            prefix.update(json.dumps(message, sort_keys=True).encode())
+            digest = prefix.copy().hexdigest()
+            with self._lock:
+                hit = hit and digest in self._prefixes
+                self._prefixes.add(digest)
+            if hit:
+                cached += estimate_prompt_tokens([message])
+        return cached
+
+    def admit(self):
+        """(remaining requests this minute, seconds until a slot frees) or None if over"""
+        limit = self.config.rpm_limit
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and self._recent[0] <= now - 60:
+                self._recent.popleft()
+            reset = 60 - (now - self._recent[0]) if self._recent else 60.0
+            if limit and len(self._recent) >= limit:
+                return None, reset
+            self._recent.append(now)
+            remaining = limit - len(self._recent) if limit else 14400
+            return remaining, reset
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake: FakeGroqServer = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        fake, config = self.fake, self.fake.config
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        fake.count("requests")
+
+        remaining, reset = fake.admit()
+        if remaining is None:
+            fake.count("rate_limited")
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                {
+                    "retry-after": f"{reset:.2f}",
+                    "x-ratelimit-remaining-requests": "0",
+                    "x-ratelimit-reset-requests": f"{reset:.2f}s",
+                },
+            )
+            return
+        rate_headers = {
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{reset:.2f}s",
+        }
+
+        model = body.get("model", "")
+        fake.count(f"model:{model}")
+        ttft = config.model_latency.get(model, config.sample_latency)()
+        error_rate = config.model_error_rate.get(model, config.error_rate)
+        if error_rate and random.random() < error_rate:
+            status = random.choice(config.error_statuses)
+            fake.count(f"injected_{status}")
+            time.sleep(ttft / 2)
+            headers = {"retry-after": "1"} if status == 429 else {}
+            self._send_json(status, {"error": {"message": "Injected failure"}}, headers)
+            return
+
+        tools = body.get("tools") or []
+        name = tools[0]["function"]["name"] if tools else "RefinementResult"
+        # Instructor's partial streaming models are named Partial<Model>
+        payload = PAYLOADS.get(name.removeprefix("Partial"), {})
+        if config.invalid_rate and random.random() < config.invalid_rate:
+            # Drop a required field so the output fails schema validation
+            fake.count("injected_invalid")
+            payload = dict(list(payload.items())[1:])
+        elif config.repairable_rate and random.random() < config.repairable_rate:
+            fake.count("injected_repairable")
+            payload = repairable(payload)
+        arguments = json.dumps(payload)
+        prompt_tokens = estimate_prompt_tokens(body.get("messages", []))
+        cached_tokens = fake.cached_prompt_tokens(tools, body.get("messages", []))
+        completion_tokens = max(1, len(arguments) // 4)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        fake.count("prompt_tokens", prompt_tokens)
+        fake.count("cached_tokens", cached_tokens)
+        if config.prefill_tokens_per_second:
+            ttft += (prompt_tokens - cached_tokens) / config.prefill_tokens_per_second
+        fake.count("completion_tokens", completion_tokens)
+        generation_seconds = completion_tokens / config.tokens_per_second
+
+        time.sleep(ttft)
+        if body.get("stream"):
+            self._stream(
+                body["model"], name, arguments, usage, generation_seconds, rate_headers
+            )
+            return
+
+        time.sleep(generation_seconds)
+        message = {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": "call_0",
+                    "type": "function",
+                    "function": {"name": name, "arguments": arguments},
+                }
+            ],
+        }
+        self._send_json(
+            200,
+            {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [
+                    {"index": 0, "message": message, "finish_reason": "tool_calls"}
+                ],
+                "usage": usage,
+            },
+            rate_headers,
+        )
+
+    def _stream(self, model, name, arguments, usage, generation_seconds, headers):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+
+        def write(chunk: dict):
+            data = f"data: {json.dumps(chunk)}\n\n".encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+        def delta(payload: dict, finish_reason=None, **extra) -> dict:
+            return {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": payload, "finish_reason": finish_reason}
+                ],
+                **extra,
+            }
+
+        # Roughly four characters (one token) per chunk, paced at the token rate
+        step = 16
+        pieces = [arguments[i : i + step] for i in range(0, len(arguments), step)]
+        pause = generation_seconds / max(1, len(pieces))
+        for index, piece in enumerate(pieces):
+            call = {"index": 0, "function": {"arguments": piece}}
+            if index == 0:
+                call.update(id="call_0", type="function")
+                call["function"]["name"] = name
+            write(delta({"role": "assistant", "tool_calls": [call]}))
+            time.sleep(pause)
+        write(delta({}, "tool_calls", x_groq={"usage": usage}))
+        data = b"data: [DONE]\n\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Fake server options, shared with the load test"""
+    parser.add_argument(
+        "--latency",
+        default="lognormal:0.5:0.4",
+        help="time-to-first-token distribution (default lognormal:0.5:0.4)",
+    )
+    parser.add_argument("--tokens-per-second", type=float, default=500.0)
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="fraction of requests that fail (default 0)",
+    )
+    parser.add_argument("--error-statuses", default="429,500,503")
+    parser.add_argument(
+        "--rpm-limit",
+        type=int,
+        default=0,
+        help="requests per minute before 429s (default unlimited)",
+    )
+    parser.add_argument(
+        "--prefill-tokens-per-second",
+        type=float,
+        default=0.0,
+        help="prefill speed for uncached prompt tokens (default 0, no prefill)",
+    )
+    parser.add_argument(
+        "--invalid-rate",
+        type=float,
+        default=0.0,
+        help="fraction of responses missing a required field (default 0)",
+    )
+    parser.add_argument(
+        "--repairable-rate",
+        type=float,
+        default=0.0,
+        help="fraction of responses breaking limits that repair.py can fix "
+        "(default 0)",
+    )
+    parser.add_argument(
+        "--model-latency",
+        action="append",
+        default=[],
+        metavar="MODEL=SPEC",
+        help="latency spec for one model (repeatable)",
+    )
+    parser.add_argument(
+        "--model-error-rate",
+        action="append",
+        default=[],
+        metavar="MODEL=RATE",
+        help="error rate for one model (repeatable)",
+    )
+
+
+def config_from_args(args) -> FakeGroqConfig:
+    return FakeGroqConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(s) for s in args.error_statuses.split(",")),
+        rpm_limit=args.rpm_limit,
+        prefill_tokens_per_second=args.prefill_tokens_per_second,
+        invalid_rate=args.invalid_rate,
+        repairable_rate=args.repairable_rate,
+        model_latency=dict(item.split("=", 1) for item in args.model_latency),
+        model_error_rate={
+            model: float(rate)
+            for model, rate in (item.split("=", 1) for item in args.model_error_rate)
+        },
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeGroqServer(config_from_args(args), args.host, args.port)
+    print(f"Fake Groq listening on {server.url} (latency {args.latency})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
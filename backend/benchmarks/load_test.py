@@ -0,0 +1,241 @@
+"""
+Offline load test for the Eureka API
+
+Starts a fake Groq server (benchmarks.fake_groq) and the Flask app in this
+process, then drives an endpoint at a fixed concurrency and reports
+throughput, latency percentiles, per-stage LLM timings and memory.
+
+    python -m benchmarks.load_test --endpoint refine --requests 500 --concurrency 32
+    python -m benchmarks.load_test --endpoint plan --latency lognormal:0.8:0.6 \\
+        --error-rate 0.05 --fail-p99-ms 8000
+
+To measure a real deployment (e.g. gunicorn with several workers), point it
+at a fake server and pass the URL and the master pid:
+
+    python -m benchmarks.fake_groq --port 8099 &
+    GROQ_BASE_URL=http://127.0.0.1:8099 GROQ_API_KEY=fake gunicorn -w 4 app:app &
+    python -m benchmarks.load_test --target http://127.0.0.1:8000 --server-pid <pid>
+
+Exits non-zero when --fail-p99-ms or --fail-error-rate is exceeded, so it
+can gate a deploy.
+"""
+
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import httpx
+
+from benchmarks.bench_semantic_cache import percentile, synthetic_topics
+from benchmarks.fake_groq import FakeGroqServer, add_arguments, config_from_args
+
+ENDPOINTS = {
+    "refine": ("/api/refine", False),
+    "refine-stream": ("/api/refine/stream", True),
+    "plan": ("/api/agents/plan", False),
+    "plan-stream": ("/api/agents/plan/stream", True),
+}
+
+
+def _payload(endpoint: str, topic: str) -> dict:
+    if endpoint.startswith("plan"):
+        return {
+            "topic": topic,
+            "user_idea": f"A marketplace that makes {topic} simple",
+            "constraints": "Two engineers, twelve weeks",
+        }
+    return {"topic": topic}
+
+
+def start_local_app(groq_url: str) -> str:
+    """Import the Flask app against groq_url and serve it on a free port"""
+    from werkzeug.serving import make_server
+
+    # One access log line per request would dominate the report
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    os.environ["GROQ_BASE_URL"] = groq_url
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    from app import app
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def memory_per_worker(pid: int) -> dict:
+    """Resident memory in MiB of pid and its child processes (workers)"""
+    try:
+        import psutil
+    except ImportError:
+        import resource
+
+        # Peak RSS of this process only; KiB on Linux
+        return {os.getpid(): resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+    process = psutil.Process(pid)
+    processes = [process] + process.children(recursive=True)
+    return {p.pid: p.memory_info().rss / 2**20 for p in processes}
+
+
+def run_load(
+    base_url: str, endpoint: str, requests: int, concurrency: int, unique: float
+) -> dict:
+    path, streaming = ENDPOINTS[endpoint]
+    # unique < 1 repeats topics so response caches get exercised
+    distinct = max(1, int(requests * unique))
+    topics = synthetic_topics(distinct, seed=int(time.time()))
+    topics = [topics[i % distinct] for i in range(requests)]
+
+    latencies, first_event, statuses = [], [], Counter()
+    lock = threading.Lock()
+    client = httpx.Client(
+        base_url=base_url,
+        timeout=300.0,
+        limits=httpx.Limits(max_connections=concurrency),
+    )
+
+    def one(topic: str):
+        started = time.perf_counter()
+        first = None
+        try:
+            if streaming:
+                with client.stream("POST", path, json=_payload(endpoint, topic)) as r:
+                    status = r.status_code
+                    for line in r.iter_lines():
+                        if first is None and line.startswith("event:"):
+                            first = time.perf_counter() - started
+                        if line == "event: error":
+                            status = "stream_error"
+            else:
+                status = client.post(path, json=_payload(endpoint, topic)).status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+        with lock:
+            statuses[status] += 1
+            latencies.append(elapsed * 1000)
+            if first is not None:
+                first_event.append(first * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, topics))
+    wall_seconds = time.perf_counter() - started
+
+    try:
+        stats = client.get("/api/stats").json()
+    except (httpx.HTTPError, ValueError):
+        stats = {}
+    client.close()
+
+    errors = requests - statuses.get(200, 0)
+    return {
+        "endpoint": endpoint,
+        "requests": requests,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(requests / wall_seconds, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p90_ms": round(percentile(latencies, 90), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(max(latencies), 1),
+        "first_event_p50_ms": (
+            round(percentile(first_event, 50), 1) if first_event else None
+        ),
+        "error_rate": round(errors / requests, 4),
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "stages": stats.get("llm", {}).get("stages", {}),
+        "caches": stats.get("caches", {}),
+    }
+
+
+def print_report(report: dict):
+    print(f"endpoint           {report['endpoint']}")
+    print(
+        f"requests           {report['requests']} at concurrency {report['concurrency']}"
+    )
+    print(f"wall time          {report['wall_seconds']:.2f} s")
+    print(f"throughput         {report['throughput_rps']:.2f} req/s")
+    print(
+        f"latency            p50 {report['p50_ms']:.0f} ms  p90 {report['p90_ms']:.0f} ms"
+        f"  p99 {report['p99_ms']:.0f} ms  max {report['max_ms']:.0f} ms"
+    )
+    if report["first_event_p50_ms"] is not None:
+        print(f"first event p50    {report['first_event_p50_ms']:.0f} ms")
+    print(f"error rate         {report['error_rate']:.2%}  {report['statuses']}")
+    for stage, stats in report["stages"].items():
+        print(
+            f"  stage {stage:<26} calls {stats.get('calls', 0):<6}"
+            f" p50 {stats.get('p50_seconds', 0) * 1000:.0f} ms"
+            f"  p95 {stats.get('p95_seconds', 0) * 1000:.0f} ms"
+            f"  retries {stats.get('retries', 0)}"
+            f"  tokens in {stats.get('input_tokens', 0)} out {stats.get('output_tokens', 0)}"
+            f"  cached {stats.get('cached_token_ratio', 0):.0%}"
+        )
+    for pid, rss in report.get("memory_mib", {}).items():
+        print(f"  rss pid {pid:<24} {rss:.1f} MiB")
+    if "fake_groq" in report:
+        print(f"fake groq          {report['fake_groq']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="refine")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--unique",
+        type=float,
+        default=1.0,
+        help="fraction of distinct topics; below 1 exercises the caches",
+    )
+    parser.add_argument("--target", help="base URL of an already running API")
+    parser.add_argument("--server-pid", type=int, help="pid to report memory for")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--fail-p99-ms", type=float)
+    parser.add_argument("--fail-error-rate", type=float)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    fake = None
+    if args.target:
+        base_url = args.target
+    else:
+        fake = FakeGroqServer(config_from_args(args)).start()
+        base_url = start_local_app(fake.url)
+
+    report = run_load(
+        base_url, args.endpoint, args.requests, args.concurrency, args.unique
+    )
+    report["memory_mib"] = memory_per_worker(args.server_pid or os.getpid())
+    if fake is not None:
+        report["fake_groq"] = dict(fake.counts)
+        fake.stop()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if args.fail_p99_ms is not None and report["p99_ms"] > args.fail_p99_ms:
+        print(f"FAIL: p99 {report['p99_ms']:.0f} ms > {args.fail_p99_ms:.0f} ms")
+        failed = True
+    if args.fail_error_rate is not None and report["error_rate"] > args.fail_error_rate:
+        print(
+            f"FAIL: error rate {report['error_rate']:.2%} > {args.fail_error_rate:.2%}"
+        )
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+Response cache for Eureka's LLM endpoints
+
+Two tiers:
+    - an in-memory LRU per process, with TTL eviction
+    - an optional SQLite file (EUREKA_CACHE_DB) shared by every worker process
+
+Concurrent misses for the same key are coalesced (single-flight): one caller
+runs the LLM call and the others wait for its result.
+
+Configuration (environment):
+    EUREKA_CACHE              "0" disables caching (default "1")
+    EUREKA_CACHE_MAX_ENTRIES  in-memory entries per cache (default 1024)
+    EUREKA_CACHE_TTL          seconds an entry stays valid (default 3600)
+    EUREKA_CACHE_DB           path of the shared SQLite file (default: none)
+"""
+
+import asyncio
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import metrics
+
+
+def normalize_text(value) -> str:
+    """Case- and whitespace-insensitive form of a request field"""
+    if not isinstance(value, str):
+        return value
+    return " ".join(value.split()).casefold()
+
+
+def cache_key(namespace: str, fields: dict, **settings) -> str:
+    """
+    Stable key for a request: the normalized request fields plus the settings
+    that change the output (model, temperature, prompt version, ...)
+    """
+    payload = {
+        "namespace": namespace,
+        "fields": {name: normalize_text(value) for name, value in fields.items()},
+        "settings": settings,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """One in-progress computation that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+# Result of an async flight whose leader was cancelled; its followers retry
+_ABANDONED = object()
+
+
+class _SQLiteTier:
+    """Shared on-disk tier; one connection per thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str):
+        row = (
+            self._connect()
+            .execute(
+                "SELECT value, expires_at FROM response_cache"
+                " WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None, None
+        value, expires_at = row
+        if expires_at <= time.time():
+            self.delete(namespace, key)
+            return None, None
+        return json.loads(value), expires_at
+
+    def set(self, namespace: str, key: str, value, expires_at: float):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, separators=(",", ":")), expires_at),
+        )
+
+    def delete(self, namespace: str, key: str):
+        self._connect().execute(
+            "DELETE FROM response_cache WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        )
+
+    def clear(self, namespace: str):
+        self._connect().execute(
+            "DELETE FROM response_cache WHERE namespace = ?", (namespace,)
+        )
+
+    def purge_expired(self):
+        self._connect().execute(
+            "DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),)
+        )
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of JSON-serializable responses, with an optional shared
+    SQLite tier and single-flight coalescing of concurrent misses
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 1024,
+        ttl: float = 3600.0,
+        db_path: Optional[str] = None,
+        enabled: bool = True,
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._disk = _SQLiteTier(db_path) if db_path else None
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._inflight: dict = {}
+        self._ainflight: dict = {}
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+        metrics.count_cache(self.namespace, stat)
+
+    def _store_memory(self, key: str, value, expires_at: float):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+                metrics.count_cache(self.namespace, "evictions")
+
+    def _lookup(self, key: str):
+        """Return (found, value) without touching the miss counter"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    metrics.count_cache(self.namespace, "memory_hits")
+                    return True, value
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                metrics.count_cache(self.namespace, "expirations")
+
+        if self._disk is not None:
+            value, expires_at = self._disk.get(self.namespace, key)
+            if expires_at is not None:
+                # Promote into this process's memory tier
+                self._store_memory(key, value, expires_at)
+                self._count("disk_hits")
+                return True, value
+
+        return False, None
+
+    def get(self, key: str):
+        """Cached value for key, or None"""
+        if not self.enabled:
+            return None
+        found, value = self._lookup(key)
+        if not found:
+            self._count("misses")
+        return value
+
+    def set(self, key: str, value):
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl
+        self._store_memory(key, value, expires_at)
+        if self._disk is not None:
+            self._disk.set(self.namespace, key, value, expires_at)
+
+    def get_or_compute(self, key: str, compute):
+        """
+        Return the cached value for key, or compute(), store and return it.
+        Concurrent callers with the same key share a single compute() call.
+        """
+        if not self.enabled:
+            return compute()
+
+        found, value = self._lookup(key)
+        if found:
+            return value
+
+        with self._lock:
+            # A leader may have stored the value since the lookup above
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._stats["memory_hits"] += 1
+                metrics.count_cache(self.namespace, "memory_hits")
+                return entry[0]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+            metrics.count_cache(self.namespace, "misses" if leader else "coalesced")
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            self.set(key, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    async def aget_or_compute(self, key: str, compute):
+        """
+        Async variant of get_or_compute(); compute is a coroutine function.
+        Coalesces concurrent callers on the same event loop; when the leading
+        caller is cancelled, a waiting one runs compute() instead.
+        """
+        if not self.enabled:
+            return await compute()
+
+        while True:
+            found, value = self._lookup(key)
+            if found:
+                return value
+
+            future = self._ainflight.get(key)
+            if future is None:
+                break
+            self._count("coalesced")
+            value = await asyncio.shield(future)
+            if value is not _ABANDONED:
+                return value
+            # The leader was cancelled: look again, and lead if nobody does
+
+        self._count("misses")
+        future = self._ainflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await compute()
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            # The leader's client went away, not the computation failing
+            future.set_result(_ABANDONED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited future does not log a warning
+            future.exception()
+            raise
+        finally:
+            del self._ainflight[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear(self.namespace)
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_, exp) in self._entries.items() if exp <= now]
+            for key in expired:
+                del self._entries[key]
+            self._stats["expirations"] += len(expired)
+        if self._disk is not None:
+            self._disk.purge_expired()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["in_flight"] = len(self._inflight) + len(self._ainflight)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["enabled"] = self.enabled
+        stats["disk"] = self._disk is not None
+        return stats
+
+
+_caches: dict = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str) -> ResponseCache:
+    """Process-wide cache for a namespace, configured from the environment"""
+    cache = _caches.get(namespace)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(namespace)
+            if cache is None:
+                cache = _caches[namespace] = ResponseCache(
+                    namespace,
+                    max_entries=int(os.getenv("EUREKA_CACHE_MAX_ENTRIES", "1024")),
+                    ttl=float(os.getenv("EUREKA_CACHE_TTL", "3600")),
+                    db_path=os.getenv("EUREKA_CACHE_DB") or None,
+                    enabled=os.getenv("EUREKA_CACHE", "1") == "1",
+                )
+    return cache
+
+
+def all_stats() -> dict:
+    """Hit/miss statistics for every cache in this process"""
+    return {namespace: cache.stats() for namespace, cache in sorted(_caches.items())}
@@ -0,0 +1,301 @@
+"""
+Record/replay transport for Groq HTTP traffic
+
+The shared httpx clients in clients.py send every Groq request (Instructor,
+the raw Groq client and ChatGroq alike) through a CassetteTransport. When a
+cassette mode is set, responses are recorded to a gzip-compressed JSON-lines
+file keyed by a hash of the request, and replayed from it on later runs, so
+CI and profiling runs exercise the full pipeline without network access.
+
+Configuration (environment):
+    EUREKA_CASSETTE         "record" forwards every request and records it;
+                            "replay" serves recorded responses and records
+                            misses; unset or "off" disables the transport
+    EUREKA_CASSETTE_PATH    cassette file (default cassettes/groq.jsonl.gz)
+    EUREKA_CASSETTE_STRICT  "1" makes a replay miss raise CassetteMissError
+                            instead of reaching the network (default "0")
+
+The request hash covers the method, URL path and canonical JSON body, not the
+host or headers, so a cassette recorded against Groq replays against any base
+URL and never stores the API key.
+
+Response bodies are recorded as the chunks they arrived in, and passed on
+to the caller chunk by chunk while recording, so streamed (SSE) responses
+are delivered incrementally in both modes. Replay keeps the chunk
+boundaries but not the delays between chunks.
+
+backend/tests runs the refine and plan endpoints against the cassette in
+tests/cassettes in strict replay mode.
+"""
+
+import codecs
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+import httpx
+
+# Response headers worth keeping; everything else is per-request noise
+_KEPT_HEADERS = ("content-type",)
+
+
+class CassetteMissError(Exception):
+    """A strict replay found no recorded response for a request"""
+
+
+def request_key(request: httpx.Request) -> str:
+    """Stable hash of a request's method, path and JSON body"""
+    body = request.content
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+    except (ValueError, UnicodeDecodeError):
+        body = body.decode("latin-1")
+    payload = f"{request.method} {request.url.path}\n{body}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Recorded responses by request key, appended to a gzip JSON-lines file"""
+
+    def __init__(self, path: str, mode: str = "replay", strict: bool = False):
+        self.path = path
+        self.mode = mode
+        self.strict = strict
+        self._lock = threading.Lock()
+        self._entries: dict = {}
+        self._stats = {"hits": 0, "misses": 0, "recorded": 0}
+        if os.path.exists(path):
+            # Concatenated gzip members read back as one stream
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry
+
+    def lookup(self, request: httpx.Request):
+        """Recorded httpx.Response for request, or None"""
+        if self.mode != "replay":
+            return None
+        entry = self._entries.get(request_key(request))
+        with self._lock:
+            self._stats["hits" if entry is not None else "misses"] += 1
+        if entry is None:
+            if self.strict:
+                raise CassetteMissError(
+                    f"No recorded response for {request.method} {request.url.path}"
+                    f" in {self.path}"
+                )
+            return None
+        # Entries recorded before chunks were kept hold a single body
+        chunks = entry["chunks"] if "chunks" in entry else [entry["body"]]
+        return httpx.Response(
+            entry["status"],
+            headers=entry["headers"],
+            stream=_ReplayStream([chunk.encode("utf-8") for chunk in chunks]),
+            request=request,
+        )
+
+    def record(self, request: httpx.Request, response: httpx.Response, chunks: list):
+        """Store a response whose decoded body arrived as chunks (text)"""
+        entry = {
+            "key": request_key(request),
+            "status": response.status_code,
+            "headers": {
+                name: response.headers[name]
+                for name in _KEPT_HEADERS
+                if name in response.headers
+            },
+            "chunks": chunks,
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            self._stats["recorded"] += 1
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(
+            mode=self.mode, strict=self.strict, path=self.path, size=len(self._entries)
+        )
+        return stats
+
+
+class _ReplayStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """A recorded body, yielded chunk by chunk"""
+
+    def __init__(self, chunks: list):
+        self._chunks = chunks
+
+    def __iter__(self):
+        yield from self._chunks
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+class _Recorder:
+    """Decoded chunks of a response being passed through, as text"""
+
+    def __init__(self, cassette: Cassette, request, response):
+        self._cassette = cassette
+        self._request = request
+        self._response = response
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._chunks: list = []
+
+    def add(self, chunk: bytes):
+        text = self._decoder.decode(chunk)
+        if text:
+            self._chunks.append(text)
+
+    def finish(self):
+        """Record the response; only called once its body was fully read"""
+        tail = self._decoder.decode(b"", final=True)
+        if tail:
+            self._chunks.append(tail)
+        self._cassette.record(self._request, self._response, self._chunks)
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    """The decoded body of response, recorded while the caller reads it"""
+
+    def __init__(self, response: httpx.Response, recorder: _Recorder):
+        self._response = response
+        self._recorder = recorder
+
+    def __iter__(self):
+        for chunk in self._response.iter_bytes():
+            self._recorder.add(chunk)
+            yield chunk
+        self._recorder.finish()
+
+    def close(self):
+        self._response.close()
+
+
+class _AsyncRecordingStream(httpx.AsyncByteStream):
+    """Async variant of _RecordingStream"""
+
+    def __init__(self, response: httpx.Response, recorder: _Recorder):
+        self._response = response
+        self._recorder = recorder
+
+    async def __aiter__(self):
+        async for chunk in self._response.aiter_bytes():
+            self._recorder.add(chunk)
+            yield chunk
+        self._recorder.finish()
+
+    async def aclose(self):
+        await self._response.aclose()
+
+
+def _passed_through(response: httpx.Response, request: httpx.Request, stream):
+    """
+    response with its body replaced by stream (decoded), without the
+    transfer headers that no longer match it
+    """
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name.lower()
+        not in ("content-encoding", "content-length", "transfer-encoding")
+    }
+    return httpx.Response(
+        response.status_code,
+        headers=headers,
+        stream=stream,
+        request=request,
+        extensions=response.extensions,
+    )
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """httpx transport that replays from / records to a Cassette"""
+
+    def __init__(self, transport: httpx.BaseTransport, cassette: Cassette):
+        self._transport = transport
+        self.cassette = cassette
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        replayed = self.cassette.lookup(request)
+        if replayed is not None:
+            return replayed
+        response = self._transport.handle_request(request)
+        response.request = request
+        recorder = _Recorder(self.cassette, request, response)
+        return _passed_through(response, request, _RecordingStream(response, recorder))
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """Async variant of CassetteTransport"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cassette: Cassette):
+        self._transport = transport
+        self.cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        replayed = self.cassette.lookup(request)
+        if replayed is not None:
+            return replayed
+        response = await self._transport.handle_async_request(request)
+        response.request = request
+        recorder = _Recorder(self.cassette, request, response)
+        return _passed_through(
+            response, request, _AsyncRecordingStream(response, recorder)
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """Process-wide Cassette from the environment, or None when disabled"""
+    global _cassette
+    mode = os.getenv("EUREKA_CASSETTE", "off")
+    if mode not in ("record", "replay"):
+        return None
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(
+                    os.getenv("EUREKA_CASSETTE_PATH", "cassettes/groq.jsonl.gz"),
+                    mode=mode,
+                    strict=os.getenv("EUREKA_CASSETTE_STRICT", "0") == "1",
+                )
+    return _cassette
+
+
+def wrap_transport(transport: httpx.BaseTransport) -> httpx.BaseTransport:
+    cassette = get_cassette()
+    return transport if cassette is None else CassetteTransport(transport, cassette)
+
+
+def wrap_async_transport(
+    transport: httpx.AsyncBaseTransport,
+) -> httpx.AsyncBaseTransport:
+    cassette = get_cassette()
+    if cassette is None:
+        return transport
+    return AsyncCassetteTransport(transport, cassette)
+
+
+def stats():
+    cassette = get_cassette()
+    return cassette.stats() if cassette is not None else None
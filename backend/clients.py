@@ -0,0 +1,241 @@
+"""
+Shared LLM clients for Eureka
+
+Every client in here is built once per process and reused by all requests, so
+HTTP keep-alive connections (and their TLS sessions) survive between calls.
+"""
+
+from collections import Counter
+import os
+import threading
+
+import httpx
+
+import cassette
+import resilience
+import tracing
+
+DEFAULT_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+
+_lock = threading.RLock()
+_registry: dict = {}
+_created: Counter = Counter()
+_reused: Counter = Counter()
+
+
+def get_or_create(kind: str, key, factory):
+    """
+    Return the shared object registered under (kind, key), building it with
+    factory() on first use. Safe to call from any thread.
+    """
+    registry_key = (kind, key)
+    obj = _registry.get(registry_key)
+    if obj is not None:
+        _reused[kind] += 1
+        return obj
+
+    with _lock:
+        obj = _registry.get(registry_key)
+        if obj is None:
+            obj = factory()
+            _registry[registry_key] = obj
+            _created[kind] += 1
+        else:
+            _reused[kind] += 1
+        return obj
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("EUREKA_HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("EUREKA_HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("EUREKA_HTTP_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(float(os.getenv("EUREKA_HTTP_TIMEOUT", "60")), connect=5.0)
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Process-wide connection-pooled HTTP client shared by every Groq client;
+    requests go through the cassette transport when EUREKA_CASSETTE is set
+    """
+    return get_or_create(
+        "http_client",
+        "default",
+        lambda: httpx.Client(
+            transport=cassette.wrap_transport(
+                httpx.HTTPTransport(limits=_pool_limits())
+            ),
+            timeout=_timeout(),
+            event_hooks={"response": [resilience.observe_response]},
+        ),
+    )
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Process-wide connection-pooled HTTP client for the async serving path"""
+    return get_or_create(
+        "async_http_client",
+        "default",
+        lambda: httpx.AsyncClient(
+            transport=cassette.wrap_async_transport(
+                httpx.AsyncHTTPTransport(limits=_pool_limits())
+            ),
+            timeout=_timeout(),
+            event_hooks={"response": [resilience.aobserve_response]},
+        ),
+    )
+
+
+def get_groq_client():
+    """Shared synchronous Groq client"""
+    from groq import Groq
+
+    tracing.init()
+
+    return get_or_create(
+        "groq",
+        "sync",
+        lambda: Groq(
+            api_key=os.getenv("GROQ_API_KEY"),
+            http_client=get_http_client(),
+            # Retries are handled by resilience.call()
+            max_retries=0,
+        ),
+    )
+
+
+def get_instructor_client():
+    """Shared Instructor client wrapping the shared Groq client"""
+    import instructor
+
+    return get_or_create(
+        "instructor",
+        "sync",
+        lambda: instructor.from_groq(get_groq_client()),
+    )
+
+
+def get_async_groq_client():
+    """Shared asynchronous Groq client"""
+    from groq import AsyncGroq
+
+    tracing.init()
+
+    return get_or_create(
+        "groq",
+        "async",
+        lambda: AsyncGroq(
+            api_key=os.getenv("GROQ_API_KEY"),
+            http_client=get_async_http_client(),
+            max_retries=0,
+        ),
+    )
+
+
+def get_async_instructor_client():
+    """Shared async Instructor client wrapping the shared AsyncGroq client"""
+    import instructor
+
+    return get_or_create(
+        "instructor",
+        "async",
+        lambda: instructor.from_groq(get_async_groq_client()),
+    )
+
+
+def get_chat_model(model: str = DEFAULT_MODEL, temperature: float = 0.7):
+    """Shared ChatGroq model for a (model, temperature) pair"""
+    from langchain_groq import ChatGroq
+
+    def factory():
+        return ChatGroq(
+            model=model,
+            temperature=temperature,
+            client=get_groq_client().chat.completions,
+            async_client=get_async_groq_client().chat.completions,
+        )
+
+    return get_or_create("chat_model", (model, temperature), factory)
+
+
+def get_structured_llm(schema, model: str = DEFAULT_MODEL, temperature: float = 0.7):
+    """Shared ChatGroq model with a structured output binding for schema"""
+    return get_or_create(
+        "structured_llm",
+        (schema, model, temperature),
+        lambda: get_chat_model(model, temperature).with_structured_output(schema),
+    )
+
+
+def get_streaming_structured_llm(
+    schema, model: str = DEFAULT_MODEL, temperature: float = 0.7
+):
+    """
+    Shared ChatGroq model bound to schema as a tool whose stream() yields the
+    arguments as growing partial dicts. Validate the final value against
+    schema yourself.
+    """
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    return get_or_create(
+        "streaming_structured_llm",
+        (schema, model, temperature),
+        lambda: get_chat_model(model, temperature).with_structured_output(
+            convert_to_openai_tool(schema)
+        ),
+    )
+
+
+def stats() -> dict:
+    """Created/reused counters per client kind"""
+    kinds = set(_created) | set(_reused)
+    return {
+        kind: {"created": _created[kind], "reused": _reused[kind]}
+        for kind in sorted(kinds)
+    }
+
+
+def reset():
+    """
+    Drop every shared client and close the pooled HTTP connections.
+    Call this in a freshly forked worker so connections are never shared
+    across processes.
+    """
+    with _lock:
+        http_client = _registry.get(("http_client", "default"))
+        _registry.clear()
+        _created.clear()
+        _reused.clear()
+    if http_client is not None:
+        http_client.close()
+
+
+# Kinds holding pooled connections (directly or through a wrapped client) or
+# worker threads, neither of which survives a fork
+_PER_PROCESS_KINDS = {
+    "http_client",
+    "async_http_client",
+    "groq",
+    "instructor",
+    "chat_model",
+    "structured_llm",
+    "streaming_structured_llm",
+    "job_manager",
+    "result_store",
+}
+
+
+def after_fork():
+    """
+    Drop the shared clients inherited from a preloading parent (see
+    gunicorn.conf.py) without closing them, so the worker opens its own
+    connections while the parent's sockets stay untouched. The compiled
+    workflow and the other prewarmed objects are kept.
+    """
+    with _lock:
+        for registry_key in [k for k in _registry if k[0] in _PER_PROCESS_KINDS]:
+            del _registry[registry_key]
@@ -0,0 +1,139 @@
+"""
+Compact encoding of plan responses
+
+A plan result holds master_prompt and strategic_roadmap, then the same
+content again in its agent messages. With ?compact=1 on /api/agents/plan,
+/api/agents/plan/jobs/<id>, /api/plans/<id> and /api/refinements/<id> the
+response is sent:
+
+    - with each message's repeated content replaced by a "ref" naming the
+      result field(s) it equals: {"agent": "strategist", "ref": "master_prompt"},
+      or a list of fields when the content is several of them, as for the
+      fast planner; expand_messages() restores the full form
+    - serialized with orjson instead of the standard library encoder
+    - compressed with brotli (when the brotli package is installed) or gzip,
+      whichever the client's Accept-Encoding prefers; small bodies are sent
+      as they are
+
+Responses without the parameter are unchanged.
+
+Configuration (environment):
+    EUREKA_COMPRESS_MIN_BYTES  bodies smaller than this are not compressed
+                               (default 1024)
+    EUREKA_GZIP_LEVEL          gzip level (default 6)
+    EUREKA_BROTLI_QUALITY      brotli quality (default 5)
+"""
+
+import gzip
+import os
+from typing import Optional
+
+import orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def requested(value: Optional[str]) -> bool:
+    """Whether a request's compact parameter asks for compact mode"""
+    return (value or "").lower() in ("1", "true", "yes")
+
+
+def dedupe_messages(result: dict) -> dict:
+    """result with message content that repeats result fields made a ref"""
+    messages = result.get("messages")
+    if not messages:
+        return result
+    fields = {name: value for name, value in result.items() if name != "messages"}
+    compacted = []
+    for message in messages:
+        ref = _ref(message.get("content"), fields)
+        if ref is None:
+            compacted.append(message)
+        else:
+            message = dict(message)
+            del message["content"]
+            message["ref"] = ref
+            compacted.append(message)
+    return {**result, "messages": compacted}
+
+
+def _ref(content, fields: dict):
+    """The field name, or list of names, content is a copy of; else None"""
+    if not isinstance(content, dict) or not content:
+        return None
+    for name, value in fields.items():
+        if content == value:
+            return name
+    if all(name in fields and fields[name] == value for name, value in content.items()):
+        return list(content)
+    return None
+
+
+def expand_messages(result: dict) -> dict:
+    """Inverse of dedupe_messages(): the result as a full response carries it"""
+    messages = []
+    for message in result.get("messages") or []:
+        ref = message.get("ref")
+        if ref is not None:
+            message = {name: value for name, value in message.items() if name != "ref"}
+            message["content"] = (
+                result[ref]
+                if isinstance(ref, str)
+                else {name: result[name] for name in ref}
+            )
+        messages.append(message)
+    return {**result, "messages": messages}
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    "br" or "gzip", the available encoding the Accept-Encoding header ranks
+    highest (brotli on ties), or None for an uncompressed body
+    """
+    ranked = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            ranked[coding] = quality
+    candidates = [
+        (ranked.get(coding, ranked.get("*", 0.0)), preference, coding)
+        for preference, coding in ((1, "br"), (0, "gzip"))
+        if coding != "br" or brotli is not None
+    ]
+    quality, _, coding = max(candidates)
+    return coding if quality > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(
+            body, quality=int(os.getenv("EUREKA_BROTLI_QUALITY", "5"))
+        )
+    return gzip.compress(
+        body, compresslevel=int(os.getenv("EUREKA_GZIP_LEVEL", "6")), mtime=0
+    )
+
+
+def encode(payload, accept_encoding: Optional[str]) -> tuple:
+    """
+    (body, headers) of a compact response; headers carry Content-Encoding
+    when the body was compressed
+    """
+    body = orjson.dumps(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate(accept_encoding)
+    if encoding and len(body) >= int(os.getenv("EUREKA_COMPRESS_MIN_BYTES", "1024")):
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return body, headers
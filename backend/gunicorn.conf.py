@@ -0,0 +1,64 @@
+"""
+Gunicorn settings for the Flask app
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is imported once in the master before forking (preload_app), and
+with EUREKA_PREWARM=1 that import also builds the shared clients and compiles
+the agent workflow. Workers therefore start with every module already loaded
+and share those pages copy-on-write instead of each paying the import and
+compile cost. Pooled connections must not be shared across processes, so
+every worker drops the inherited clients after the fork.
+
+Prometheus metrics (metrics.py) are kept in PROMETHEUS_MULTIPROC_DIR so that
+/metrics on any worker reports all of them; the directory is emptied when
+the server starts and exited workers' gauges are dropped. Planning jobs and
+speculative runs are kept in a SQLite file (EUREKA_JOBS_DB, jobs.py) for the
+same reason: a poll, cancel or claim can land on any worker.
+
+Configuration (environment):
+    EUREKA_BIND       address to listen on (default 0.0.0.0:5000)
+    WEB_CONCURRENCY   worker processes (default 4)
+    EUREKA_THREADS    threads per worker (default 8)
+    EUREKA_PRELOAD    "0" imports the app in each worker instead (default "1")
+    PROMETHEUS_MULTIPROC_DIR  metrics directory (default: a new temporary one)
+    EUREKA_JOBS_DB    shared job file (default: one in a new temporary directory)
+"""
+
+import glob
+import os
+import tempfile
+
+bind = os.getenv("EUREKA_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+threads = int(os.getenv("EUREKA_THREADS", "8"))
+preload_app = os.getenv("EUREKA_PRELOAD", "1") == "1"
+# Plan requests make two LLM calls under a 90 s deadline each
+timeout = 200
+
+# Set before the app (and prometheus_client) is imported
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="eureka-metrics-")
+)
+os.environ.setdefault(
+    "EUREKA_JOBS_DB",
+    os.path.join(tempfile.mkdtemp(prefix="eureka-jobs-"), "jobs.db"),
+)
+
+
+def on_starting(server):
+    # Values left by a previous run would be added to this one's
+    for path in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+        os.remove(path)
+
+
+def post_fork(server, worker):
+    import clients
+
+    clients.after_fork()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
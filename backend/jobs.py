@@ -0,0 +1,447 @@
+"""
+Asynchronous job execution for long-running LLM work
+
+A JobManager runs submitted callables on a bounded thread pool. Clients get a
+job id back immediately and poll (optionally long-polling) for the result,
+instead of holding an HTTP connection for the whole run.
+
+A job runs in the process that accepted it, but with EUREKA_JOBS_DB set its
+state is also kept in a SQLite file shared by every worker process, so a
+poll or cancel that lands on another worker (gunicorn runs several) finds
+it: polls read the shared row, and a cancel sets a flag there that the
+owning worker picks up at the job's next cancellation check. Without it,
+jobs are only visible to the process that accepted them. Queue limits and
+stats are per process either way.
+
+Configuration (environment):
+    EUREKA_JOB_WORKERS     worker threads per process (default 4)
+    EUREKA_JOB_QUEUE_SIZE  maximum queued (not yet running) jobs (default 100)
+    EUREKA_JOB_TTL         seconds a finished job is kept for polling (default 3600)
+    EUREKA_JOBS_DB         path of the shared SQLite file (default: none;
+                           gunicorn.conf.py sets one for its workers)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+CANCELLING = "cancelling"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = {SUCCEEDED, FAILED, CANCELLED}
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at EUREKA_JOB_QUEUE_SIZE"""
+
+
+# Seconds between checks of the shared file for a cancel from another process
+_CANCEL_POLL_INTERVAL = 0.5
+# Seconds between reads of the shared file while long-polling a remote job
+_WAIT_POLL_INTERVAL = 0.25
+
+
+class Job:
+    """One submitted unit of work and its observable state"""
+
+    def __init__(self, params: Optional[dict] = None):
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        # Keyword arguments of the target, kept with a shared job
+        self.params = params or {}
+        self.progress: dict = {}
+        self.cancel_event = threading.Event()
+        self.finished = threading.Event()
+        self.future = None
+        self.taken = False
+        self._on_change = None
+
+    def update_progress(self, **fields):
+        """Merge fields into job.progress, which pollers see"""
+        self.progress.update(fields)
+        if self._on_change is not None:
+            self._on_change(self)
+
+    def to_dict(self) -> dict:
+        job = {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress,
+        }
+        if self.status == SUCCEEDED:
+            job["result"] = self.result
+        if self.error is not None:
+            job["error"] = self.error
+        return job
+
+
+class _SharedCancelEvent(threading.Event):
+    """
+    cancel_event of a shared job: also set once check() finds a cancel
+    recorded by another process, looked up at most every
+    _CANCEL_POLL_INTERVAL seconds
+    """
+
+    def __init__(self, check):
+        super().__init__()
+        self._check = check
+        self._checked_at = 0.0
+
+    def is_set(self) -> bool:
+        if super().is_set():
+            return True
+        now = time.monotonic()
+        if now - self._checked_at >= _CANCEL_POLL_INTERVAL:
+            self._checked_at = now
+            if self._check():
+                self.set()
+        return super().is_set()
+
+
+class _SQLiteJobs:
+    """Job rows of one queue in a file shared by every worker; one connection per thread"""
+
+    def __init__(self, path: str, queue: str):
+        self.path = path
+        self.queue = queue
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                queue TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                params TEXT NOT NULL,
+                progress TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                taken INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (queue, finished_at)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, job: Job):
+        """Write the owning process's view of job"""
+        self._connect().execute(
+            "INSERT INTO jobs (id, queue, status, created_at, started_at,"
+            " finished_at, params, progress, result, error)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (id) DO UPDATE SET"
+            # A cancel from another process outranks the owner's "running"
+            " status = CASE WHEN jobs.cancel_requested AND excluded.status = ?"
+            " THEN ? ELSE excluded.status END,"
+            " started_at = excluded.started_at, finished_at = excluded.finished_at,"
+            " progress = excluded.progress, result = excluded.result,"
+            " error = excluded.error",
+            (
+                job.id,
+                self.queue,
+                job.status,
+                job.created_at,
+                job.started_at,
+                job.finished_at,
+                json.dumps(job.params, separators=(",", ":")),
+                json.dumps(job.progress, separators=(",", ":")),
+                None if job.result is None else json.dumps(job.result),
+                job.error,
+                RUNNING,
+                CANCELLING,
+            ),
+        )
+
+    def load(self, job_id: str) -> Optional[Job]:
+        """Snapshot of a job as its owning process last saved it"""
+        row = (
+            self._connect()
+            .execute(
+                "SELECT status, created_at, started_at, finished_at, params,"
+                " progress, result, error, cancel_requested, taken"
+                " FROM jobs WHERE id = ? AND queue = ?",
+                (job_id, self.queue),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        job = Job(json.loads(row[4]))
+        job.id = job_id
+        job.status, job.created_at, job.started_at, job.finished_at = row[:4]
+        job.progress = json.loads(row[5])
+        job.result = None if row[6] is None else json.loads(row[6])
+        job.error = row[7]
+        job.taken = bool(row[9])
+        if row[8]:
+            job.cancel_event.set()
+        if job.status in FINISHED_STATES:
+            job.finished.set()
+        return job
+
+    def cancel_requested(self, job_id: str) -> bool:
+        row = (
+            self._connect()
+            .execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,))
+            .fetchone()
+        )
+        return bool(row and row[0])
+
+    def request_cancel(self, job_id: str):
+        """Flag an unfinished job for its owning process to cancel"""
+        self._connect().execute(
+            "UPDATE jobs SET cancel_requested = 1, status = ?"
+            " WHERE id = ? AND queue = ? AND finished_at IS NULL",
+            (CANCELLING, job_id, self.queue),
+        )
+
+    def take(self, job_id: str) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE jobs SET taken = 1 WHERE id = ? AND queue = ? AND taken = 0",
+            (job_id, self.queue),
+        )
+        return cursor.rowcount == 1
+
+    def delete_finished(self, cutoff: float):
+        self._connect().execute(
+            "DELETE FROM jobs WHERE queue = ? AND finished_at < ?",
+            (self.queue, cutoff),
+        )
+
+
+class JobManager:
+    """Bounded worker pool with job status tracking, cancellation and TTL cleanup"""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 100,
+        ttl: float = 3600.0,
+        db_path: Optional[str] = None,
+        name: str = "jobs",
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        # Jobs of managers with the same name share rows across processes
+        self._shared = _SQLiteJobs(db_path, name) if db_path else None
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="eureka-job"
+        )
+        self._lock = threading.Lock()
+        self._jobs: dict = {}
+        self._counts = {SUCCEEDED: 0, FAILED: 0, CANCELLED: 0, "rejected": 0}
+        self._started = 0
+        self._wait_seconds_total = 0.0
+        self._run_seconds_total = 0.0
+
+    def _queue_depth(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == QUEUED)
+
+    def submit(self, target, **kwargs) -> Job:
+        """
+        Queue target(job, **kwargs). Its return value becomes the job result;
+        long-running targets should watch job.cancel_event.
+        """
+        self.cleanup()
+        job = Job(kwargs)
+        if self._shared is not None:
+            job.cancel_event = _SharedCancelEvent(lambda: self._cancelled_remotely(job))
+            job._on_change = self._save
+        with self._lock:
+            if self._queue_depth() >= self.max_queue:
+                self._counts["rejected"] += 1
+                raise QueueFullError(
+                    f"Job queue is full ({self.max_queue} jobs waiting)"
+                )
+            self._jobs[job.id] = job
+        self._save(job)
+        job.future = self._executor.submit(self._run, job, target, kwargs)
+        return job
+
+    def _save(self, job: Job):
+        if self._shared is not None:
+            self._shared.save(job)
+
+    def _cancelled_remotely(self, job: Job) -> bool:
+        """Whether another process cancelled job; marks it cancelling if so"""
+        if not self._shared.cancel_requested(job.id):
+            return False
+        with self._lock:
+            if job.status == RUNNING:
+                job.status = CANCELLING
+        return True
+
+    def _run(self, job: Job, target, kwargs: dict):
+        if job.status == QUEUED and job.cancel_event.is_set():
+            # Cancelled from another process while it waited in the queue
+            self._finish(job, CANCELLED)
+            return
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._started += 1
+            self._wait_seconds_total += job.started_at - job.created_at
+        self._save(job)
+
+        status, result, error = SUCCEEDED, None, None
+        try:
+            result = target(job, **kwargs)
+        except Exception as e:
+            status, error = FAILED, str(e)
+        if job.cancel_event.is_set():
+            status, result, error = CANCELLED, None, None
+        self._finish(job, status, result, error)
+
+    def _finish(self, job: Job, status: str, result=None, error=None):
+        with self._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+            self._counts[status] += 1
+            if job.started_at is not None:
+                self._run_seconds_total += job.finished_at - job.started_at
+        self._save(job)
+        job.finished.set()
+
+    def get(self, job_id: str):
+        """The job, or a snapshot of it when another process runs it"""
+        self.cleanup()
+        job = self._jobs.get(job_id)
+        if job is None and self._shared is not None:
+            job = self._shared.load(job_id)
+        return job
+
+    def wait(self, job_id: str, timeout: float):
+        """Block up to timeout seconds for the job to finish (long polling)"""
+        if job_id in self._jobs or self._shared is None:
+            job = self.get(job_id)
+            if job is not None and timeout > 0:
+                job.finished.wait(timeout)
+            return job
+        # Another process runs it: re-read its row until it finishes
+        deadline = time.monotonic() + timeout
+        job = self.get(job_id)
+        while job is not None and not job.finished.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(_WAIT_POLL_INTERVAL, remaining))
+            job = self._shared.load(job_id)
+        return job
+
+    def cancel(self, job_id: str):
+        """
+        Cancel a job: queued jobs never start, running jobs are signalled
+        through job.cancel_event and stop at their next checkpoint
+        """
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        if job_id not in self._jobs:
+            # Another process runs it and cancels it at its next check
+            self._shared.request_cancel(job_id)
+            return self._shared.load(job_id)
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+        else:
+            with self._lock:
+                if job.status == RUNNING:
+                    job.status = CANCELLING
+            self._save(job)
+        return job
+
+    def take(self, job_id: str) -> bool:
+        """
+        Mark a job as taken by one consumer (speculation claims its result
+        once); True only for the first caller, in any process
+        """
+        if self._shared is not None:
+            return self._shared.take(job_id)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.taken:
+                return False
+            job.taken = True
+            return True
+
+    def cleanup(self):
+        """Forget finished jobs older than the TTL"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.status in FINISHED_STATES and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self._shared is not None:
+            self._shared.delete_finished(cutoff)
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            started = self._started
+            finished = started - statuses.count(RUNNING) - statuses.count(CANCELLING)
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": statuses.count(QUEUED),
+                "running": statuses.count(RUNNING) + statuses.count(CANCELLING),
+                "tracked": len(statuses),
+                "succeeded": self._counts[SUCCEEDED],
+                "failed": self._counts[FAILED],
+                "cancelled": self._counts[CANCELLED],
+                "rejected": self._counts["rejected"],
+                "avg_wait_seconds": (
+                    round(self._wait_seconds_total / started, 3) if started else 0.0
+                ),
+                "avg_run_seconds": (
+                    round(self._run_seconds_total / finished, 3) if finished else 0.0
+                ),
+            }
+
+
+def create_job_manager(name: str = "plan") -> JobManager:
+    """JobManager configured from the environment"""
+    return JobManager(
+        max_workers=int(os.getenv("EUREKA_JOB_WORKERS", "4")),
+        max_queue=int(os.getenv("EUREKA_JOB_QUEUE_SIZE", "100")),
+        ttl=float(os.getenv("EUREKA_JOB_TTL", "3600")),
+        db_path=os.getenv("EUREKA_JOBS_DB") or None,
+        name=name,
+    )
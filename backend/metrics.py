@@ -0,0 +1,232 @@
+"""
+Prometheus metrics for Eureka, served at /metrics
+
+    eureka_http_request_duration_seconds  histogram by route, method, status
+                                          (until the last byte of streamed
+                                          responses)
+    eureka_http_requests_in_flight        gauge by route
+    eureka_graph_node_duration_seconds    histogram by LangGraph node
+    eureka_llm_calls_total                counter by stage, model, outcome
+    eureka_llm_call_duration_seconds      histogram by stage and model
+    eureka_llm_tokens_total               counter by stage, model and kind
+                                          (input, output, cached)
+    eureka_llm_events_total               counter by stage and event: the
+                                          per-stage counts of resilience.stats()
+                                          (retries, rate_limited, failures,
+                                          hedges, repairs, validation_retries...)
+    eureka_cache_events_total             counter by cache and event (memory_hits,
+                                          disk_hits, misses, coalesced, ...)
+    eureka_errors_total                   counter by source ("llm" for failed
+                                          attempts, "request" for failed
+                                          requests) and exception type
+
+Each labelled value has its own lock, held only for the increment, so
+concurrent requests rarely contend on a metric. Under gunicorn every worker
+writes its values to memory-mapped files in PROMETHEUS_MULTIPROC_DIR (set by
+gunicorn.conf.py), and a scrape of any worker aggregates all of them;
+without that variable the process's own registry is served.
+
+prometheus_client is imported on first use, so importing this module costs
+nothing when metrics are disabled.
+
+Configuration (environment):
+    EUREKA_METRICS            "0" disables collection and /metrics (default "1")
+    PROMETHEUS_MULTIPROC_DIR  directory shared by worker processes
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+
+# Seconds; LLM calls and plan requests run for up to a minute or more
+_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 90, 180)
+
+_lock = threading.Lock()
+_metrics = None
+
+
+def enabled() -> bool:
+    return os.getenv("EUREKA_METRICS", "1") != "0"
+
+
+class _Metrics:
+    """The metric objects, created together on first use"""
+
+    def __init__(self):
+        from prometheus_client import (
+            Counter,
+            Gauge,
+            Histogram,
+            disable_created_metrics,
+        )
+
+        # No *_created series next to every counter; Prometheus infers resets
+        disable_created_metrics()
+        self.request_seconds = Histogram(
+            "eureka_http_request_duration_seconds",
+            "HTTP request latency",
+            ["route", "method", "status"],
+            buckets=_BUCKETS,
+        )
+        self.in_flight = Gauge(
+            "eureka_http_requests_in_flight",
+            "HTTP requests being served",
+            ["route"],
+            multiprocess_mode="livesum",
+        )
+        self.node_seconds = Histogram(
+            "eureka_graph_node_duration_seconds",
+            "LangGraph node latency",
+            ["node"],
+            buckets=_BUCKETS,
+        )
+        self.llm_calls = Counter(
+            "eureka_llm_calls",
+            "LLM call attempts",
+            ["stage", "model", "outcome"],
+        )
+        self.llm_seconds = Histogram(
+            "eureka_llm_call_duration_seconds",
+            "Latency of successful LLM call attempts",
+            ["stage", "model"],
+            buckets=_BUCKETS,
+        )
+        self.llm_tokens = Counter(
+            "eureka_llm_tokens",
+            "Tokens reported by the LLM provider",
+            ["stage", "model", "kind"],
+        )
+        self.llm_events = Counter(
+            "eureka_llm_events",
+            "Retries, rate limits, failures, hedges and repairs of LLM calls",
+            ["stage", "event"],
+        )
+        self.cache_events = Counter(
+            "eureka_cache_events",
+            "Response cache lookups and evictions",
+            ["cache", "event"],
+        )
+        self.errors = Counter(
+            "eureka_errors",
+            "Errors by exception type",
+            ["source", "type"],
+        )
+
+
+def _get():
+    """The process's metrics, or None when disabled"""
+    global _metrics
+    if _metrics is None:
+        if not enabled():
+            return None
+        with _lock:
+            if _metrics is None:
+                _metrics = _Metrics()
+    return _metrics
+
+
+def observe_request(route: str, method: str, status: int, seconds: float):
+    metrics = _get()
+    if metrics is not None:
+        metrics.request_seconds.labels(route, method, str(status)).observe(seconds)
+
+
+def request_started(route: str):
+    metrics = _get()
+    if metrics is not None:
+        metrics.in_flight.labels(route).inc()
+
+
+def request_finished(route: str):
+    metrics = _get()
+    if metrics is not None:
+        metrics.in_flight.labels(route).dec()
+
+
+def observe_llm_call(stage: str, model: str, ok: bool, seconds: float = None):
+    metrics = _get()
+    if metrics is None:
+        return
+    metrics.llm_calls.labels(stage, model, "success" if ok else "error").inc()
+    if ok and seconds is not None:
+        metrics.llm_seconds.labels(stage, model).observe(seconds)
+
+
+def count_tokens(stage: str, model: str, kind: str, amount: int):
+    metrics = _get()
+    if metrics is not None and amount:
+        metrics.llm_tokens.labels(stage, model or "unknown", kind).inc(amount)
+
+
+def count_llm_event(stage: str, event: str, amount: int = 1):
+    metrics = _get()
+    if metrics is not None:
+        metrics.llm_events.labels(stage, event).inc(amount)
+
+
+def count_cache(cache: str, event: str, amount: int = 1):
+    metrics = _get()
+    if metrics is not None and amount:
+        metrics.cache_events.labels(cache, event).inc(amount)
+
+
+def count_error(source: str, error: BaseException):
+    metrics = _get()
+    if metrics is not None:
+        metrics.errors.labels(source, type(error).__name__).inc()
+
+
+def timed_node(name: str, fn):
+    """
+    fn (a sync or async LangGraph node function) recording its latency
+    under name; the signature is kept so LangGraph still passes config
+    """
+    if asyncio.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_node(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _observe_node(name, time.perf_counter() - started)
+
+        return async_node
+
+    @functools.wraps(fn)
+    def node(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _observe_node(name, time.perf_counter() - started)
+
+    return node
+
+
+def _observe_node(name: str, seconds: float):
+    metrics = _get()
+    if metrics is not None:
+        metrics.node_seconds.labels(name).observe(seconds)
+
+
+def exposition():
+    """(body, content type) of the text exposition for a scrape"""
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        REGISTRY,
+        CollectorRegistry,
+        generate_latest,
+    )
+
+    _get()
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -3,17 +3,28 @@ Pydantic models for structured output from Groq
 """
 
 from typing import List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
+import repair
 
-class CriticalQuestion(BaseModel):
+
+class OutputModel(BaseModel):
+    """Base for LLM output models; repair.py fixes trimmable violations first"""
+
+    @model_validator(mode="before")
+    @classmethod
+    def _repair(cls, data):
+        return repair.repair(cls, data)
+
+
+class CriticalQuestion(OutputModel):
     question: str = Field(
         description="A single critical question, phrased as a question (end with ?), max 200 characters",
         max_length=200,
     )
 
 
-class Category(BaseModel):
+class Category(OutputModel):
     name: str = Field(
         description="Concise category name (3-5 words max)", 
         max_length=50
@@ -25,17 +36,17 @@ class Category(BaseModel):
     )
 
 
-class RefinementResult(BaseModel):
+class RefinementResult(OutputModel):
     categories: List[Category] = Field(
-        # max_length=5,
         description="Exactly 3 categories capturing critical questions",
+        max_length=3,
     )
 
 
 # LangGraph Agent Models
 
 
-class MasterPromptOutput(BaseModel):
+class MasterPromptOutput(OutputModel):
     """Structured output from the Strategist agent"""
 
     objective: str = Field(description="Clear project objective")
@@ -52,7 +63,7 @@ class MasterPromptOutput(BaseModel):
     )
 
 
-class StrategicPhase(BaseModel):
+class StrategicPhase(OutputModel):
     """Represents a phase in the strategic roadmap"""
 
     name: str = Field(description="Phase name")
@@ -60,7 +71,7 @@ class StrategicPhase(BaseModel):
     activities: List[str] = Field(description="Key activities in this phase")
 
 
-class StrategicRoadmapOutput(BaseModel):
+class StrategicRoadmapOutput(OutputModel):
     """Structured output from the Project Overview Planner agent"""
 
     problem_statement: str = Field(description="The core problem being addressed")
@@ -71,3 +82,41 @@ class StrategicRoadmapOutput(BaseModel):
     )
     north_star_metrics: List[str] = Field(description="Key success metrics")
     strategic_dependencies_and_risks: dict = Field(description="Dependencies and risks")
+
+
+class FastPlanOutput(OutputModel):
+    """Both agents' outputs from the single-call fast planning mode"""
+
+    master_prompt: MasterPromptOutput = Field(
+        description="Structured master prompt distilled from the idea"
+    )
+    strategic_roadmap: StrategicRoadmapOutput = Field(
+        description="High-level strategic roadmap built from the master prompt"
+    )
+
+
+class PhaseOutline(OutputModel):
+    """A roadmap phase before its activities are expanded"""
+
+    name: str = Field(description="Phase name")
+    duration: str = Field(description="Duration/timeline")
+
+
+class RoadmapSkeleton(OutputModel):
+    """Roadmap without phase activities, from the parallel planning mode"""
+
+    problem_statement: str = Field(description="The core problem being addressed")
+    vision_statement: str = Field(description="Inspiring vision for the project")
+    major_goals: List[str] = Field(description="3-5 major high-level goals")
+    key_phases: List[PhaseOutline] = Field(
+        description="Phased breakdown of the project, names and durations only",
+        min_length=1,
+    )
+    north_star_metrics: List[str] = Field(description="Key success metrics")
+    strategic_dependencies_and_risks: dict = Field(description="Dependencies and risks")
+
+
+class PhaseActivities(OutputModel):
+    """Activities for one roadmap phase"""
+
+    activities: List[str] = Field(description="Key activities in this phase")
@@ -0,0 +1,297 @@
+"""
+On-demand request profiling for Eureka
+
+A profiled request runs under a sampling profiler: a background thread
+records every thread's Python stack each EUREKA_PROFILE_INTERVAL_MS until the
+response has been sent, then writes a speedscope file (open it at
+https://www.speedscope.app) to EUREKA_PROFILE_DIR. The file holds one
+flamegraph per thread that did work (parked pool threads are left out) and
+the request's timing spans as a timeline. The response carries the file
+name in X-Profile-File.
+
+Requests are profiled when EUREKA_PROFILE=1, or when they send an
+X-Eureka-Profile header equal to EUREKA_PROFILE_TOKEN (the header is
+ignored unless the token is set). Stacks of other requests served by the
+same process at the same time show up too, so profile on a quiet worker;
+under asgi.py the event loop thread interleaves every in-flight request.
+
+Timing spans (span()) mark the hot sections of the refine and plan paths:
+the LLM calls, the network part of each (llm.network; the rest of the call
+is Instructor/LangChain parsing and Pydantic validation), model_dump
+conversions and JSON serialization. They are recorded for profiled
+requests, summed per name into a Server-Timing header, and exported to
+Phoenix as OpenTelemetry spans whenever tracing is active.
+
+Configuration (environment):
+    EUREKA_PROFILE               "1" profiles every request (default "0")
+    EUREKA_PROFILE_TOKEN         secret for the X-Eureka-Profile header
+    EUREKA_PROFILE_DIR           output directory (default <tmp>/eureka-profiles)
+    EUREKA_PROFILE_INTERVAL_MS   sampling interval (default 1)
+    EUREKA_PROFILE_MAX_SECONDS   sampling stops after this long (default 300)
+"""
+
+from contextlib import contextmanager
+import contextvars
+import hmac
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import tracing
+
+PROFILE_HEADER = "X-Eureka-Profile"
+
+_current_profile = contextvars.ContextVar("eureka_profile", default=None)
+_lock = threading.Lock()
+_counts = {"profiles": 0, "written": 0, "failed": 0}
+
+
+def enabled() -> bool:
+    return os.getenv("EUREKA_PROFILE", "0") == "1"
+
+
+def profile_dir() -> str:
+    return os.getenv("EUREKA_PROFILE_DIR") or os.path.join(
+        tempfile.gettempdir(), "eureka-profiles"
+    )
+
+
+def requested(header_value) -> bool:
+    """Whether a request with this X-Eureka-Profile value is profiled"""
+    if enabled():
+        return True
+    token = os.getenv("EUREKA_PROFILE_TOKEN", "")
+    return bool(token and header_value) and hmac.compare_digest(
+        header_value.encode(), token.encode()
+    )
+
+
+class Profile:
+    """Stack samples of every thread and the timing spans of one request"""
+
+    def __init__(self, name: str, interval: float, max_seconds: float):
+        self.name = name
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-") or "request"
+        self.filename = (
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{uuid.uuid4().hex[:8]}"
+            ".speedscope.json"
+        )
+        self.spans: list = []
+        self.context_token = None
+        self._interval = interval
+        self._max_seconds = max_seconds
+        self._started = time.perf_counter()
+        self._stop = threading.Event()
+        self._frames: dict = {}
+        # thread id -> [(stack, weight in ms)]
+        self._samples: dict = {}
+        self._thread = threading.Thread(
+            target=self._run, name="eureka-profiler", daemon=True
+        )
+
+    def start(self) -> "Profile":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling; the file is written from the profiler thread"""
+        self._stop.set()
+
+    def add_span(self, name: str, start: float, end: float):
+        self.spans.append((threading.get_ident(), name, start, end))
+
+    def _frame_index(self, key: tuple) -> int:
+        """Index in the shared frame table of (name, file, line)"""
+        index = self._frames.get(key)
+        if index is None:
+            index = self._frames[key] = len(self._frames)
+        return index
+
+    def _sample(self, own_id: int, weight: float):
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    self._frame_index(
+                        (code.co_qualname, code.co_filename, code.co_firstlineno)
+                    )
+                )
+                frame = frame.f_back
+            stack.reverse()
+            self._samples.setdefault(thread_id, []).append((stack, weight))
+
+    def _run(self):
+        own_id = threading.get_ident()
+        deadline = self._started + self._max_seconds
+        last = self._started
+        while not self._stop.wait(self._interval):
+            now = time.perf_counter()
+            self._sample(own_id, (now - last) * 1000)
+            last = now
+            if now >= deadline:
+                break
+        self._write(time.perf_counter())
+
+    def _speedscope(self, ended: float) -> dict:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        end_ms = (ended - self._started) * 1000
+        profiles = []
+        for thread_id, samples in self._samples.items():
+            # A thread parked for the whole request has a single stack
+            if len({tuple(stack) for stack, _ in samples}) < 2:
+                continue
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": names.get(thread_id, f"thread {thread_id}"),
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": end_ms,
+                    "samples": [stack for stack, _ in samples],
+                    "weights": [round(weight, 3) for _, weight in samples],
+                }
+            )
+        by_thread: dict = {}
+        for thread_id, name, start, end in self.spans:
+            by_thread.setdefault(thread_id, []).append((name, start, end))
+        for thread_id, spans in by_thread.items():
+            profiles.append(
+                {
+                    "type": "evented",
+                    "name": f"spans: {names.get(thread_id, thread_id)}",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": end_ms,
+                    "events": self._span_events(spans),
+                }
+            )
+        frames = [
+            {"name": name, "file": file, "line": line}
+            for name, file, line in self._frames
+        ]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": "eureka",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def _span_events(self, spans: list) -> list:
+        """Open/close events of spans, nested strictly as speedscope requires"""
+        events, stack = [], []
+
+        def at(moment: float) -> float:
+            return round((moment - self._started) * 1000, 3)
+
+        def close_until(moment: float):
+            while stack and stack[-1][1] <= moment:
+                frame, end = stack.pop()
+                events.append({"type": "C", "frame": frame, "at": at(end)})
+
+        for name, start, end in sorted(spans, key=lambda s: (s[1], -s[2])):
+            close_until(start)
+            if stack:
+                # Spans recorded after the fact may overrun their parent
+                end = min(end, stack[-1][1])
+            frame = self._frame_index((name, "", 0))
+            events.append({"type": "O", "frame": frame, "at": at(start)})
+            stack.append((frame, end))
+        close_until(float("inf"))
+        return events
+
+    def _write(self, ended: float):
+        try:
+            directory = profile_dir()
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, self.filename)
+            # Renamed into place so a reader never sees a partial file
+            with open(path + ".tmp", "w") as f:
+                json.dump(self._speedscope(ended), f)
+            os.replace(path + ".tmp", path)
+        except (OSError, TypeError, ValueError):
+            with _lock:
+                _counts["failed"] += 1
+            return
+        with _lock:
+            _counts["written"] += 1
+
+
+def start(name: str) -> Profile:
+    """
+    Start profiling the current request; spans in this context go to the
+    profile until detach()
+    """
+    profile = Profile(
+        name,
+        interval=float(os.getenv("EUREKA_PROFILE_INTERVAL_MS", "1")) / 1000,
+        max_seconds=float(os.getenv("EUREKA_PROFILE_MAX_SECONDS", "300")),
+    ).start()
+    profile.context_token = _current_profile.set(profile)
+    with _lock:
+        _counts["profiles"] += 1
+    return profile
+
+
+def detach(profile: Profile):
+    """
+    Stop attributing spans of this context to profile; pooled server
+    threads would otherwise carry it into their next request
+    """
+    _current_profile.reset(profile.context_token)
+
+
+def server_timing(profile: Profile) -> str:
+    """Server-Timing header value: total milliseconds per span name"""
+    totals: dict = {}
+    for _, name, start, end in profile.spans:
+        totals[name] = totals.get(name, 0.0) + (end - start) * 1000
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in totals.items())
+
+
+@contextmanager
+def span(name: str):
+    """Time a section for the current profile and, when active, for tracing"""
+    profile = _current_profile.get()
+    tracer = tracing.tracer()
+    if profile is None and tracer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        if tracer is not None:
+            with tracer.start_as_current_span(name):
+                yield
+        else:
+            yield
+    finally:
+        if profile is not None:
+            profile.add_span(name, started, time.perf_counter())
+
+
+def record(name: str, seconds: float):
+    """A span of the given duration that ended just now (profiles only)"""
+    profile = _current_profile.get()
+    if profile is not None:
+        ended = time.perf_counter()
+        profile.add_span(name, ended - seconds, ended)
+
+
+def stats() -> dict:
+    with _lock:
+        counts = dict(_counts)
+    return {
+        "enabled": enabled(),
+        "header": bool(os.getenv("EUREKA_PROFILE_TOKEN")),
+        "directory": profile_dir(),
+        **counts,
+    }
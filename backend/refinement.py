@@ -0,0 +1,203 @@
+"""
+Idea refinement with Groq + Instructor
+
+Shared by the Flask app (app.py) and the async serving path (asgi.py).
+"""
+
+from pydantic import ValidationError
+
+import clients
+import profiling
+import prompts
+import resilience
+import router
+from cache import cache_key, get_cache
+from models import Category, RefinementResult
+from streaming import completed_items
+
+REFINE_MAX_TOKENS = 2500
+REFINE_TEMPERATURE = 0.3
+# Versioned with the template so cached results follow prompt changes
+REFINE_PROMPT_VERSION = prompts.REFINE.version
+
+
+def refine_model() -> str:
+    """
+    The refine stage's model pool (EUREKA_MODELS_REFINE, EUREKA_MODELS or
+    GROQ_MODEL, see router.py) as one string for cache keys
+    """
+    return router.pool_key("refine")
+
+
+def _completion_kwargs(topic: str, model: str) -> dict:
+    return {
+        "model": model,
+        "messages": prompts.REFINE.messages(topic=topic),
+        "response_model": RefinementResult,
+        "max_tokens": REFINE_MAX_TOKENS,
+        "temperature": REFINE_TEMPERATURE,
+    }
+
+
+def _to_result(result: RefinementResult) -> dict:
+    # Convert Pydantic model to dict for JSON response; extra categories were
+    # already clamped by repair.py
+    return result.model_dump()
+
+
+def refine_cache_key(topic: str) -> str:
+    return cache_key(
+        "refine",
+        {"topic": topic},
+        model=refine_model(),
+        temperature=REFINE_TEMPERATURE,
+        prompt_version=REFINE_PROMPT_VERSION,
+    )
+
+
+def _semantic_cache():
+    """Near-duplicate topic cache, or None unless EUREKA_SEMANTIC_CACHE=1"""
+    import semantic_cache
+
+    if not semantic_cache.enabled():
+        return None
+    return semantic_cache.get_semantic_cache(
+        f"refine:{refine_model()}:{REFINE_TEMPERATURE}:{REFINE_PROMPT_VERSION}"
+    )
+
+
+def _semantic_lookup(topic: str):
+    semantic = _semantic_cache()
+    hit = semantic.lookup(topic) if semantic is not None else None
+    return hit[0] if hit is not None else None
+
+
+def _semantic_store(topic: str, refined_result: dict):
+    semantic = _semantic_cache()
+    if semantic is not None:
+        semantic.add(topic, refined_result)
+
+
+def refine_topic(topic: str) -> dict:
+    """
+    Generate the critical question categories for a topic
+
+    Returns:
+        dict: {"categories": [...]} ready for the JSON response
+    """
+
+    def compute():
+        refined_result = _semantic_lookup(topic)
+        if refined_result is None:
+            client = clients.get_instructor_client()
+            with profiling.span("refine.llm"):
+                result = router.call(
+                    "refine",
+                    lambda model: client.chat.completions.create(
+                        **_completion_kwargs(topic, model),
+                        max_retries=resilience.validation_retries(stage="refine"),
+                    ),
+                )
+            with profiling.span("refine.model_dump"):
+                refined_result = _to_result(result)
+            _semantic_store(topic, refined_result)
+        return refined_result
+
+    return get_cache("refine").get_or_compute(refine_cache_key(topic), compute)
+
+
+async def arefine_topic(topic: str) -> dict:
+    """Async variant of refine_topic() for the ASGI serving path"""
+
+    async def compute():
+        refined_result = _semantic_lookup(topic)
+        if refined_result is None:
+            client = clients.get_async_instructor_client()
+            with profiling.span("refine.llm"):
+                result = await router.acall(
+                    "refine",
+                    lambda model: client.chat.completions.create(
+                        **_completion_kwargs(topic, model),
+                        max_retries=resilience.validation_retries(
+                            is_async=True, stage="refine"
+                        ),
+                    ),
+                )
+            with profiling.span("refine.model_dump"):
+                refined_result = _to_result(result)
+            _semantic_store(topic, refined_result)
+        return refined_result
+
+    return await get_cache("refine").aget_or_compute(refine_cache_key(topic), compute)
+
+
+def _emit_categories(categories: list, emitted: int):
+    """
+    Yield ("category", ...) events for categories[emitted:] up to the first
+    one that does not validate yet
+    """
+    for index in range(emitted, min(len(categories), 3)):
+        try:
+            category = Category.model_validate(categories[index])
+        except ValidationError:
+            return
+        yield "category", {"index": index, "category": category.model_dump()}
+
+
+def stream_refine_topic(topic: str):
+    """
+    Generate the critical question categories for a topic, yielding
+    (event, data) pairs as the output is generated:
+
+        ("category", {"index": i, "category": {...}})  once each Category validates
+        ("done", {"result": {...}, "topic": topic})    same payload as /api/refine
+        ("error", {"error": "..."})                    if generation fails
+    """
+    from instructor import openai_schema
+    from langchain_core.utils.json import parse_partial_json
+
+    try:
+        response_cache = get_cache("refine")
+        key = refine_cache_key(topic)
+        refined_result = response_cache.get(key) or _semantic_lookup(topic)
+        if refined_result is not None:
+            response_cache.set(key, refined_result)
+            yield from _emit_categories(refined_result["categories"], 0)
+            yield "done", {"result": refined_result, "topic": topic}
+            return
+
+        tool = openai_schema(RefinementResult).openai_schema
+
+        def create(model: str):
+            kwargs = _completion_kwargs(topic, model)
+            del kwargs["response_model"]
+            return clients.get_groq_client().chat.completions.create(
+                **kwargs,
+                tools=[{"type": "function", "function": tool}],
+                tool_choice={"type": "function", "function": {"name": tool["name"]}},
+                stream=True,
+            )
+
+        stream = router.call_stream("refine", create)
+        arguments, emitted = "", 0
+        for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.tool_calls:
+                continue
+            arguments += chunk.choices[0].delta.tool_calls[0].function.arguments or ""
+
+            # Every category before the one being generated is final
+            partial = parse_partial_json(arguments) if arguments else None
+            for event in _emit_categories(
+                completed_items(partial, "categories"), emitted
+            ):
+                emitted += 1
+                yield event
+
+        refined_result = _to_result(RefinementResult.model_validate_json(arguments))
+        response_cache.set(key, refined_result)
+        _semantic_store(topic, refined_result)
+        yield from _emit_categories(refined_result["categories"], emitted)
+        yield "done", {"result": refined_result, "topic": topic}
+
+    except Exception as e:
+        yield "error", {"error": str(e)}
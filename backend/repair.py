@@ -0,0 +1,207 @@
+"""
+Local repair of structured LLM output
+
+The output models in models.py carry strict limits (question length, 2-3
+questions per category, ...). When a response breaks one, Instructor
+re-asks the model and LangChain's parser fails the request, so a trimmable
+overflow used to cost a full extra round trip. Every output model runs
+repair() before validation instead, which fixes what can be fixed
+deterministically:
+
+    - strings over max_length are cut at the last sentence (or word) boundary
+    - duplicate list items are dropped and lists clamped to max_length
+    - a bare string where a list is expected becomes a one-item list
+    - dict fields returned as JSON text, a list or a plain string become dicts
+    - a bare string where a single-field model is expected fills that field
+
+Anything else (missing fields, too few items) still fails validation and is
+retried as before. Repairs are counted per stage next to the validation
+retries in resilience.stats(), and per output model and kind of fix in
+stats().
+
+Configuration (environment):
+    EUREKA_REPAIR  "0" disables local repair (default "1")
+"""
+
+from collections import Counter, defaultdict
+import json
+import os
+import threading
+import typing
+
+from annotated_types import MaxLen, MinLen
+
+_lock = threading.Lock()
+_repairs: dict = defaultdict(Counter)
+_repaired_outputs = 0
+
+# Sentence endings a truncated string may stop at
+_SENTENCE_ENDS = ".?!"
+
+
+def enabled() -> bool:
+    return os.getenv("EUREKA_REPAIR", "1") != "0"
+
+
+def truncate(text: str, limit: int) -> str:
+    """
+    text cut to at most limit characters, at the last sentence end when that
+    keeps at least half of the limit, otherwise at a word boundary with an
+    ellipsis
+    """
+    if len(text) <= limit:
+        return text
+    head = text[:limit]
+    end = max(head.rfind(mark) for mark in _SENTENCE_ENDS)
+    if end >= limit // 2:
+        return head[: end + 1]
+    words = head[: limit - 1].rsplit(" ", 1)[0] if " " in head else head[: limit - 1]
+    return words.rstrip(" ,;:-") + "…"
+
+
+def _length_limits(field):
+    """(min_length, max_length) of a field, 0/None when unconstrained"""
+    low, high = 0, None
+    for constraint in field.metadata:
+        if isinstance(constraint, MinLen):
+            low = constraint.min_length
+        elif isinstance(constraint, MaxLen):
+            high = constraint.max_length
+    return low, high
+
+
+def _identity(item) -> str:
+    """Case- and whitespace-insensitive identity for de-duplicating items"""
+    if isinstance(item, str):
+        return " ".join(item.casefold().split())
+    return json.dumps(item, sort_keys=True, default=str).casefold()
+
+
+def _dedupe(items: list) -> list:
+    seen, unique = set(), []
+    for item in items:
+        identity = _identity(item)
+        if identity not in seen:
+            seen.add(identity)
+            unique.append(item)
+    return unique
+
+
+def _as_dict(value):
+    """A dict for a dict field's JSON text, list or plain string, else None"""
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return {"details": value} if value.strip() else {}
+        return parsed if isinstance(parsed, dict) else _as_dict(parsed)
+    if isinstance(value, list):
+        return {"items": value}
+    if value is None:
+        return {}
+    return None
+
+
+def _nested_model(annotation):
+    """The output model class a field (or its list items) holds, if any"""
+    if typing.get_origin(annotation) is list:
+        annotation = typing.get_args(annotation)[0]
+    if isinstance(annotation, type) and hasattr(annotation, "model_fields"):
+        return annotation
+    return None
+
+
+def _repair_field(field, value, fixes: list):
+    """The repaired value of one field, appending what was fixed to fixes"""
+    annotation = field.annotation
+    origin = typing.get_origin(annotation) or annotation
+    low, limit = _length_limits(field)
+
+    # Nested outputs are repaired along with their parent so that one
+    # response counts as one repair; their own validators then find nothing
+    nested = _nested_model(annotation)
+    if nested is not None and origin is not list:
+        return _repair_data(nested, value, fixes)
+
+    if origin is str:
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            value = "; ".join(value)
+            fixes.append("joined")
+        if isinstance(value, str) and limit is not None and len(value) > limit:
+            value = truncate(value, limit)
+            fixes.append("truncated")
+        return value
+
+    if origin is list:
+        if isinstance(value, str):
+            value = [value]
+            fixes.append("wrapped")
+        if not isinstance(value, list):
+            return value
+        if nested is not None:
+            value = [_repair_data(nested, item, fixes) for item in value]
+        unique = _dedupe(value)
+        # Duplicates are kept where dropping them would break min_length
+        if len(value) > len(unique) >= low:
+            value = unique
+            fixes.append("deduplicated")
+        if limit is not None and len(value) > limit:
+            value = value[:limit]
+            fixes.append("clamped")
+        return value
+
+    if origin is dict and not isinstance(value, dict):
+        coerced = _as_dict(value)
+        if coerced is not None:
+            fixes.append("coerced")
+            return coerced
+    return value
+
+
+def _repair_data(model, data, fixes: list):
+    fields = model.model_fields
+    if isinstance(data, str) and len(fields) == 1:
+        data = {next(iter(fields)): data}
+        fixes.append("wrapped")
+    if not isinstance(data, dict):
+        return data
+    repaired = dict(data)
+    for name, field in fields.items():
+        if name in repaired:
+            repaired[name] = _repair_field(field, repaired[name], fixes)
+    return repaired
+
+
+def repair(model, data):
+    """
+    Repaired input for model (a pydantic model class) from a model_validator
+    running before validation; data that needs no repair is returned as is
+    """
+    global _repaired_outputs
+    if not enabled():
+        return data
+    fixes = []
+    repaired = _repair_data(model, data, fixes)
+    if not fixes:
+        return data
+
+    with _lock:
+        _repaired_outputs += 1
+        _repairs[model.__name__].update(fixes)
+    _count_stage_repair()
+    return repaired
+
+
+def _count_stage_repair():
+    import resilience
+
+    resilience.count_repair()
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "enabled": enabled(),
+            "repaired_outputs": _repaired_outputs,
+            "by_model": {model: dict(kinds) for model, kinds in _repairs.items()},
+        }
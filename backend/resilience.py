@@ -0,0 +1,769 @@
+"""
+Resilient Groq calls: adaptive rate limiting, retries and hedged requests
+
+Every LLM call in Eureka goes through call() / acall() (or
+call_stream() for streamed responses):
+
+    - Groq's x-ratelimit-* and retry-after response headers feed a
+      process-wide limiter (via an httpx response hook on the shared clients)
+      that pauses new calls until the window resets when the remaining
+      request or token budget runs low, and spaces calls out as it shrinks.
+    - 429s, 5xx responses, timeouts and connection errors are retried with
+      full-jitter exponential backoff, honouring retry-after, until the
+      per-call deadline.
+    - Optionally (EUREKA_HEDGE=1) a duplicate request is issued when a call
+      runs longer than the stage's recent p95 latency; the first response
+      wins. The loser's tokens are counted as wasted. Hedges run on a pool
+      of EUREKA_HEDGE_WORKERS threads and are skipped while it is busy, so
+      they never queue; primaries never wait for a pool thread.
+    - Input, output and prefix-cached input tokens reported by Groq are
+      counted per stage, and per request inside track_usage().
+    - Structured outputs fixed locally (repair.py) and validation re-asks
+      are counted per stage as repairs and validation_retries.
+
+The Groq SDK's own retries are disabled on the shared clients so there is
+exactly one retry policy.
+
+Configuration (environment):
+    EUREKA_LLM_DEADLINE           seconds per call including retries (default 90)
+    EUREKA_LLM_MAX_RETRIES        retries after the first attempt (default 4)
+    EUREKA_LLM_BACKOFF_BASE       first backoff ceiling in seconds (default 0.5)
+    EUREKA_LLM_BACKOFF_MAX        largest backoff ceiling in seconds (default 8)
+    EUREKA_RATE_LIMIT_RESERVE     remaining requests at which calls pause
+                                  until the window resets (default 1)
+    EUREKA_HEDGE                  "1" enables hedged requests (default "0")
+    EUREKA_HEDGE_MIN_SAMPLES      latencies needed before hedging (default 20)
+    EUREKA_HEDGE_MIN_DELAY        floor for the hedge delay in seconds (default 1)
+    EUREKA_HEDGE_WORKERS          concurrent hedge requests per process (default 4)
+"""
+
+import asyncio
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+import contextvars
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+import metrics
+import profiling
+from cassette import CassetteMissError
+
+MAX_RETRIES = int(os.getenv("EUREKA_LLM_MAX_RETRIES", "4"))
+DEADLINE = float(os.getenv("EUREKA_LLM_DEADLINE", "90"))
+BACKOFF_BASE = float(os.getenv("EUREKA_LLM_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("EUREKA_LLM_BACKOFF_MAX", "8"))
+RATE_LIMIT_RESERVE = int(os.getenv("EUREKA_RATE_LIMIT_RESERVE", "1"))
+HEDGE_MIN_SAMPLES = int(os.getenv("EUREKA_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MIN_DELAY = float(os.getenv("EUREKA_HEDGE_MIN_DELAY", "1"))
+HEDGE_WORKERS = int(os.getenv("EUREKA_HEDGE_WORKERS", "4"))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+class LLMUnavailableError(Exception):
+    """
+    Raised when a call still fails with a retryable error at its deadline;
+    status_code is 429 when Groq was rate limiting, 503 otherwise
+    """
+
+    def __init__(self, message: str, status_code: int = 503, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_duration(value) -> float:
+    """Seconds in a Groq reset header ("7.66s", "2m59.56s", "250ms") or None"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class AdaptiveLimiter:
+    """
+    Client-side limiter driven by the provider's rate-limit headers.
+
+    When the remaining request (or token) budget is at the reserve, new calls
+    wait for the window to reset; above it, calls are spaced so the remaining
+    budget lasts until the reset. Each call reserves its send time, so calls
+    made together are spaced too instead of all leaving at once.
+    """
+
+    def __init__(self, reserve: int = 1):
+        self.reserve = reserve
+        self._lock = threading.Lock()
+        self._next_allowed = 0.0
+        # Spacing between calls while the budget is above the reserve
+        self._interval = 0.0
+        self._remaining_requests = None
+        self._remaining_tokens = None
+        self._waits = 0
+        self._waited_seconds = 0.0
+
+    def observe(self, headers):
+        """Update from one response's headers"""
+        now = time.monotonic()
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        reset_tokens = parse_duration(headers.get("x-ratelimit-reset-tokens"))
+        retry_after = parse_duration(headers.get("retry-after"))
+
+        with self._lock:
+            if remaining is not None and remaining.isdigit():
+                self._remaining_requests = int(remaining)
+                if reset:
+                    if self._remaining_requests <= self.reserve:
+                        self._interval = 0.0
+                        self._delay_until(now + reset)
+                    else:
+                        # Spread what is left of the window over its duration
+                        self._interval = reset / self._remaining_requests
+            if remaining_tokens is not None and remaining_tokens.isdigit():
+                self._remaining_tokens = int(remaining_tokens)
+                if self._remaining_tokens == 0 and reset_tokens:
+                    self._delay_until(now + reset_tokens)
+            if retry_after:
+                self._delay_until(now + retry_after)
+
+    def _delay_until(self, moment: float):
+        self._next_allowed = max(self._next_allowed, moment)
+
+    def delay(self) -> float:
+        """
+        Seconds the next call should wait before being sent; the call takes
+        that slot, and the one after it waits a further interval
+        """
+        with self._lock:
+            now = time.monotonic()
+            send_at = max(now, self._next_allowed)
+            self._next_allowed = send_at + self._interval
+            delay = send_at - now
+            if delay:
+                self._waits += 1
+                self._waited_seconds += delay
+            return delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "remaining_requests": self._remaining_requests,
+                "remaining_tokens": self._remaining_tokens,
+                "paused_for_seconds": round(
+                    max(0.0, self._next_allowed - time.monotonic()), 3
+                ),
+                "waits": self._waits,
+                "waited_seconds": round(self._waited_seconds, 3),
+            }
+
+
+_limiter = AdaptiveLimiter(reserve=RATE_LIMIT_RESERVE)
+
+
+# Stage of the call() in progress, and the per-request usage being collected
+_current_stage = contextvars.ContextVar("eureka_llm_stage", default=None)
+_request_usage = contextvars.ContextVar("eureka_llm_usage", default=None)
+
+
+@contextmanager
+def _stage(stage: str):
+    token = _current_stage.set(stage)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+
+
+@contextmanager
+def track_usage():
+    """
+    Collect the tokens of every LLM call made in this context (and in
+    threads or tasks started from it with a copy of the context):
+
+        with resilience.track_usage() as usage:
+            run_agents(...)
+        usage  # {"strategist": {"input_tokens": ..., "output_tokens": ...}}
+    """
+    usage = defaultdict(Counter)
+    token = _request_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _request_usage.reset(token)
+
+
+def start_usage() -> dict:
+    """
+    track_usage() for frameworks with separate before/after request hooks;
+    the collection lasts until the next start_usage() in this context
+    """
+    usage = defaultdict(Counter)
+    _request_usage.set(usage)
+    return usage
+
+
+def usage_header(usage: dict) -> str:
+    """X-LLM-Usage value: stage=input/output/cached-input per stage"""
+    return ", ".join(
+        f"{stage}={counts['input_tokens']}/{counts['output_tokens']}"
+        f"/{counts['cached_tokens']}"
+        for stage, counts in sorted(usage.items())
+    )
+
+
+def _record_usage(stage, request_usage, body):
+    """Count the usage of a completion body (or its last streamed chunk)"""
+    if not isinstance(body, dict):
+        return
+    usage = body.get("usage") or (body.get("x_groq") or {}).get("usage")
+    if not isinstance(usage, dict):
+        return
+    stage = stage or "unattributed"
+    # Prompt tokens served from the provider's prefix cache
+    details = usage.get("prompt_tokens_details") or {}
+    counts = {
+        "input_tokens": usage.get("prompt_tokens") or 0,
+        "output_tokens": usage.get("completion_tokens") or 0,
+        "cached_tokens": details.get("cached_tokens") or 0,
+    }
+    for name, amount in counts.items():
+        _metrics.count(stage, name, amount)
+        metrics.count_tokens(stage, body.get("model"), name[: -len("_tokens")], amount)
+        if request_usage is not None:
+            request_usage[stage][name] += amount
+
+
+def _stream_usage(tail: bytes):
+    """The last chunk carrying usage among a streamed completion's final events"""
+    for line in reversed(tail.decode("utf-8", errors="ignore").splitlines()):
+        if line.startswith("data: {"):
+            try:
+                chunk = json.loads(line[len("data: ") :])
+            except ValueError:
+                continue
+            if chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage"):
+                return chunk
+    return None
+
+
+class _UsageStream(httpx.SyncByteStream):
+    """Passes a streamed body through and records the usage at its end"""
+
+    def __init__(self, stream, stage, request_usage):
+        self._stream = stream
+        self._stage = stage
+        self._request_usage = request_usage
+
+    def __iter__(self):
+        tail = b""
+        for chunk in self._stream:
+            tail = (tail + chunk)[-8192:]
+            yield chunk
+        _record_usage(self._stage, self._request_usage, _stream_usage(tail))
+
+    def close(self):
+        self._stream.close()
+
+
+class _AsyncUsageStream(httpx.AsyncByteStream):
+    """Async variant of _UsageStream"""
+
+    def __init__(self, stream, stage, request_usage):
+        self._stream = stream
+        self._stage = stage
+        self._request_usage = request_usage
+
+    async def __aiter__(self):
+        tail = b""
+        async for chunk in self._stream:
+            tail = (tail + chunk)[-8192:]
+            yield chunk
+        _record_usage(self._stage, self._request_usage, _stream_usage(tail))
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+def _is_completion(response) -> bool:
+    return response.request.url.path.endswith("/chat/completions")
+
+
+def _is_event_stream(response) -> bool:
+    return response.headers.get("content-type", "").startswith("text/event-stream")
+
+
+def _json_body(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def observe_response(response):
+    """httpx response hook for the shared sync client"""
+    _limiter.observe(response.headers)
+    if not _is_completion(response) or response.status_code != 200:
+        return
+    stage, request_usage = _current_stage.get(), _request_usage.get()
+    if _is_event_stream(response):
+        response.stream = _UsageStream(response.stream, stage, request_usage)
+    else:
+        # The SDK reads the body right after this hook anyway
+        response.read()
+        profiling.record("llm.network", response.elapsed.total_seconds())
+        _record_usage(stage, request_usage, _json_body(response))
+
+
+async def aobserve_response(response):
+    """httpx response hook for the shared async client"""
+    _limiter.observe(response.headers)
+    if not _is_completion(response) or response.status_code != 200:
+        return
+    stage, request_usage = _current_stage.get(), _request_usage.get()
+    if _is_event_stream(response):
+        response.stream = _AsyncUsageStream(response.stream, stage, request_usage)
+    else:
+        await response.aread()
+        profiling.record("llm.network", response.elapsed.total_seconds())
+        _record_usage(stage, request_usage, _json_body(response))
+
+
+class _StageMetrics:
+    """Counters and a rolling latency window per call stage"""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._counts: dict = defaultdict(Counter)
+        self._latencies: dict = defaultdict(lambda: deque(maxlen=window))
+
+    def count(self, stage: str, name: str, amount: int = 1):
+        with self._lock:
+            self._counts[stage][name] += amount
+        # Token counts are exported per model by _record_usage()
+        if name not in ("input_tokens", "output_tokens", "cached_tokens"):
+            metrics.count_llm_event(stage, name, amount)
+
+    def record_latency(self, stage: str, seconds: float):
+        with self._lock:
+            self._latencies[stage].append(seconds)
+
+    def percentile(self, stage: str, q: float):
+        """q-quantile of the stage's recent latencies, None below HEDGE_MIN_SAMPLES"""
+        with self._lock:
+            samples = sorted(self._latencies[stage])
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stages = set(self._counts) | set(self._latencies)
+            stats = {}
+            for stage in sorted(stages):
+                samples = sorted(self._latencies[stage])
+                stats[stage] = dict(self._counts[stage])
+                if stats[stage].get("input_tokens"):
+                    stats[stage]["cached_token_ratio"] = round(
+                        stats[stage].get("cached_tokens", 0)
+                        / stats[stage]["input_tokens"],
+                        3,
+                    )
+                if samples:
+                    stats[stage]["p50_seconds"] = round(samples[len(samples) // 2], 3)
+                    stats[stage]["p95_seconds"] = round(
+                        samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3
+                    )
+            return stats
+
+
+_metrics = _StageMetrics()
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+# One slot per hedge pool thread; a hedge that finds none free is skipped
+_hedge_slots = threading.BoundedSemaphore(HEDGE_WORKERS)
+# Async hedge losers still running; the event loop only keeps weak references
+_pending_losers: set = set()
+
+
+def hedging_enabled() -> bool:
+    return os.getenv("EUREKA_HEDGE", "0") == "1"
+
+
+def _root_error(error: Exception) -> Exception:
+    """The provider error behind an Instructor retry wrapper, if any"""
+    failed_attempts = getattr(error, "failed_attempts", None)
+    if failed_attempts:
+        return failed_attempts[-1].exception
+    return error
+
+
+def _status_code(error: Exception):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _is_retryable(error: Exception) -> bool:
+    import groq
+    import httpx
+
+    if isinstance(error, (groq.APIConnectionError, httpx.TransportError)):
+        return True
+    return _status_code(error) in RETRYABLE_STATUS
+
+
+def _retry_after(error: Exception):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    return parse_duration(headers.get("retry-after"))
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential backoff, never shorter than retry-after"""
+    ceiling = min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt)
+    return max(random.uniform(0, ceiling), _retry_after(error) or 0.0)
+
+
+def _give_up(stage: str, error: Exception):
+    _metrics.count(stage, "failures")
+    status = 429 if _status_code(error) == 429 else 503
+    raise LLMUnavailableError(
+        f"LLM provider unavailable after retries: {error}",
+        status_code=status,
+        retry_after=_retry_after(error),
+    ) from error
+
+
+def _next_backoff(stage: str, attempt: int, error: Exception, deadline: float):
+    """
+    Seconds to wait before retrying error, or raise when out of retries or
+    time. Non-retryable errors propagate unchanged.
+    """
+    root = _root_error(error)
+    metrics.count_error("llm", root)
+    if isinstance(root.__cause__, CassetteMissError):
+        # The Groq SDK reports transport exceptions as connection errors
+        _metrics.count(stage, "errors")
+        raise root.__cause__
+    if not _is_retryable(root):
+        _metrics.count(stage, "errors")
+        raise error
+    if _status_code(root) == 429:
+        _metrics.count(stage, "rate_limited")
+    pause = _backoff(attempt, root)
+    if attempt >= MAX_RETRIES or time.monotonic() + pause >= deadline:
+        _give_up(stage, root)
+    _metrics.count(stage, "retries")
+    return pause
+
+
+def _rate_limit_delay(stage: str, deadline: float) -> float:
+    delay = _limiter.delay()
+    if delay and time.monotonic() + delay >= deadline:
+        _metrics.count(stage, "failures")
+        raise LLMUnavailableError(
+            "Rate limit window does not reset before the call deadline",
+            status_code=429,
+            retry_after=delay,
+        )
+    if delay:
+        _metrics.count(stage, "rate_limit_waits")
+    return delay
+
+
+def _usage_tokens(result) -> int:
+    """
+    Tokens spent on a response: exact for Instructor results, completion
+    tokens estimated from the serialized output otherwise
+    """
+    raw = getattr(result, "_raw_response", None)
+    usage = getattr(raw, "usage", None)
+    if usage is not None:
+        return usage.total_tokens
+    usage_metadata = getattr(result, "usage_metadata", None)
+    if usage_metadata:
+        return usage_metadata.get("total_tokens", 0)
+    if hasattr(result, "model_dump"):
+        result = result.model_dump()
+    try:
+        return len(json.dumps(result, default=str)) // 4
+    except TypeError:
+        return 0
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=HEDGE_WORKERS, thread_name_prefix="eureka-hedge"
+                )
+    return _hedge_executor
+
+
+def _start_primary(fn) -> Future:
+    """
+    fn() on a thread of its own: a pool would cap the process's concurrent
+    LLM calls, and running it on the request thread would leave that thread
+    blocked in the primary even after a hedge has answered
+    """
+    future = Future()
+    context = contextvars.copy_context()
+
+    def run():
+        try:
+            future.set_result(context.run(fn))
+        except BaseException as e:
+            future.set_exception(e)
+
+    future.set_running_or_notify_cancel()
+    threading.Thread(target=run, name="eureka-primary", daemon=True).start()
+    return future
+
+
+def _submit_hedge(fn) -> Optional[Future]:
+    """fn() on the hedge pool, or None when every hedge thread is busy"""
+    if not _hedge_slots.acquire(blocking=False):
+        return None
+    future = _get_hedge_executor().submit(contextvars.copy_context().run, fn)
+    future.add_done_callback(lambda _: _hedge_slots.release())
+    return future
+
+
+def _hedge_delay(stage: str):
+    if not hedging_enabled():
+        return None
+    p95 = _metrics.percentile(stage, 0.95)
+    return max(p95, HEDGE_MIN_DELAY) if p95 is not None else None
+
+
+def _count_wasted(stage: str):
+    def done(future):
+        if not future.cancelled() and future.exception() is None:
+            _metrics.count(stage, "wasted_tokens", _usage_tokens(future.result()))
+
+    return done
+
+
+def _hedged(stage: str, fn, delay: float):
+    """Run fn(), racing a duplicate if the first has not answered after delay"""
+    primary = _start_primary(fn)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    hedge = _submit_hedge(fn)
+    if hedge is None:
+        _metrics.count(stage, "hedges_skipped")
+        return primary.result()
+    _metrics.count(stage, "hedges")
+    pending = {primary, hedge}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    _metrics.count(stage, "hedges_won")
+                for loser in pending:
+                    loser.add_done_callback(_count_wasted(stage))
+                return future.result()
+    # Both attempts failed; surface the primary's error
+    return primary.result()
+
+
+async def _ahedged(stage: str, fn, delay: float):
+    """Async variant of _hedged(); fn is a coroutine function"""
+    primary = asyncio.ensure_future(fn())
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+
+    _metrics.count(stage, "hedges")
+    hedge = asyncio.ensure_future(fn())
+    pending = {primary, hedge}
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                if task is hedge:
+                    _metrics.count(stage, "hedges_won")
+                for loser in pending:
+                    # Left to finish, as a sync loser is, so its tokens count
+                    _pending_losers.add(loser)
+                    loser.add_done_callback(_pending_losers.discard)
+                    loser.add_done_callback(_count_wasted(stage))
+                return task.result()
+    return primary.result()
+
+
+def call(stage: str, fn, deadline: float = None):
+    """
+    Run fn() (one LLM request) with rate limiting, retries and hedging.
+
+    Args:
+        stage: metrics label, e.g. "refine" or "strategist"
+        fn: zero-argument callable issuing the request
+        deadline: seconds for the whole call including retries
+    """
+    deadline = time.monotonic() + (deadline or DEADLINE)
+    attempt = 0
+    while True:
+        pause = _rate_limit_delay(stage, deadline)
+        if pause:
+            time.sleep(pause)
+        _metrics.count(stage, "calls")
+        started = time.monotonic()
+        try:
+            delay = _hedge_delay(stage)
+            with _stage(stage):
+                result = fn() if delay is None else _hedged(stage, fn, delay)
+        except Exception as e:
+            time.sleep(_next_backoff(stage, attempt, e, deadline))
+            attempt += 1
+            continue
+        _metrics.record_latency(stage, time.monotonic() - started)
+        return result
+
+
+async def acall(stage: str, fn, deadline: float = None):
+    """Async variant of call(); fn is a coroutine function"""
+    deadline = time.monotonic() + (deadline or DEADLINE)
+    attempt = 0
+    while True:
+        pause = _rate_limit_delay(stage, deadline)
+        if pause:
+            await asyncio.sleep(pause)
+        _metrics.count(stage, "calls")
+        started = time.monotonic()
+        try:
+            delay = _hedge_delay(stage)
+            with _stage(stage):
+                result = await (fn() if delay is None else _ahedged(stage, fn, delay))
+        except Exception as e:
+            await asyncio.sleep(_next_backoff(stage, attempt, e, deadline))
+            attempt += 1
+            continue
+        _metrics.record_latency(stage, time.monotonic() - started)
+        return result
+
+
+def call_stream(stage: str, fn, deadline: float = None):
+    """
+    Iterate the stream returned by fn(), retrying like call() until the first
+    chunk arrives. Once output has been yielded errors propagate unchanged,
+    since a retry would repeat chunks the caller already consumed. Streams
+    are never hedged.
+    """
+    deadline = time.monotonic() + (deadline or DEADLINE)
+    attempt = 0
+    while True:
+        pause = _rate_limit_delay(stage, deadline)
+        if pause:
+            time.sleep(pause)
+        _metrics.count(stage, "calls")
+        started = time.monotonic()
+        try:
+            # The response hook picks the stage up when the request is sent
+            with _stage(stage):
+                iterator = iter(fn())
+                first = next(iterator)
+        except StopIteration:
+            return
+        except Exception as e:
+            time.sleep(_next_backoff(stage, attempt, e, deadline))
+            attempt += 1
+            continue
+        break
+    yield first
+    yield from iterator
+    _metrics.record_latency(stage, time.monotonic() - started)
+
+
+async def acall_stream(stage: str, fn, deadline: float = None):
+    """Async variant of call_stream(); fn returns an async iterator"""
+    deadline = time.monotonic() + (deadline or DEADLINE)
+    attempt = 0
+    while True:
+        pause = _rate_limit_delay(stage, deadline)
+        if pause:
+            await asyncio.sleep(pause)
+        _metrics.count(stage, "calls")
+        started = time.monotonic()
+        try:
+            with _stage(stage):
+                iterator = fn().__aiter__()
+                first = await iterator.__anext__()
+        except StopAsyncIteration:
+            return
+        except Exception as e:
+            await asyncio.sleep(_next_backoff(stage, attempt, e, deadline))
+            attempt += 1
+            continue
+        break
+    yield first
+    async for chunk in iterator:
+        yield chunk
+    _metrics.record_latency(stage, time.monotonic() - started)
+
+
+def count_repair():
+    """Count an output fixed locally by repair.py instead of being re-asked"""
+    _metrics.count(_current_stage.get() or "unattributed", "repairs")
+
+
+def validation_retries(
+    is_async: bool = False, attempts: int = 3, stage: str = "unattributed"
+):
+    """
+    Instructor max_retries that only re-asks on validation errors, leaving
+    provider errors to call()/acall(). Each re-ask is counted as the stage's
+    validation_retries.
+    """
+    from json import JSONDecodeError
+
+    from instructor.core.exceptions import ValidationError as InstructorValidationError
+    from pydantic import ValidationError
+    from tenacity import (
+        AsyncRetrying,
+        Retrying,
+        retry_if_exception_type,
+        stop_after_attempt,
+    )
+
+    retrying = AsyncRetrying if is_async else Retrying
+    return retrying(
+        stop=stop_after_attempt(attempts),
+        retry=retry_if_exception_type(
+            (ValidationError, JSONDecodeError, InstructorValidationError)
+        ),
+        before_sleep=lambda _: _metrics.count(stage, "validation_retries"),
+    )
+
+
+def stats() -> dict:
+    """Per-stage call/retry/hedge counters and the rate limiter state"""
+    return {
+        "stages": _metrics.stats(),
+        "rate_limit": _limiter.stats(),
+        "hedging": hedging_enabled(),
+    }
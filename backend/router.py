@@ -0,0 +1,297 @@
+"""
+Latency-aware model routing for Eureka's LLM stages
+
+Each stage ("refine", "strategist", "project_overview_planner", ...) has a
+pool of candidate models. Every attempt of a call picks one:
+
+    - models whose error rate over their recent outcomes is above
+      EUREKA_ROUTER_MAX_ERROR_RATE are skipped for EUREKA_ROUTER_COOLDOWN
+      seconds, then probed again with a fresh window
+    - a candidate with fewer than EUREKA_ROUTER_MIN_SAMPLES latencies for the
+      stage is tried first, so every model gets measured
+    - otherwise the healthy model with the lowest median latency for the
+      stage wins, except for an EUREKA_ROUTER_EXPLORE share of calls that go
+      to a random healthy candidate to keep the other measurements fresh
+
+call()/acall()/call_stream() wrap resilience's, so a retry after a failed
+attempt routes again, to a model that has not failed that call yet.
+
+Configuration (environment):
+    EUREKA_MODELS_<STAGE>          comma-separated pool for one stage, e.g.
+                                   EUREKA_MODELS_REFINE=llama-3.1-8b-instant,
+                                   meta-llama/llama-4-scout-17b-16e-instruct
+    EUREKA_MODELS                  pool for stages without their own
+    GROQ_MODEL                     single-model pool when neither is set
+                                   (default clients.DEFAULT_MODEL)
+    EUREKA_ROUTER_WINDOW           outcomes/latencies kept per model (default 50)
+    EUREKA_ROUTER_MIN_SAMPLES      latencies before a model is ranked (default 5)
+    EUREKA_ROUTER_MAX_ERROR_RATE   error rate that marks a model unhealthy
+                                   (default 0.25)
+    EUREKA_ROUTER_COOLDOWN         seconds an unhealthy model is skipped
+                                   (default 30)
+    EUREKA_ROUTER_EXPLORE          share of calls routed at random (default 0.05)
+"""
+
+from collections import Counter, defaultdict, deque
+import os
+import random
+import statistics
+import threading
+import time
+
+import clients
+import metrics
+import resilience
+
+WINDOW = int(os.getenv("EUREKA_ROUTER_WINDOW", "50"))
+MIN_SAMPLES = int(os.getenv("EUREKA_ROUTER_MIN_SAMPLES", "5"))
+MAX_ERROR_RATE = float(os.getenv("EUREKA_ROUTER_MAX_ERROR_RATE", "0.25"))
+COOLDOWN = float(os.getenv("EUREKA_ROUTER_COOLDOWN", "30"))
+EXPLORE = float(os.getenv("EUREKA_ROUTER_EXPLORE", "0.05"))
+
+
+def pool(stage: str) -> list:
+    """Candidate models for stage, in preference order"""
+    value = (
+        os.getenv(f"EUREKA_MODELS_{stage.upper()}")
+        or os.getenv("EUREKA_MODELS")
+        or os.getenv("GROQ_MODEL")
+        or clients.DEFAULT_MODEL
+    )
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+
+def pool_key(stage: str) -> str:
+    """
+    The stage's pool as one string, for cache keys: a response from any
+    model in the pool is reusable, a pool change is a new key
+    """
+    return ",".join(pool(stage))
+
+
+class Router:
+    """Rolling per-model health and per-stage latency, and the routing choice"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # model -> recent outcomes (True = success), shared by all stages
+        self._outcomes: dict = defaultdict(lambda: deque(maxlen=WINDOW))
+        # (stage, model) -> recent latencies in seconds
+        self._latencies: dict = defaultdict(lambda: deque(maxlen=WINDOW))
+        self._unhealthy_until: dict = {}
+        self._decisions: dict = defaultdict(Counter)
+        self._reasons: dict = defaultdict(Counter)
+        self._degraded: Counter = Counter()
+
+    def _healthy(self, model: str, now: float) -> bool:
+        until = self._unhealthy_until.get(model)
+        if until is None:
+            return True
+        if until > now:
+            return False
+        # Cooldown over: forget the failures and probe the model again
+        del self._unhealthy_until[model]
+        self._outcomes[model].clear()
+        return True
+
+    def choose(self, stage: str, failed: set = frozenset()) -> str:
+        """
+        The model for the next attempt; failed holds the models that failed
+        earlier attempts of the same call
+        """
+        candidates = pool(stage)
+        now = time.monotonic()
+        with self._lock:
+            healthy = [
+                model
+                for model in candidates
+                if self._healthy(model, now) and model not in failed
+            ]
+            if not healthy:
+                # Everything is degraded or failed: the one recovering soonest
+                choice = min(
+                    candidates, key=lambda m: self._unhealthy_until.get(m, now)
+                )
+                reason = "all_unhealthy"
+            elif len(healthy) == 1:
+                choice, reason = healthy[0], "only_healthy"
+            else:
+                unmeasured = [
+                    model
+                    for model in healthy
+                    if len(self._latencies[(stage, model)]) < MIN_SAMPLES
+                ]
+                if unmeasured:
+                    choice, reason = unmeasured[0], "measuring"
+                elif random.random() < EXPLORE:
+                    choice, reason = random.choice(healthy), "explore"
+                else:
+                    choice = min(
+                        healthy,
+                        key=lambda m: statistics.median(self._latencies[(stage, m)]),
+                    )
+                    reason = "fastest"
+            if len(candidates) == 1:
+                reason = "single_model"
+            elif healthy and (candidates[0] not in healthy or failed):
+                reason = "fallback"
+            self._decisions[stage][choice] += 1
+            self._reasons[stage][reason] += 1
+        return choice
+
+    def record(self, stage: str, model: str, ok: bool, latency: float = None):
+        metrics.observe_llm_call(stage, model, ok, latency)
+        with self._lock:
+            outcomes = self._outcomes[model]
+            outcomes.append(ok)
+            if ok and latency is not None:
+                self._latencies[(stage, model)].append(latency)
+            errors = outcomes.count(False)
+            if (
+                not ok
+                and len(outcomes) >= MIN_SAMPLES
+                and errors / len(outcomes) > MAX_ERROR_RATE
+                and model not in self._unhealthy_until
+            ):
+                self._unhealthy_until[model] = time.monotonic() + COOLDOWN
+                self._degraded[model] += 1
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            models = {}
+            for model, outcomes in self._outcomes.items():
+                until = self._unhealthy_until.get(model)
+                models[model] = {
+                    "healthy": until is None or until <= now,
+                    "error_rate": (
+                        round(outcomes.count(False) / len(outcomes), 3)
+                        if outcomes
+                        else 0.0
+                    ),
+                    "outcomes": len(outcomes),
+                    "times_degraded": self._degraded[model],
+                }
+            stages = {}
+            for stage in sorted(set(self._decisions) | set(pool_stages())):
+                stages[stage] = {
+                    "pool": pool(stage),
+                    "decisions": dict(self._decisions[stage]),
+                    "reasons": dict(self._reasons[stage]),
+                    "p50_seconds": {
+                        model: round(statistics.median(samples), 3)
+                        for (name, model), samples in self._latencies.items()
+                        if name == stage and samples
+                    },
+                }
+            return {"models": models, "stages": stages}
+
+
+def pool_stages() -> list:
+    """Stages with their own EUREKA_MODELS_<STAGE> pool"""
+    prefix = "EUREKA_MODELS_"
+    return [
+        name[len(prefix) :].lower() for name in os.environ if name.startswith(prefix)
+    ]
+
+
+def get_router() -> Router:
+    """Process-wide router"""
+    return clients.get_or_create("router", "default", Router)
+
+
+def _attempt(stage: str, fn, failed: set):
+    router = get_router()
+    model = router.choose(stage, failed)
+    started = time.monotonic()
+    try:
+        result = fn(model)
+    except Exception:
+        failed.add(model)
+        router.record(stage, model, False)
+        raise
+    router.record(stage, model, True, time.monotonic() - started)
+    return result
+
+
+async def _aattempt(stage: str, fn, failed: set):
+    router = get_router()
+    model = router.choose(stage, failed)
+    started = time.monotonic()
+    try:
+        result = await fn(model)
+    except Exception:
+        failed.add(model)
+        router.record(stage, model, False)
+        raise
+    router.record(stage, model, True, time.monotonic() - started)
+    return result
+
+
+def call(stage: str, fn):
+    """
+    resilience.call() of fn(model), routing every attempt; a retry goes to
+    another model than the ones that already failed this call, if any
+    """
+    failed = set()
+    return resilience.call(stage, lambda: _attempt(stage, fn, failed))
+
+
+async def acall(stage: str, fn):
+    """Async variant of call(); fn(model) returns an awaitable"""
+    failed = set()
+    return await resilience.acall(stage, lambda: _aattempt(stage, fn, failed))
+
+
+def _routed_stream(stage: str, fn, failed: set):
+    """
+    fn(model)'s stream, recording the model's outcome once the first chunk
+    arrives or fails; stream latencies are not ranked against whole calls
+    """
+    router = get_router()
+    model = router.choose(stage, failed)
+    first = True
+    try:
+        for chunk in fn(model):
+            if first:
+                router.record(stage, model, True)
+                first = False
+            yield chunk
+    except Exception:
+        if first:
+            failed.add(model)
+            router.record(stage, model, False)
+        raise
+
+
+async def _arouted_stream(stage: str, fn, failed: set):
+    router = get_router()
+    model = router.choose(stage, failed)
+    first = True
+    try:
+        async for chunk in fn(model):
+            if first:
+                router.record(stage, model, True)
+                first = False
+            yield chunk
+    except Exception:
+        if first:
+            failed.add(model)
+            router.record(stage, model, False)
+        raise
+
+
+def call_stream(stage: str, fn):
+    """resilience.call_stream() of fn(model), routing every attempt"""
+    failed = set()
+    return resilience.call_stream(stage, lambda: _routed_stream(stage, fn, failed))
+
+
+def acall_stream(stage: str, fn):
+    """Async variant of call_stream(); fn(model) returns an async iterator"""
+    failed = set()
+    return resilience.acall_stream(stage, lambda: _arouted_stream(stage, fn, failed))
+
+
+def stats() -> dict:
+    return get_router().stats()
@@ -0,0 +1,196 @@
+"""
+Semantic near-duplicate cache for refinement topics
+
+Topics are embedded locally as hashed n-gram vectors (word unigrams and
+bigrams plus character trigrams, sublinear TF, L2-normalized) so paraphrases
+that share most of their wording ("AI tutor for high school math" / "AI
+tutor for high-school math students") land close together without calling
+an embedding service. The index is one preallocated float32 matrix; a lookup
+is a single matrix-vector product.
+
+Hashed n-grams capture lexical overlap, not meaning, so keep the threshold
+high: a false hit serves another topic's questions.
+
+Configuration (environment):
+    EUREKA_SEMANTIC_CACHE              "1" enables the cache (default "0")
+    EUREKA_SEMANTIC_CACHE_THRESHOLD    minimum cosine similarity (default 0.85)
+    EUREKA_SEMANTIC_CACHE_MAX_ENTRIES  capacity before LRU eviction (default 10000)
+    EUREKA_SEMANTIC_CACHE_DIM          vector dimensions (default 256)
+    EUREKA_CACHE_TTL                   seconds an entry stays valid (default 3600)
+"""
+
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import metrics
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _features(text: str) -> list:
+    words = _WORD_RE.findall(text.casefold())
+    features = [f"w:{w}" for w in words]
+    features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    padded = f" {' '.join(words)} "
+    features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return features
+
+
+def vectorize(texts: list, dim: int = 256) -> np.ndarray:
+    """
+    Hashed n-gram vectors for texts, shape (len(texts), dim), L2-normalized
+    """
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature in _features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            # The sign bit keeps colliding features from always adding up
+            vectors[row, h % dim] += 1.0 if h & 0x80000000 else -1.0
+    # Sublinear term frequency, then unit length for cosine similarity
+    np.copysign(np.log1p(np.abs(vectors)), vectors, out=vectors)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+class SemanticCache:
+    """
+    Fixed-capacity cosine-similarity index from topic text to a cached value
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        max_entries: int = 10000,
+        dim: int = 256,
+        ttl: float = 3600.0,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.dim = dim
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((max_entries, dim), dtype=np.float32)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._texts: list = [None] * max_entries
+        self._values: list = [None] * max_entries
+        self._size = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "lookup_seconds": 0.0}
+
+    def _search(self, queries: np.ndarray, now: float):
+        """Best (slot, similarity) per query row among live entries"""
+        if self._size == 0:
+            return np.full(len(queries), -1), np.zeros(len(queries))
+        sims = self._matrix[: self._size] @ queries.T
+        sims[self._expires_at[: self._size] <= now] = -1.0
+        slots = sims.argmax(axis=0)
+        return slots, sims[slots, np.arange(len(queries))]
+
+    def lookup_many(self, texts: list) -> list:
+        """
+        Batched lookup; returns one (value, similarity) or None per text
+        """
+        queries = vectorize(texts, self.dim)
+        started = time.perf_counter()
+        results = []
+        with self._lock:
+            now = time.time()
+            slots, sims = self._search(queries, now)
+            for slot, sim in zip(slots, sims):
+                if slot >= 0 and sim >= self.threshold:
+                    self._last_used[slot] = now
+                    self._stats["hits"] += 1
+                    results.append((self._values[slot], float(sim)))
+                else:
+                    self._stats["misses"] += 1
+                    results.append(None)
+            self._stats["lookup_seconds"] += time.perf_counter() - started
+        hits = sum(result is not None for result in results)
+        metrics.count_cache("semantic", "hits", hits)
+        metrics.count_cache("semantic", "misses", len(results) - hits)
+        return results
+
+    def lookup(self, text: str):
+        """(value, similarity) of the closest cached topic above threshold, or None"""
+        return self.lookup_many([text])[0]
+
+    def _free_slot(self, now: float) -> int:
+        if self._size < self.max_entries:
+            self._size += 1
+            return self._size - 1
+        expired = np.flatnonzero(self._expires_at <= now)
+        if len(expired):
+            return int(expired[0])
+        # Evict the least recently used entry
+        self._stats["evictions"] += 1
+        return int(self._last_used.argmin())
+
+    def add_many(self, texts: list, values: list):
+        vectors = vectorize(texts, self.dim)
+        with self._lock:
+            now = time.time()
+            for text, value, vector in zip(texts, values, vectors):
+                slot = self._free_slot(now)
+                self._matrix[slot] = vector
+                self._expires_at[slot] = now + self.ttl
+                self._last_used[slot] = now
+                self._texts[slot] = text
+                self._values[slot] = value
+
+    def add(self, text: str, value):
+        self.add_many([text], [value])
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        lookup_seconds = stats.pop("lookup_seconds")
+        stats["avg_lookup_ms"] = (
+            round(lookup_seconds * 1000 / lookups, 4) if lookups else 0.0
+        )
+        stats["threshold"] = self.threshold
+        return stats
+
+
+_caches: dict = {}
+_caches_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return os.getenv("EUREKA_SEMANTIC_CACHE", "0") == "1"
+
+
+def get_semantic_cache(namespace: str) -> SemanticCache:
+    """
+    Process-wide semantic cache for a namespace. Include everything that
+    changes the output (model, prompt version, ...) in the namespace.
+    """
+    cache = _caches.get(namespace)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(namespace)
+            if cache is None:
+                cache = _caches[namespace] = SemanticCache(
+                    threshold=float(
+                        os.getenv("EUREKA_SEMANTIC_CACHE_THRESHOLD", "0.85")
+                    ),
+                    max_entries=int(
+                        os.getenv("EUREKA_SEMANTIC_CACHE_MAX_ENTRIES", "10000")
+                    ),
+                    dim=int(os.getenv("EUREKA_SEMANTIC_CACHE_DIM", "256")),
+                    ttl=float(os.getenv("EUREKA_CACHE_TTL", "3600")),
+                )
+    return cache
+
+
+def all_stats() -> dict:
+    return {namespace: cache.stats() for namespace, cache in sorted(_caches.items())}
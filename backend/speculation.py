@@ -0,0 +1,198 @@
+"""
+Speculative Strategist runs for Eureka
+
+The frontend calls /api/refine, lets the user answer the refinement
+questions, and only then calls /api/agents/plan, so the Strategist's whole
+latency used to land after the final click. With speculation enabled,
+serving /api/refine also starts the Strategist in the background for the
+topic alone and returns a session_token. A plan request that sends the token
+back claims that master prompt instead of calling the Strategist again;
+constraints sent with the plan are merged into it without another LLM call.
+Runs nobody claims within the TTL, or claimed with different inputs, are
+cancelled: a queued run never starts and a running one stops before or
+after its Strategist call (an LLM request already sent is not aborted).
+Runs are jobs of a JobManager, so with EUREKA_JOBS_DB set (see jobs.py) a
+token can be claimed, once, on any worker process; the TTL is enforced by
+the worker that started the run and by any worker asked to claim it.
+
+Configuration (environment):
+    EUREKA_SPECULATE             "1" to start speculative runs (default "0")
+    EUREKA_SPECULATE_TTL         seconds an unclaimed run is kept (default 600)
+    EUREKA_SPECULATE_WORKERS     concurrent speculative runs (default 2)
+    EUREKA_SPECULATE_QUEUE_SIZE  queued runs before new ones are skipped (default 50)
+    EUREKA_SPECULATE_WAIT        seconds a plan request waits for a run that is
+                                 still in progress (default 30)
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+import clients
+from jobs import SUCCEEDED, JobManager, QueueFullError
+
+_lock = threading.Lock()
+# session token -> created_at for runs this process started and nobody has
+# claimed yet, for expiry
+_pending: dict = {}
+_counts = {
+    "started": 0,
+    "skipped": 0,
+    "hits": 0,
+    "misses": 0,
+    "mismatches": 0,
+    "late": 0,
+    "failed": 0,
+    "expired": 0,
+}
+_saved_seconds_total = 0.0
+
+
+def enabled() -> bool:
+    return os.getenv("EUREKA_SPECULATE", "0") == "1"
+
+
+def _ttl() -> float:
+    return float(os.getenv("EUREKA_SPECULATE_TTL", "600"))
+
+
+def get_speculation_jobs() -> JobManager:
+    """Process-wide job manager for speculative Strategist runs"""
+    return clients.get_or_create(
+        "job_manager",
+        "speculation",
+        lambda: JobManager(
+            max_workers=int(os.getenv("EUREKA_SPECULATE_WORKERS", "2")),
+            max_queue=int(os.getenv("EUREKA_SPECULATE_QUEUE_SIZE", "50")),
+            ttl=_ttl(),
+            db_path=os.getenv("EUREKA_JOBS_DB") or None,
+            name="speculation",
+        ),
+    )
+
+
+def _speculate(job, topic: str) -> dict:
+    """JobManager target: the Strategist's master prompt for the topic alone"""
+    from agents import speculative_master_prompt
+
+    return speculative_master_prompt(topic, cancel_event=job.cancel_event)
+
+
+def expire():
+    """Cancel runs that were not claimed within the TTL"""
+    cutoff = time.time() - _ttl()
+    with _lock:
+        expired = [t for t, created in _pending.items() if created < cutoff]
+        for token in expired:
+            del _pending[token]
+    manager = get_speculation_jobs()
+    # Runs claimed meanwhile (maybe by another worker) are not expired
+    expired = [token for token in expired if manager.take(token)]
+    with _lock:
+        _counts["expired"] += len(expired)
+    for token in expired:
+        manager.cancel(token)
+
+
+def start(topic: str) -> Optional[str]:
+    """
+    Start a speculative Strategist run for topic and return its session
+    token, or None when speculation is disabled or its queue is full
+    """
+    if not enabled():
+        return None
+    expire()
+    try:
+        job = get_speculation_jobs().submit(_speculate, topic=topic)
+    except QueueFullError:
+        with _lock:
+            _counts["skipped"] += 1
+        return None
+    with _lock:
+        _pending[job.id] = job.created_at
+        _counts["started"] += 1
+    return job.id
+
+
+def _with_constraints(master_prompt: dict, constraints: str) -> dict:
+    """The speculative master prompt with the user's constraints merged in"""
+    if not constraints:
+        return master_prompt
+    requirements = dict(master_prompt.get("constraints_and_requirements") or {})
+    requirements["user_constraints"] = constraints
+    return {**master_prompt, "constraints_and_requirements": requirements}
+
+
+def claim(
+    token: Optional[str], topic: str, user_idea: str, constraints: str = ""
+) -> Optional[dict]:
+    """
+    The master prompt of the speculative run behind token, refined with
+    constraints, or None when there is nothing usable (unknown or expired
+    token, different inputs, failed run or one still running after
+    EUREKA_SPECULATE_WAIT seconds). Blocks while the run finishes.
+    """
+    global _saved_seconds_total
+    if not token:
+        return None
+    expire()
+    with _lock:
+        _pending.pop(token, None)
+    manager = get_speculation_jobs()
+
+    def miss(reason: str):
+        with _lock:
+            _counts[reason] += 1
+        manager.cancel(token)
+        return None
+
+    job = manager.get(token)
+    # Unknown, expired, or already claimed: each run is used at most once
+    if job is None or job.created_at < time.time() - _ttl() or not manager.take(token):
+        return miss("misses")
+    # The run only saw the topic; a different idea needs a fresh Strategist call
+    if job.params.get("topic") != topic or user_idea not in (topic, ""):
+        return miss("mismatches")
+
+    started = time.monotonic()
+    job = manager.wait(token, float(os.getenv("EUREKA_SPECULATE_WAIT", "30")))
+    waited = time.monotonic() - started
+    if job is None:
+        return miss("misses")
+    if not job.finished.is_set():
+        return miss("late")
+    if job.status != SUCCEEDED:
+        return miss("failed")
+
+    # The Strategist time this request did not have to wait for
+    saved = max(0.0, (job.finished_at - job.started_at) - waited)
+    with _lock:
+        _counts["hits"] += 1
+        _saved_seconds_total += saved
+    return _with_constraints(job.result, constraints)
+
+
+def stats() -> dict:
+    expire()
+    with _lock:
+        counts = dict(_counts)
+        pending = len(_pending)
+        saved = _saved_seconds_total
+    claims = sum(counts[k] for k in ("hits", "misses", "mismatches", "late", "failed"))
+    return {
+        "enabled": enabled(),
+        "pending": pending,
+        **counts,
+        # Share of plan requests with a session token that reused a run
+        "hit_rate": round(counts["hits"] / claims, 4) if claims else 0.0,
+        # Share of started runs whose result was used
+        "used_rate": (
+            round(counts["hits"] / counts["started"], 4) if counts["started"] else 0.0
+        ),
+        "saved_seconds_total": round(saved, 3),
+        "avg_saved_seconds": (
+            round(saved / counts["hits"], 3) if counts["hits"] else 0.0
+        ),
+        "jobs": get_speculation_jobs().stats(),
+    }
@@ -0,0 +1,387 @@
+"""
+Persistent store of generated refine results and plans
+
+Every successful /api/refine and /api/agents/plan response is saved to a
+local SQLite file, so a plan can be opened again without another LLM run:
+
+    - results are kept as zlib-compressed JSON blobs (typically ~4x smaller)
+    - a request saved twice (same cache key) keeps its first id, so ids are
+      stable per request; when the result differs (recomputed after the
+      response cache expired) the stored content is replaced by the new one,
+      so /api/<kind>/<id> always serves what the request last returned
+    - lists are indexed by topic hash and creation time and paginated with a
+      keyset cursor, so a page costs the same at any depth
+    - each item's ETag is a hash of its JSON, stored with it, so a
+      conditional GET is answered without reading or decompressing the blob
+
+Saving never fails a request: store errors are logged and the response
+simply carries no id. A database that cannot be opened (missing directory,
+read-only working directory) is logged once and persistence stays off for
+the process.
+
+Configuration (environment):
+    EUREKA_STORE       "0" disables saving and the store endpoints (default "1")
+    EUREKA_STORE_DB    path of the SQLite file (default eureka_store.db)
+    EUREKA_STORE_PAGE  default page size of list endpoints (default 20,
+                       at most 100)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+
+import clients
+from cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Paths whose database could not be opened; not retried by this process
+_unavailable: set = set()
+_unavailable_lock = threading.Lock()
+
+MAX_PAGE = 100
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS stored_results (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        request_hash BLOB NOT NULL,
+        topic_hash INTEGER NOT NULL,
+        topic TEXT NOT NULL,
+        user_idea TEXT NOT NULL DEFAULT '',
+        mode TEXT NOT NULL DEFAULT '',
+        created_at REAL NOT NULL,
+        size INTEGER NOT NULL,
+        etag TEXT NOT NULL,
+        body BLOB NOT NULL
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS stored_results_request"
+    " ON stored_results (kind, request_hash)",
+    "CREATE INDEX IF NOT EXISTS stored_results_created"
+    " ON stored_results (kind, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS stored_results_topic"
+    " ON stored_results (kind, topic_hash, created_at, id)",
+)
+
+# A request saved again keeps its row (and id); changed content replaces
+# the stored one, identical content leaves the row untouched
+_UPSERT = (
+    "INSERT INTO stored_results (kind, request_hash, topic_hash, topic,"
+    " user_idea, mode, created_at, size, etag, body)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT (kind, request_hash) DO UPDATE SET"
+    " size = excluded.size, etag = excluded.etag, body = excluded.body"
+    " WHERE stored_results.etag != excluded.etag"
+)
+
+# Columns of a list entry; the blob is only read for a single item
+_SUMMARY = "id, topic, user_idea, mode, created_at, size, etag"
+
+
+def enabled() -> bool:
+    return os.getenv("EUREKA_STORE", "1") != "0"
+
+
+def page_size(value=None) -> int:
+    """
+    The page size for a request's limit parameter, clamped to 1..MAX_PAGE;
+    raises ValueError when it is not a number
+    """
+    try:
+        size = int(value or os.getenv("EUREKA_STORE_PAGE", "20"))
+    except ValueError:
+        raise ValueError("Invalid limit: must be a number") from None
+    return min(MAX_PAGE, max(1, size))
+
+
+def topic_hash(topic: str) -> int:
+    """Signed 64-bit hash of the normalized topic, the topic index key"""
+    digest = hashlib.sha256(normalize_text(topic).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def _encode(result) -> tuple:
+    """(compressed blob, uncompressed size, etag) of a result"""
+    raw = json.dumps(result, separators=(",", ":")).encode("utf-8")
+    etag = hashlib.blake2b(raw, digest_size=16).hexdigest()
+    return zlib.compress(raw, 6), len(raw), etag
+
+
+def parse_cursor(cursor: Optional[str]):
+    """(created_at, id) from a next_cursor value, None for the first page"""
+    if not cursor:
+        return None
+    try:
+        created_at, item_id = cursor.split(":")
+        return float(created_at), int(item_id)
+    except ValueError:
+        raise ValueError("Invalid cursor") from None
+
+
+def _summary(row) -> dict:
+    item_id, topic, user_idea, mode, created_at, size, etag = row
+    summary = {"id": item_id, "topic": topic, "created_at": created_at}
+    if user_idea:
+        summary["user_idea"] = user_idea
+    if mode:
+        summary["mode"] = mode
+    summary.update(size=size, etag=etag)
+    return summary
+
+
+class ResultStore:
+    """SQLite store of compressed results; one connection per thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counts = {
+            "saved": 0,
+            "updated": 0,
+            "duplicates": 0,
+            "json_bytes": 0,
+            "blob_bytes": 0,
+        }
+        conn = self._connect()
+        for statement in _SCHEMA:
+            conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def save(
+        self,
+        kind: str,
+        request_key: str,
+        topic: str,
+        result,
+        user_idea: str = "",
+        mode: str = "",
+    ) -> tuple:
+        """
+        Store result and return its (id, etag); a request_key saved before
+        keeps its id, with its content replaced when result differs
+        """
+        body, size, etag = _encode(result)
+        request_hash = bytes.fromhex(request_key)[:16]
+        created_at = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            f"{_UPSERT} RETURNING id, etag, created_at",
+            (
+                kind,
+                request_hash,
+                topic_hash(topic),
+                topic,
+                user_idea,
+                mode,
+                created_at,
+                size,
+                etag,
+                body,
+            ),
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self._counts["duplicates"] += 1
+            else:
+                # An updated row keeps its original created_at
+                self._counts["saved" if row[2] == created_at else "updated"] += 1
+                self._counts["json_bytes"] += size
+                self._counts["blob_bytes"] += len(body)
+        if row is None:
+            # Unchanged content: the upsert left the row alone
+            return conn.execute(
+                "SELECT id, etag FROM stored_results"
+                " WHERE kind = ? AND request_hash = ?",
+                (kind, request_hash),
+            ).fetchone()
+        return row[:2]
+
+    def save_many(self, kind: str, items) -> int:
+        """
+        Bulk variant of save() in one transaction, for imports: items yields
+        (request_key, topic, result, fields) tuples. Returns the rows added
+        or changed.
+        """
+        rows = []
+        for request_key, topic, result, fields in items:
+            body, size, etag = _encode(result)
+            rows.append(
+                (
+                    kind,
+                    bytes.fromhex(request_key)[:16],
+                    topic_hash(topic),
+                    topic,
+                    fields.get("user_idea", ""),
+                    fields.get("mode", ""),
+                    fields.get("created_at", time.time()),
+                    size,
+                    etag,
+                    body,
+                )
+            )
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            before = conn.total_changes
+            conn.executemany(_UPSERT, rows)
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def etag(self, kind: str, item_id: int) -> Optional[str]:
+        """The item's ETag without reading its blob, or None when missing"""
+        row = (
+            self._connect()
+            .execute(
+                "SELECT etag FROM stored_results WHERE id = ? AND kind = ?",
+                (item_id, kind),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def get(self, kind: str, item_id: int) -> Optional[dict]:
+        row = (
+            self._connect()
+            .execute(
+                f"SELECT {_SUMMARY}, body FROM stored_results"
+                " WHERE id = ? AND kind = ?",
+                (item_id, kind),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        item = _summary(row[:-1])
+        item["result"] = json.loads(zlib.decompress(row[-1]))
+        return item
+
+    def list(
+        self,
+        kind: str,
+        topic: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> tuple:
+        """
+        One page of item summaries, newest first, optionally for one topic,
+        and the cursor of the next page (None on the last one)
+        """
+        where, params = ["kind = ?"], [kind]
+        if topic:
+            where.append("topic_hash = ?")
+            params.append(topic_hash(topic))
+        after = parse_cursor(cursor)
+        if after is not None:
+            where.append("(created_at, id) < (?, ?)")
+            params.extend(after)
+        rows = (
+            self._connect()
+            .execute(
+                f"SELECT {_SUMMARY} FROM stored_results WHERE {' AND '.join(where)}"
+                " ORDER BY created_at DESC, id DESC LIMIT ?",
+                (*params, limit + 1),
+            )
+            .fetchall()
+        )
+        items = [_summary(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = f"{last['created_at']!r}:{last['id']}"
+        return items, next_cursor
+
+    def stats(self) -> dict:
+        """Saves by this process (counting rows would scan the table)"""
+        with self._lock:
+            stats = dict(self._counts)
+        stats["compression_ratio"] = (
+            round(stats["json_bytes"] / stats["blob_bytes"], 2)
+            if stats["blob_bytes"]
+            else 0.0
+        )
+        try:
+            stats["file_bytes"] = os.path.getsize(self.path)
+        except OSError:
+            stats["file_bytes"] = 0
+        return stats
+
+
+def get_store() -> Optional[ResultStore]:
+    """Process-wide store, or None when disabled or its database cannot be opened"""
+    if not enabled():
+        return None
+    path = os.getenv("EUREKA_STORE_DB", "eureka_store.db")
+    if path in _unavailable:
+        return None
+    try:
+        return clients.get_or_create("result_store", path, lambda: ResultStore(path))
+    except (sqlite3.Error, OSError) as e:
+        with _unavailable_lock:
+            first = path not in _unavailable
+            _unavailable.add(path)
+        if first:
+            logger.warning("Result store disabled, cannot open %s: %s", path, e)
+        return None
+
+
+def save(kind: str, request_key: str, topic: str, result, **fields) -> Optional[int]:
+    """Store a response's result; its id, or None when not stored"""
+    store = get_store()
+    if store is None:
+        return None
+    try:
+        item_id, _ = store.save(kind, request_key, topic, result, **fields)
+    except sqlite3.Error as e:
+        logger.warning("Result not stored: %s", e)
+        return None
+    return item_id
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/").strip('"') == etag:
+            return True
+    return False
+
+
+def list_etag(items: list, next_cursor: Optional[str]) -> str:
+    """
+    ETag of a list page: the ids and ETags of its items (an item's content
+    is replaced when its request is saved again) and the next cursor
+    """
+    entries = ",".join(f"{item['id']}:{item['etag']}" for item in items)
+    return hashlib.blake2b(
+        f"{entries}|{next_cursor}".encode(), digest_size=16
+    ).hexdigest()
+
+
+def stats() -> dict:
+    store = get_store()
+    if store is None:
+        return {"enabled": False}
+    return {"enabled": True, "path": store.path, **store.stats()}
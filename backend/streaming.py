@@ -0,0 +1,32 @@
+"""
+Server-Sent Events and NDJSON helpers for Eureka's streaming endpoints
+"""
+
+import json
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx-style proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data) -> str:
+    """Format one SSE frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def ndjson_line(data) -> str:
+    """Format one newline-delimited JSON record"""
+    return json.dumps(data, separators=(",", ":")) + "\n"
+
+
+def completed_items(partial: dict, key: str) -> list:
+    """
+    Return the items of partial[key] that are known to be complete.
+
+    While a JSON list is still being generated only its last element can be
+    partial, so every element before it is final.
+    """
+    items = (partial or {}).get(key) or []
+    return items[:-1]
@@ -0,0 +1,35 @@
+"""
+Pytest configuration for the backend tests
+
+The tests drive the Flask app with its Groq traffic replayed from
+tests/cassettes/groq.jsonl.gz in strict mode, so they need no network
+access or API key, and a request missing from the cassette fails with
+CassetteMissError. After changing a prompt, model or output schema,
+re-record the cassette against Groq from backend/:
+
+    rm tests/cassettes/groq.jsonl.gz
+    EUREKA_CASSETTE=record GROQ_API_KEY=... python -m pytest
+"""
+
+import os
+
+import pytest
+
+CASSETTE = os.path.join(os.path.dirname(__file__), "cassettes", "groq.jsonl.gz")
+
+# Set before the app is imported: clients read them when first built
+os.environ.setdefault("EUREKA_CASSETTE", "replay")
+os.environ.setdefault("EUREKA_CASSETTE_STRICT", "1")
+os.environ["EUREKA_CASSETTE_PATH"] = CASSETTE
+os.environ.setdefault("GROQ_API_KEY", "replay")
+# Every test reaches the transport instead of a cached response
+os.environ["EUREKA_CACHE"] = "0"
+os.environ["EUREKA_STORE"] = "0"
+os.environ["EUREKA_TRACING"] = "0"
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app import app
+
+    return app.test_client()
@@ -0,0 +1,61 @@
+"""Agent workflow helpers: per-run locks and plan cache keys"""
+
+import asyncio
+import threading
+
+import pytest
+
+import agents
+import clients
+from cache import cache_key
+
+
+def test_run_locks_are_per_key_and_dropped_after_use():
+    with agents._run_lock("a"):
+        # Another key is free while "a" is held
+        with agents._run_lock("b"):
+            pass
+        assert set(agents._run_locks) == {"a"}
+
+        # The same key waits, in sync and async runs alike
+        acquired = threading.Event()
+
+        def hold_a():
+            with agents._run_lock("a"):
+                acquired.set()
+
+        waiter = threading.Thread(target=hold_a)
+        waiter.start()
+        assert not acquired.wait(0.05)
+
+        async def try_async():
+            async with agents._arun_lock("a"):
+                pass
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(try_async(), 0.05))
+        assert agents._run_locks["a"][1] == 2
+
+    waiter.join(1)
+    assert acquired.is_set()
+    assert agents._run_locks == {}
+
+
+def test_plan_cache_key_includes_the_model_pool(monkeypatch):
+    for name in ("GROQ_MODEL", "EUREKA_MODELS"):
+        monkeypatch.delenv(name, raising=False)
+    for stage in ("strategist", "project_overview_planner"):
+        monkeypatch.delenv(f"EUREKA_MODELS_{stage.upper()}", raising=False)
+    fields = {"topic": "t", "user_idea": "i", "constraints": ""}
+
+    # The default pool keys full plans as the hardcoded model did
+    assert agents.plan_cache_key("t", "i") == cache_key(
+        "plan",
+        fields,
+        model=clients.DEFAULT_MODEL,
+        temperature=agents.AGENT_TEMPERATURE,
+        prompt_version=agents.AGENTS_PROMPT_VERSION,
+    )
+    default_key = agents.plan_cache_key("t", "i")
+    monkeypatch.setenv("GROQ_MODEL", "another-model")
+    assert agents.plan_cache_key("t", "i") != default_key
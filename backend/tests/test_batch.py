@@ -0,0 +1,99 @@
+"""Batch refinement: rate limiting, completion order and per-topic errors"""
+
+import asyncio
+import time
+
+import pytest
+
+import batch
+
+
+def test_token_bucket_reserves_future_tokens():
+    bucket = batch.TokenBucket(rate=10, capacity=2)
+
+    delays = [bucket._reserve() for _ in range(4)]
+
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2:] == pytest.approx([0.1, 0.2], abs=0.01)
+    assert batch.TokenBucket(rate=0)._reserve() == 0.0
+
+
+def test_validate_topics_and_concurrency():
+    assert batch.validate_topics([]) is not None
+    assert batch.validate_topics("topic") is not None
+    assert batch.validate_topics(["topic"]) is None
+    assert batch.batch_concurrency("2") == 2
+    assert batch.batch_concurrency(0) == 1
+    assert batch.batch_concurrency("many") == batch.DEFAULT_CONCURRENCY
+
+
+@pytest.fixture
+def unlimited(monkeypatch):
+    monkeypatch.setattr(batch, "get_rate_limiter", lambda: batch.TokenBucket(0))
+
+
+# Earlier topics finish later, so completion order differs from input
+DELAYS = {"slow": 0.05}
+
+
+def _result(topic):
+    if topic == "fails":
+        raise RuntimeError("provider error")
+    return {"topic": topic}
+
+
+def _check(items):
+    summary = items.pop()
+    assert summary["done"] and summary["total"] == 4 and summary["failed"] == 2
+    assert [item["topic"] for item in items][-1] == "slow"
+    by_topic = {item["topic"]: item for item in items}
+    assert by_topic["slow"]["result"] == {"topic": "slow"}
+    assert by_topic["fails"]["error"] == "provider error"
+    assert by_topic[" "]["error"] == batch.INVALID_TOPIC
+    assert sorted(item["index"] for item in items) == [0, 1, 2, 3]
+
+
+def test_refine_batch(monkeypatch, unlimited):
+    def refine(topic):
+        time.sleep(DELAYS.get(topic, 0))
+        return _result(topic)
+
+    monkeypatch.setattr(batch, "refine_topic", refine)
+
+    _check(list(batch.refine_batch(["slow", "fast", "fails", " "], concurrency=4)))
+
+
+def test_arefine_batch(monkeypatch, unlimited):
+    async def arefine(topic):
+        await asyncio.sleep(DELAYS.get(topic, 0))
+        return _result(topic)
+
+    monkeypatch.setattr(batch, "arefine_topic", arefine)
+
+    async def collect():
+        topics = ["slow", "fast", "fails", " "]
+        return [item async for item in batch.arefine_batch(topics, concurrency=4)]
+
+    _check(asyncio.run(collect()))
+
+
+def test_elapsed_seconds_leave_out_the_wait_for_a_slot(monkeypatch, unlimited):
+    def refine(topic):
+        time.sleep(0.05)
+        return _result(topic)
+
+    async def arefine(topic):
+        await asyncio.sleep(0.05)
+        return _result(topic)
+
+    monkeypatch.setattr(batch, "refine_topic", refine)
+    monkeypatch.setattr(batch, "arefine_topic", arefine)
+
+    async def collect():
+        return [item async for item in batch.arefine_batch(["a", "b"], 1)]
+
+    for items in (list(batch.refine_batch(["a", "b"], 1)), asyncio.run(collect())):
+        summary = items.pop()
+        # One slot: the second topic waits for the first, but is timed alike
+        assert summary["elapsed_seconds"] >= 0.1
+        assert [item["elapsed_seconds"] < 0.09 for item in items] == [True, True]
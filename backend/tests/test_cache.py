@@ -0,0 +1,112 @@
+"""The response cache: lookups and single-flight coalescing"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from cache import ResponseCache
+
+
+def test_concurrent_misses_share_one_compute():
+    cache = ResponseCache("test")
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"value": 1}
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_compute("key", compute))
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == [{"value": 1}] * 5
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_leader_error_reaches_followers_and_is_not_cached():
+    cache = ResponseCache("test")
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("provider error")
+
+    errors = []
+
+    def run():
+        try:
+            cache.get_or_compute("key", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=run)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=run)
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ["provider error"] * 2
+    assert cache.get("key") is None
+    assert cache.get_or_compute("key", lambda: "recovered") == "recovered"
+
+
+def test_entries_expire_and_evict():
+    cache = ResponseCache("test", max_entries=2, ttl=60)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+
+    cache.ttl = -1
+    cache.set("d", "d")
+    assert cache.get("d") is None
+    stats = cache.stats()
+    assert (stats["evictions"], stats["expirations"]) == (2, 1)
+
+
+def test_cancelled_async_leader_hands_over_to_a_follower():
+    cache = ResponseCache("test")
+    calls = []
+
+    async def compute():
+        calls.append(len(calls))
+        await asyncio.sleep(0.05)
+        return {"call": len(calls)}
+
+    async def scenario():
+        leader = asyncio.create_task(cache.aget_or_compute("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.aget_or_compute("key", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    # The follower is not failed with the leader's cancellation; it runs
+    # compute() itself and caches the value
+    assert asyncio.run(scenario()) == {"call": 2}
+    assert len(calls) == 2
+    assert cache.get("key") == {"call": 2}
+    assert cache._ainflight == {}
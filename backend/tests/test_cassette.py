@@ -0,0 +1,52 @@
+"""Recording and replaying streamed responses"""
+
+import httpx
+
+from cassette import Cassette, CassetteTransport
+
+CHUNKS = [b'data: {"n": 1}\n\n', b'data: {"n": 2}\n\n', b"data: [DONE]\n\n"]
+
+
+def streaming_transport(calls: list) -> httpx.MockTransport:
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            stream=_Chunks(CHUNKS),
+        )
+
+    return httpx.MockTransport(handler)
+
+
+class _Chunks(httpx.SyncByteStream):
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    def __iter__(self):
+        yield from self._chunks
+
+
+def stream_chunks(client: httpx.Client) -> list:
+    with client.stream("POST", "http://groq.test/v1/chat", json={"q": 1}) as r:
+        return list(r.iter_raw())
+
+
+def test_stream_is_recorded_and_replayed_chunk_by_chunk(tmp_path):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    calls = []
+
+    recording = Cassette(path, mode="record")
+    client = httpx.Client(
+        transport=CassetteTransport(streaming_transport(calls), recording)
+    )
+    assert stream_chunks(client) == CHUNKS
+    assert recording.stats()["recorded"] == 1
+
+    replaying = Cassette(path, mode="replay", strict=True)
+    client = httpx.Client(
+        transport=CassetteTransport(streaming_transport(calls), replaying)
+    )
+    assert stream_chunks(client) == CHUNKS
+    assert len(calls) == 1
+    assert replaying.stats()["hits"] == 1
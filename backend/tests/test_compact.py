@@ -0,0 +1,70 @@
+"""Compact responses: message dedupe and content negotiation"""
+
+import gzip
+
+import orjson
+import pytest
+
+import compact
+
+RESULT = {
+    "master_prompt": {"objective": "o"},
+    "strategic_roadmap": {"phases": ["p"]},
+    "messages": [
+        {"agent": "strategist", "content": {"objective": "o"}},
+        {
+            "agent": "fast_planner",
+            "content": {
+                "master_prompt": {"objective": "o"},
+                "strategic_roadmap": {"phases": ["p"]},
+            },
+        },
+        {"agent": "other", "content": {"objective": "different"}},
+    ],
+}
+
+
+def test_dedupe_and_expand_round_trip():
+    compacted = compact.dedupe_messages(RESULT)
+
+    assert [message.get("ref") for message in compacted["messages"]] == [
+        "master_prompt",
+        ["master_prompt", "strategic_roadmap"],
+        None,
+    ]
+    assert compact.expand_messages(compacted) == RESULT
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, with_brotli, expected",
+    [
+        (None, True, None),
+        ("identity", True, None),
+        ("gzip", True, "gzip"),
+        ("gzip, br", True, "br"),
+        ("gzip, br", False, "gzip"),
+        ("br;q=0.5, gzip;q=0.8", True, "gzip"),
+        ("gzip;q=0, br;q=0", True, None),
+        ("*", True, "br"),
+        ("*, br;q=0", True, "gzip"),
+        ("gzip;q=bad, br;q=0", True, None),
+    ],
+)
+def test_negotiate(monkeypatch, accept_encoding, with_brotli, expected):
+    # Only whether the module is available matters here
+    monkeypatch.setattr(compact, "brotli", object() if with_brotli else None)
+    assert compact.negotiate(accept_encoding) == expected
+
+
+def test_encode_compresses_only_large_bodies(monkeypatch):
+    monkeypatch.setenv("EUREKA_COMPRESS_MIN_BYTES", "100")
+    monkeypatch.setattr(compact, "brotli", None)
+
+    body, headers = compact.encode({"small": 1}, "gzip")
+    assert orjson.loads(body) == {"small": 1}
+    assert headers == {"Vary": "Accept-Encoding"}
+
+    payload = {"large": "x" * 200}
+    body, headers = compact.encode(payload, "gzip, br")
+    assert headers["Content-Encoding"] == "gzip"
+    assert orjson.loads(gzip.decompress(body)) == payload
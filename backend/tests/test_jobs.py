@@ -0,0 +1,61 @@
+"""Background jobs, including jobs shared between worker processes"""
+
+import threading
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two managers on one shared file, as two worker processes have"""
+    path = str(tmp_path / "jobs.db")
+    return jobs.JobManager(db_path=path), jobs.JobManager(db_path=path)
+
+
+def test_another_worker_sees_progress_and_result(workers):
+    owner, other = workers
+    release = threading.Event()
+
+    def target(job, topic):
+        job.update_progress(stage="planning")
+        release.wait(5)
+        return {"topic": topic}
+
+    job = owner.submit(target, topic="t")
+    assert other.get(job.id).params == {"topic": "t"}
+    assert other.wait(job.id, 0.1).status == jobs.RUNNING
+    assert other.get(job.id).progress == {"stage": "planning"}
+
+    release.set()
+    polled = other.wait(job.id, 5)
+    assert polled.status == jobs.SUCCEEDED
+    assert polled.to_dict()["result"] == {"topic": "t"}
+    assert other.get("unknown") is None
+
+
+def test_another_worker_cancels_a_running_job(workers):
+    owner, other = workers
+    started = threading.Event()
+
+    def target(job):
+        started.set()
+        while not job.cancel_event.is_set():
+            job.cancel_event.wait(0.01)
+
+    job = owner.submit(target)
+    started.wait(5)
+    assert other.cancel(job.id).status == jobs.CANCELLING
+
+    assert owner.wait(job.id, 5).status == jobs.CANCELLED
+    assert other.get(job.id).status == jobs.CANCELLED
+
+
+def test_a_job_is_taken_once_across_workers(workers):
+    owner, other = workers
+    job = owner.submit(lambda job: None)
+
+    assert other.take(job.id)
+    assert not owner.take(job.id)
+    assert not other.take("unknown")
@@ -0,0 +1,69 @@
+"""Local repair of structured output before validation"""
+
+import pydantic
+import pytest
+
+import repair
+from models import Category, MasterPromptOutput, RefinementResult
+
+
+def test_truncate_prefers_a_sentence_end():
+    assert repair.truncate("Short.", 10) == "Short."
+    assert repair.truncate("First part. Second part runs on", 20) == "First part."
+    assert repair.truncate("one two three four five", 12) == "one two…"
+
+
+def test_category_overflows_are_trimmed():
+    category = Category.model_validate(
+        {
+            "name": "A category name that goes well past fifty characters",
+            # Bare strings for single-field questions, one duplicate, one extra
+            "questions": ["Why?", "Why?", "How?", "When?", "Where?"],
+        }
+    )
+
+    assert len(category.name) <= 50
+    assert [q.question for q in category.questions] == ["Why?", "How?", "When?"]
+
+
+def test_duplicates_are_kept_when_dropping_them_breaks_min_length():
+    category = Category.model_validate({"name": "n", "questions": ["Why?", "Why?"]})
+
+    assert len(category.questions) == 2
+
+
+def test_dict_and_list_fields_are_coerced():
+    output = MasterPromptOutput.model_validate(
+        {
+            "objective": "o",
+            "goals": "one goal",
+            "constraints_and_requirements": '{"budget": "low"}',
+            "success_criteria": ["fast", "cheap"],
+            "key_deliverables": ["d"],
+            "technical_considerations": "plain text",
+        }
+    )
+
+    assert output.goals == ["one goal"]
+    assert output.constraints_and_requirements == {"budget": "low"}
+    assert output.success_criteria == {"items": ["fast", "cheap"]}
+    assert output.technical_considerations == {"details": "plain text"}
+
+
+def test_missing_fields_still_fail():
+    with pytest.raises(pydantic.ValidationError):
+        RefinementResult.model_validate({"categories": [{"name": "n"}]})
+
+
+def test_disabled_repair_leaves_output_alone(monkeypatch):
+    monkeypatch.setenv("EUREKA_REPAIR", "0")
+    with pytest.raises(pydantic.ValidationError):
+        Category.model_validate({"name": "x" * 60, "questions": ["A?", "B?"]})
+
+
+def test_repairs_are_counted_per_model_and_fix():
+    before = repair.stats()["by_model"].get("Category", {}).get("truncated", 0)
+
+    Category.model_validate({"name": "x" * 60, "questions": ["A?", "B?"]})
+
+    assert repair.stats()["by_model"]["Category"]["truncated"] == before + 1
@@ -0,0 +1,63 @@
+"""The refine and plan endpoints end to end, replayed from the cassette"""
+
+import json
+
+import pytest
+
+from agents import PLAN_MODES
+
+PLAN_REQUEST = {
+    "topic": "Community tool library",
+    "user_idea": "Neighbours lend and borrow tools through an app",
+    "constraints": "Two volunteers, no budget",
+}
+
+
+def sse_events(chunks) -> list:
+    """(event, data) pairs of an SSE body"""
+    events = []
+    for frame in "".join(chunks).split("\n\n"):
+        if frame.strip():
+            event, data = frame.split("\n", 1)
+            events.append((event[len("event: ") :], json.loads(data[len("data: ") :])))
+    return events
+
+
+def test_refine(client):
+    response = client.post("/api/refine", json={"topic": "Community tool library"})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["success"] is True
+    categories = body["result"]["categories"]
+    assert categories
+    assert all(category["questions"] for category in categories)
+
+
+@pytest.mark.parametrize("mode", PLAN_MODES)
+def test_plan(client, mode):
+    response = client.post("/api/agents/plan", json={**PLAN_REQUEST, "mode": mode})
+
+    assert response.status_code == 200
+    result = response.get_json()["result"]
+    assert result["master_prompt"]["objective"]
+    assert result["strategic_roadmap"]["key_phases"]
+    assert result["messages"]
+
+
+def test_plan_stream_is_incremental(client):
+    response = client.post("/api/agents/plan/stream", json=PLAN_REQUEST, buffered=False)
+
+    assert response.status_code == 200
+    chunks = [
+        chunk.decode() if isinstance(chunk, bytes) else chunk
+        for chunk in response.response
+    ]
+    response.close()
+    events = [event for event, _ in sse_events(chunks)]
+    # One frame per chunk: each event is sent as soon as it is known
+    assert len(chunks) == len(events)
+    assert events[0] == "master_prompt"
+    assert events[-1] == "done"
+    # Phases come from the planner's replayed stream, ahead of the roadmap
+    assert "phase" in events[: events.index("strategic_roadmap")]
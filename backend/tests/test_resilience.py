@@ -0,0 +1,147 @@
+"""Rate limiting, retries and hedging of LLM calls"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+import resilience
+
+
+@pytest.fixture
+def stage_metrics(monkeypatch):
+    """Fresh per-stage counters, so tests do not see each other's calls"""
+    metrics = resilience._StageMetrics()
+    monkeypatch.setattr(resilience, "_metrics", metrics)
+    return metrics
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, "_backoff", lambda attempt, error: 0.0)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _failing(errors: list, result="ok"):
+    """fn raising each of errors in turn, then returning result"""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    fn.calls = calls
+    return fn
+
+
+def test_retryable_errors_are_retried(stage_metrics, no_backoff):
+    fn = _failing([httpx.ConnectError("refused"), StatusError(503)])
+
+    assert resilience.call("test", fn) == "ok"
+    counts = stage_metrics.stats()["test"]
+    assert (counts["calls"], counts["retries"]) == (3, 2)
+
+
+def test_other_errors_propagate_unchanged(stage_metrics, no_backoff):
+    fn = _failing([StatusError(400)])
+
+    with pytest.raises(StatusError):
+        resilience.call("test", fn)
+    assert len(fn.calls) == 1
+    assert stage_metrics.stats()["test"]["errors"] == 1
+
+
+def test_give_up_after_max_retries(stage_metrics, no_backoff):
+    fn = _failing([StatusError(429)] * (resilience.MAX_RETRIES + 1))
+
+    with pytest.raises(resilience.LLMUnavailableError) as raised:
+        resilience.call("test", fn)
+    assert raised.value.status_code == 429
+    assert len(fn.calls) == resilience.MAX_RETRIES + 1
+    assert stage_metrics.stats()["test"]["failures"] == 1
+
+
+def test_async_call_retries(stage_metrics, no_backoff):
+    fn = _failing([httpx.ReadTimeout("slow")])
+
+    async def afn():
+        return fn()
+
+    assert asyncio.run(resilience.acall("test", afn)) == "ok"
+    assert stage_metrics.stats()["test"]["retries"] == 1
+
+
+def test_sync_hedge_wins_and_the_loser_is_counted(stage_metrics):
+    release_primary = threading.Event()
+    answers = iter(["primary", "hedge"])
+
+    def fn():
+        answer = next(answers)
+        if answer == "primary":
+            release_primary.wait(5)
+        return {"answer": answer}
+
+    assert resilience._hedged("test", fn, delay=0.01) == {"answer": "hedge"}
+    release_primary.set()
+    # The primary's done callback runs on its thread just after it returns
+    deadline = time.monotonic() + 5
+    while "wasted_tokens" not in stage_metrics.stats()["test"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    counts = stage_metrics.stats()["test"]
+    assert counts["hedges"] == counts["hedges_won"] == 1
+    assert counts["wasted_tokens"] == resilience._usage_tokens({"answer": "primary"})
+
+
+def test_limiter_spaces_calls_made_together():
+    limiter = resilience.AdaptiveLimiter(reserve=1)
+    limiter.observe(
+        {"x-ratelimit-remaining-requests": "10", "x-ratelimit-reset-requests": "1s"}
+    )
+
+    delays = [limiter.delay() for _ in range(4)]
+
+    # Each call takes the next 0.1 s slot instead of all leaving at once
+    assert delays[0] == 0.0
+    assert delays[1:] == pytest.approx([0.1, 0.2, 0.3], abs=0.01)
+    assert limiter.stats()["waits"] == 3
+
+
+def test_limiter_waits_for_the_reset_at_the_reserve():
+    limiter = resilience.AdaptiveLimiter(reserve=1)
+    limiter.observe(
+        {"x-ratelimit-remaining-requests": "1", "x-ratelimit-reset-requests": "2s"}
+    )
+
+    assert limiter.delay() == pytest.approx(2.0, abs=0.01)
+    assert limiter.delay() == pytest.approx(2.0, abs=0.01)
+
+
+def test_async_hedge_loser_tokens_are_counted_as_wasted(stage_metrics):
+    answers = iter([(0.2, {"answer": "primary"}), (0.0, {"answer": "hedge"})])
+
+    async def fn():
+        pause, result = next(answers)
+        await asyncio.sleep(pause)
+        return result
+
+    async def scenario():
+        result = await resilience._ahedged("test", fn, delay=0.01)
+        # The loser runs to completion in the background
+        await asyncio.sleep(0.3)
+        return result
+
+    assert asyncio.run(scenario()) == {"answer": "hedge"}
+    counts = stage_metrics.stats()["test"]
+    assert counts["hedges"] == counts["hedges_won"] == 1
+    assert counts["wasted_tokens"] == resilience._usage_tokens({"answer": "primary"})
+    assert not resilience._pending_losers
@@ -0,0 +1,59 @@
+"""Model routing: health windows and failover between models"""
+
+import httpx
+import pytest
+
+import resilience
+import router
+
+
+@pytest.fixture
+def model_router(monkeypatch):
+    monkeypatch.setenv("EUREKA_MODELS_TESTSTAGE", "primary,backup")
+    monkeypatch.setattr(router, "EXPLORE", 0.0)
+    monkeypatch.setattr(resilience, "_backoff", lambda attempt, error: 0.0)
+    instance = router.Router()
+    monkeypatch.setattr(router, "get_router", lambda: instance)
+    return instance
+
+
+def test_retry_fails_over_to_another_model(model_router):
+    calls = []
+
+    def fn(model):
+        calls.append(model)
+        if model == "primary":
+            raise httpx.ConnectError("connection refused")
+        return model
+
+    assert router.call("teststage", fn) == "backup"
+    assert calls == ["primary", "backup"]
+    assert model_router.stats()["stages"]["teststage"]["reasons"]["fallback"] == 1
+
+
+def test_failing_model_is_skipped_until_its_cooldown_ends(model_router, monkeypatch):
+    for _ in range(router.MIN_SAMPLES):
+        model_router.record("teststage", "primary", False)
+    assert not model_router.stats()["models"]["primary"]["healthy"]
+    assert model_router.choose("teststage") == "backup"
+
+    # After the cooldown the model is probed again with a fresh window
+    monkeypatch.setattr(router, "COOLDOWN", 0.0)
+    model_router._unhealthy_until["primary"] = 0.0
+    assert model_router.choose("teststage") == "primary"
+    assert model_router.stats()["models"]["primary"]["outcomes"] == 0
+
+
+def test_healthy_models_are_ranked_by_latency(model_router):
+    for _ in range(router.MIN_SAMPLES):
+        model_router.record("teststage", "primary", True, 2.0)
+        model_router.record("teststage", "backup", True, 0.5)
+
+    assert model_router.choose("teststage") == "backup"
+    assert model_router.stats()["stages"]["teststage"]["reasons"]["fastest"] == 1
+
+
+def test_everything_failed_picks_the_model_recovering_first(model_router):
+    model_router._unhealthy_until.update({"primary": 1e12, "backup": 1e11})
+
+    assert model_router.choose("teststage") == "backup"
@@ -0,0 +1,110 @@
+"""The result store: saving, pagination, ETags and failure handling"""
+
+import hashlib
+import logging
+
+import pytest
+
+import store
+
+
+def test_unopenable_database_disables_saving(monkeypatch, caplog):
+    monkeypatch.setenv("EUREKA_STORE", "1")
+    monkeypatch.setenv("EUREKA_STORE_DB", "/nonexistent/dir/store.db")
+
+    with caplog.at_level(logging.WARNING, logger="store"):
+        assert store.save("plan", "ab" * 32, "topic", {"a": 1}) is None
+        assert store.save("plan", "cd" * 32, "topic", {"a": 2}) is None
+        assert store.stats() == {"enabled": False}
+
+    # Logged once, not per request
+    assert len(caplog.records) == 1
+
+
+@pytest.fixture
+def result_store(tmp_path):
+    return store.ResultStore(str(tmp_path / "store.db"))
+
+
+def test_saving_a_request_again_replaces_changed_content(result_store):
+    key = "ab" * 32
+    first_id, first_etag = result_store.save("plan", key, "topic", {"v": 1})
+
+    # Unchanged content keeps the row as it is
+    assert result_store.save("plan", key, "topic", {"v": 1}) == (first_id, first_etag)
+    # Recomputed content keeps the id and replaces what it serves
+    item_id, etag = result_store.save("plan", key, "topic", {"v": 2})
+
+    assert item_id == first_id
+    assert etag != first_etag
+    assert result_store.get("plan", item_id)["result"] == {"v": 2}
+    assert result_store.etag("plan", item_id) == etag
+    stats = result_store.stats()
+    assert (stats["saved"], stats["duplicates"], stats["updated"]) == (1, 1, 1)
+
+
+def _key(i: int) -> str:
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+
+def test_keyset_pages_cover_every_item_once(result_store):
+    # Ties on created_at are ordered by id
+    result_store.save_many(
+        "plan",
+        [
+            (_key(i), f"topic {i % 2}", {"i": i}, {"created_at": 1000.0 + i // 3})
+            for i in range(10)
+        ],
+    )
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        items, cursor = result_store.list("plan", limit=4, cursor=cursor)
+        seen += [item["id"] for item in items]
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == 10
+    topic_items, _ = result_store.list("plan", topic="  TOPIC 1", limit=20)
+    assert {item["topic"] for item in topic_items} == {"topic 1"}
+    assert len(topic_items) == 5
+
+
+def test_invalid_cursor_is_rejected(result_store):
+    with pytest.raises(ValueError):
+        result_store.list("plan", cursor="not-a-cursor")
+
+
+def test_item_etag_is_its_content_hash(result_store):
+    first_id, etag = result_store.save("plan", _key(1), "topic", {"a": 1})
+    _, same = result_store.save("refine", _key(2), "topic", {"a": 1})
+
+    assert etag == same
+    assert result_store.etag("plan", first_id) == etag
+    # Items are only served for their own kind
+    assert result_store.etag("refine", first_id) is None
+    assert result_store.get("refine", first_id) is None
+
+
+def test_etag_matches_if_none_match_lists():
+    assert store.etag_matches('"abc"', "abc")
+    assert store.etag_matches('W/"abc", "def"', "abc")
+    assert store.etag_matches("*", "abc")
+    assert not store.etag_matches('"abd"', "abc")
+    assert not store.etag_matches(None, "abc")
+
+
+def test_list_etag_changes_with_the_page(result_store):
+    for i in range(3):
+        result_store.save("plan", _key(i), "topic", {"i": i})
+    items, cursor = result_store.list("plan", limit=2)
+    etag = store.list_etag(items, cursor)
+
+    assert store.list_etag(*result_store.list("plan", limit=2)) == etag
+    assert store.list_etag(items, None) != etag
+    # Content replaced by a new save of one of the page's requests
+    result_store.save("plan", _key(2), "topic", {"i": "changed"})
+    assert store.list_etag(*result_store.list("plan", limit=2)) != etag
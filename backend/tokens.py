@@ -0,0 +1,99 @@
+"""
+Prompt token budgeting for Eureka
+
+Helpers that keep what we send to the model small: a cheap token estimate,
+trimming of oversized user input to a budget, and a compact plain-text
+rendering of structured agent outputs passed between nodes.
+
+Configuration (environment):
+    EUREKA_USER_IDEA_TOKEN_BUDGET    estimated tokens of user_idea sent to the
+                                     Strategist (default 1500, 0 disables)
+    EUREKA_CONSTRAINTS_TOKEN_BUDGET  same for constraints (default 500)
+"""
+
+from collections import Counter
+import os
+import threading
+
+# Llama-family tokenizers average about four characters per English token
+CHARS_PER_TOKEN = 4
+
+_lock = threading.Lock()
+_trimmed: Counter = Counter()
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def input_budget(field: str) -> int:
+    defaults = {"user_idea": "1500", "constraints": "500"}
+    return int(os.getenv(f"EUREKA_{field.upper()}_TOKEN_BUDGET", defaults[field]))
+
+
+def trim_to_budget(text: str, budget: int, field: str = "input") -> str:
+    """
+    text unchanged if it fits in budget tokens, otherwise its beginning and
+    end (where ideas and constraints are usually stated) around a marker
+    saying how much was left out
+    """
+    if budget <= 0 or estimate_tokens(text) <= budget:
+        return text
+    keep = budget * CHARS_PER_TOKEN
+    head, tail = text[: keep * 3 // 4], text[-(keep // 4) :]
+    omitted = len(text) - len(head) - len(tail)
+    with _lock:
+        _trimmed[field] += 1
+    return f"{head.rstrip()}\n[... {omitted} characters omitted ...]\n{tail.lstrip()}"
+
+
+def trim_input(text: str, field: str) -> str:
+    """trim_to_budget() with the configured budget for field"""
+    return trim_to_budget(text, input_budget(field), field)
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def compact(value, indent: int = 0) -> str:
+    """
+    Render dicts/lists/scalars as indented "key: value" / "- item" lines.
+    About a third fewer tokens than a Python repr or JSON of the same data
+    (no quotes, braces or commas); empty fields are left out.
+    """
+    pad = "  " * indent
+    if isinstance(value, dict):
+        lines = []
+        for key, item in value.items():
+            if _is_empty(item):
+                continue
+            if isinstance(item, (dict, list)):
+                lines.append(f"{pad}{key}:\n{compact(item, indent + 1)}")
+            else:
+                lines.append(f"{pad}{key}: {item}")
+        return "\n".join(lines)
+    if isinstance(value, list):
+        lines = []
+        for item in value:
+            if _is_empty(item):
+                continue
+            if isinstance(item, (dict, list)):
+                # Nested items start on the dash line, continue indented
+                nested = compact(item, indent + 1).lstrip()
+                lines.append(f"{pad}- {nested}")
+            else:
+                lines.append(f"{pad}- {item}")
+        return "\n".join(lines)
+    return f"{pad}{value}"
+
+
+def stats() -> dict:
+    with _lock:
+        trimmed = dict(_trimmed)
+    return {
+        "budgets": {
+            field: input_budget(field) for field in ("user_idea", "constraints")
+        },
+        "trimmed": trimmed,
+    }
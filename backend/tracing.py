@@ -1,23 +1,129 @@
-from phoenix.otel import register
+"""
+Phoenix / OpenTelemetry tracing for Eureka
+
+Nothing happens on import: init() sets tracing up the first time an LLM
+client is built (see clients.py), so processes and tools that never call
+Groq pay nothing, and a disabled or missing collector never blocks startup.
+
+Groq calls are traced to the "nexhacks-criticality" project and LangChain /
+LangGraph runs to "nexhacks-refinement". Spans are head-sampled per trace and
+exported from a background thread in batches; when the bounded queue is full
+new spans are dropped instead of blocking the request. Buffered spans are
+flushed when the process exits.
+
+Configuration (environment):
+    EUREKA_TRACING                "0" disables tracing (default "1")
+    EUREKA_TRACE_SAMPLE_RATIO     fraction of traces kept, 0..1 (default 1.0)
+    EUREKA_TRACE_BATCH            "0" exports each span synchronously, as
+                                  before batching existed (default "1")
+    EUREKA_TRACE_QUEUE_SIZE       spans buffered before dropping (default 2048)
+    EUREKA_TRACE_BATCH_SIZE       spans per export request (default 512)
+    EUREKA_TRACE_EXPORT_DELAY_MS  time between exports (default 5000)
+    EUREKA_TRACE_EXPORT_TIMEOUT   seconds per export request (default 10)
+    PHOENIX_COLLECTOR_ENDPOINT    collector URL, read by Phoenix
+"""
+
+import logging
+import os
+import threading
+
 from dotenv import load_dotenv
-from openinference.instrumentation.langchain import LangChainInstrumentor
-from openinference.instrumentation.groq import GroqInstrumentor
 
 load_dotenv()
 
-tracer_provider_groq = register(
-    project_name="nexhacks-criticality",  # Default is 'default'
-    auto_instrument=True,  # Auto-instrument your app based on installed OI dependencies
-    set_global_tracer_provider=False,
-)
+logger = logging.getLogger(__name__)
+
+GROQ_PROJECT = "nexhacks-criticality"
+LANGCHAIN_PROJECT = "nexhacks-refinement"
+
+_lock = threading.Lock()
+_initialized = False
+_providers: dict = {}
+
+
+def enabled() -> bool:
+    return os.getenv("EUREKA_TRACING", "1") == "1"
+
+
+def sample_ratio() -> float:
+    return min(1.0, max(0.0, float(os.getenv("EUREKA_TRACE_SAMPLE_RATIO", "1.0"))))
+
+
+def _span_processor():
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+    from phoenix.otel import HTTPSpanExporter
+
+    exporter = HTTPSpanExporter(
+        timeout=float(os.getenv("EUREKA_TRACE_EXPORT_TIMEOUT", "10"))
+    )
+    if os.getenv("EUREKA_TRACE_BATCH", "1") != "1":
+        return SimpleSpanProcessor(exporter)
+    return BatchSpanProcessor(
+        exporter,
+        max_queue_size=int(os.getenv("EUREKA_TRACE_QUEUE_SIZE", "2048")),
+        max_export_batch_size=int(os.getenv("EUREKA_TRACE_BATCH_SIZE", "512")),
+        schedule_delay_millis=float(os.getenv("EUREKA_TRACE_EXPORT_DELAY_MS", "5000")),
+        export_timeout_millis=float(os.getenv("EUREKA_TRACE_EXPORT_TIMEOUT", "10"))
+        * 1000,
+    )
+
+
+def _tracer_provider(project_name: str):
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from phoenix.otel import PROJECT_NAME, TracerProvider
+
+    provider = TracerProvider(
+        resource=Resource.create({PROJECT_NAME: project_name}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio())),
+        protocol="http/protobuf",
+        verbose=False,
+    )
+    # Replaces Phoenix's default synchronous processor
+    provider.add_span_processor(_span_processor())
+    return provider
+
+
+def init() -> bool:
+    """
+    Register the tracer providers and instrument Groq and LangChain, once
+    per process. Returns whether tracing is active.
+    """
+    global _initialized
+    if _initialized or not enabled():
+        return bool(_providers)
+
+    with _lock:
+        if _initialized:
+            return bool(_providers)
+        _initialized = True
+        try:
+            from openinference.instrumentation.groq import GroqInstrumentor
+            from openinference.instrumentation.langchain import LangChainInstrumentor
+
+            _providers[GROQ_PROJECT] = _tracer_provider(GROQ_PROJECT)
+            GroqInstrumentor().instrument(tracer_provider=_providers[GROQ_PROJECT])
+            _providers[LANGCHAIN_PROJECT] = _tracer_provider(LANGCHAIN_PROJECT)
+            LangChainInstrumentor().instrument(
+                tracer_provider=_providers[LANGCHAIN_PROJECT]
+            )
+        except ImportError as e:
+            logger.warning("Tracing disabled, instrumentation unavailable: %s", e)
+            _providers.clear()
+    return bool(_providers)
+
 
-GroqInstrumentor().instrument(tracer_provider=tracer_provider_groq)
+def tracer(project_name: str = LANGCHAIN_PROJECT):
+    """OpenTelemetry tracer of a project, or None while tracing is inactive"""
+    provider = _providers.get(project_name)
+    return provider.get_tracer("eureka") if provider is not None else None
 
-# configure the Phoenix tracer
-tracer_provider_refinement = register(
-    project_name="nexhacks-refinement",  # Default is 'default'
-    auto_instrument=True,  # Auto-instrument your app based on installed OI dependencies
-    set_global_tracer_provider=False,
-)
 
-LangChainInstrumentor().instrument(tracer_provider=tracer_provider_refinement)
+def stats() -> dict:
+    return {
+        "enabled": enabled(),
+        "active": bool(_providers),
+        "sample_ratio": sample_ratio(),
+        "batch": os.getenv("EUREKA_TRACE_BATCH", "1") == "1",
+        "queue_size": int(os.getenv("EUREKA_TRACE_QUEUE_SIZE", "2048")),
+    }